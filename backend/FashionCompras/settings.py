@@ -36,6 +36,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',  # Add CorsMiddleware at the top
+    'app.metrics.PerformanceMiddleware',  # Latency/SQL metrics and Server-Timing header
+    'app.db_router.ReplicaRoutingMiddleware',  # Safe-method reads go to DATABASE_REPLICAS
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -67,15 +69,122 @@ WSGI_APPLICATION = 'FashionCompras.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+#
+# DJANGO_DB_ENGINE picks the profile: 'sqlite' (default) or 'postgresql'.
+# Connection details come from DJANGO_DB_NAME/USER/PASSWORD/HOST/PORT.
+
+DB_ENGINE = os.environ.get('DJANGO_DB_ENGINE', 'sqlite')
+
+# NORMAL sync is durable across app crashes in WAL mode and fsyncs only at
+# checkpoints; the rest trade memory for fewer reads
+SQLITE_PRAGMAS = (
+    'PRAGMA synchronous=NORMAL;'
+    'PRAGMA mmap_size=268435456;'
+    'PRAGMA cache_size=-32000;'
+    'PRAGMA temp_store=MEMORY;'
+)
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DJANGO_DB_NAME', 'fashioncompras'),
+            'USER': os.environ.get('DJANGO_DB_USER', 'fashioncompras'),
+            'PASSWORD': os.environ.get('DJANGO_DB_PASSWORD', ''),
+            'HOST': os.environ.get('DJANGO_DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DJANGO_DB_PORT', '5432'),
+            'OPTIONS': {},
+        }
+    }
+    if os.environ.get('DJANGO_DB_POOL', '1') == '1':
+        # psycopg's connection pool (requires `psycopg[pool]`); connections are
+        # returned to the pool after each request, so CONN_MAX_AGE must stay 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('DJANGO_DB_POOL_MIN', 2)),
+            'max_size': int(os.environ.get('DJANGO_DB_POOL_MAX', 10)),
+            'timeout': 10,
+        }
+    else:
+        DATABASES['default']['CONN_MAX_AGE'] = int(os.environ.get('DJANGO_DB_CONN_MAX_AGE', 60))
+        DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DJANGO_DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': int(os.environ.get('DJANGO_DB_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                # Take the write lock at BEGIN: a transaction that read first and then
+                # writes can otherwise fail with "database is locked" mid-checkout
+                'transaction_mode': 'IMMEDIATE',
+                # busy_timeout: seconds a writer waits for the lock before failing
+                'timeout': 20,
+                # journal_mode=WAL persists in the file; migration 0019 switches it once
+                'init_command': SQLITE_PRAGMAS,
+            },
+            # A file, not the shared in-memory database Django would use: only a file
+            # database makes concurrent writers wait for the lock (busy timeout) as
+            # they do in production, instead of failing at once
+            'TEST': {'NAME': os.environ.get('DJANGO_TEST_DB_NAME', BASE_DIR / 'test_db.sqlite3')},
+        }
+    }
 
-DATABASES = {
+# Read replicas (see app/db_router.py). DJANGO_DB_REPLICAS is a comma-separated
+# list of PostgreSQL hosts or SQLite files; `manage.py sync_sqlite_replicas`
+# refreshes SQLite copies. Tests run every replica against the test database.
+DATABASE_REPLICAS = []
+for _index, _location in enumerate(filter(None, os.environ.get('DJANGO_DB_REPLICAS', '').split(',')), start=1):
+    _replica = {
+        **DATABASES['default'],
+        'OPTIONS': dict(DATABASES['default'].get('OPTIONS', {})),
+        'TEST': {'MIRROR': 'default'},
+    }
+    if DB_ENGINE == 'postgresql':
+        _replica['HOST'] = _location.strip()
+    else:
+        # Read-only URI: a missing replica fails to open instead of being created empty
+        _replica['NAME'] = f'file:{_location.strip()}?mode=ro'
+        _replica['OPTIONS'].update(uri=True, init_command=SQLITE_PRAGMAS)
+        _replica['OPTIONS'].pop('transaction_mode', None)
+    DATABASES[f'replica_{_index}'] = _replica
+    DATABASE_REPLICAS.append(f'replica_{_index}')
+
+DATABASE_ROUTERS = ['app.db_router.ReplicaRouter']
+# After a write, the client reads from the primary for this long
+REPLICA_PIN_SECONDS = 10
+# How long a replica that failed to connect is skipped
+REPLICA_RETRY_SECONDS = 30
+
+AUTH_USER_MODEL = 'app.Auth'
+
+# Performance instrumentation (see app/metrics.py)
+SERVER_TIMING_HEADER = True
+
+# Cache
+# Any Django cache backend works; set DJANGO_CACHE_BACKEND/DJANGO_CACHE_LOCATION
+# to e.g. 'django.core.cache.backends.filebased.FileBasedCache' and a directory.
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': os.environ.get('DJANGO_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('DJANGO_CACHE_LOCATION', 'fashioncompras'),
     }
 }
 
-AUTH_USER_MODEL = 'app.Auth'
+# Catalog API response cache (see app/catalog_cache.py). With more than one
+# worker process this needs a shared cache backend: `check --deploy` fails on
+# LocMemCache unless CATALOG_CACHE_TIMEOUT is 0.
+CATALOG_CACHE_ALIAS = 'default'
+CATALOG_CACHE_TIMEOUT = 300
+CART_SUMMARY_CACHE_TIMEOUT = 300
+
+# Server-rendered shop fragments and static pages (see app/shop_cache.py)
+SHOP_CACHE_TIMEOUT = 3600
+
+# Stock reservations at add-to-cart (see app/reservations.py). When enabled,
+# run `manage.py release_reservations --interval 60` to return lapsed holds.
+STOCK_RESERVATIONS = os.environ.get('STOCK_RESERVATIONS', '0') == '1'
+STOCK_RESERVATION_TTL = 15 * 60
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -117,6 +226,22 @@ STATIC_URL = 'static/'
 MEDIA_URL = '/media/'  
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Uploads are stored once per unique content (see app/storage.py)
+STORAGES = {
+    'default': {
+        'BACKEND': 'app.storage.ContentAddressedStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
+# Image paths in staff product imports (POST /api/products/import/) must be inside this directory
+PRODUCT_IMPORT_IMAGE_ROOT = os.path.join(MEDIA_ROOT, 'imports')
+
+# Worker processes for resizing uploads into WebP variants (0 = inline)
+IMAGE_VARIANT_WORKERS = min(4, os.cpu_count() or 1)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -134,7 +259,7 @@ CORS_ALLOW_CREDENTIALS = True
 # DRF settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'app.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
@@ -151,7 +276,14 @@ SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
     'UPDATE_LAST_LOGIN': True,
+    # Cached user lookups, blacklist index and write-behind last_login (see app/authentication.py)
+    'TOKEN_OBTAIN_SERIALIZER': 'app.authentication.TokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'app.authentication.TokenRefreshSerializer',
+    'TOKEN_VERIFY_SERIALIZER': 'app.authentication.TokenVerifySerializer',
 }
+AUTH_USER_CACHE_TIMEOUT = 300
+LAST_LOGIN_FLUSH_SECONDS = 60
+LAST_LOGIN_BATCH_SIZE = 100
 
 # Logging for API errors
 LOGGING = {
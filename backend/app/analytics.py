@@ -0,0 +1,217 @@
+"""
+Incrementally maintained sales rollups for the staff analytics API.
+
+Checkout adds each order to the daily, product and category rollups in its own
+transaction (``record_order``), and Order signals keep the per-status rollup in
+step with status changes and take deleted orders back out. Dashboards then
+read a few rollup rows instead of every order. ``rebuild()`` (the
+``backfill_analytics`` command) recomputes all rollups from the order tables.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connections, router, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import (
+    CENT, MONEY, CategorySales, DailySales, Order, OrderItem, ProductSales, StatusSales,
+)
+
+ROLLUPS = (DailySales, StatusSales, ProductSales, CategorySales)
+
+
+def _increment(model, key, rows):
+    """
+    Add ``rows`` ({key value: {counter: delta}}) to ``model``'s counters in one
+    INSERT ... ON CONFLICT DO UPDATE, creating missing rows.
+    """
+    rows = {value: deltas for value, deltas in rows.items() if any(deltas.values())}
+    if not rows:
+        return
+    connection = connections[router.db_for_write(model)]
+    if connection.vendor not in ("sqlite", "postgresql"):
+        for value, deltas in rows.items():
+            changes = {counter: F(counter) + delta for counter, delta in deltas.items()}
+            if not model.objects.filter(**{key: value}).update(**changes):
+                model.objects.create(**{key: value}, **deltas)
+        return
+
+    table = model._meta.db_table
+    key_column = model._meta.get_field(key).column
+    counters = list(next(iter(rows.values())))
+    values = ", ".join(["(" + ", ".join(["%s"] * (len(counters) + 1)) + ")"] * len(rows))
+    params = [param for value, deltas in rows.items() for param in (value, *(deltas[c] for c in counters))]
+    updates = ", ".join(f"{counter} = {table}.{counter} + excluded.{counter}" for counter in counters)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} ({key_column}, {', '.join(counters)}) VALUES {values} "
+            f"ON CONFLICT ({key_column}) DO UPDATE SET {updates}",
+            params,
+        )
+
+
+def _add_order(order, items, sign):
+    day = timezone.localdate(order.created_at)
+    products = defaultdict(lambda: {"units": 0, "revenue": Decimal("0")})
+    categories = defaultdict(lambda: {"units": 0, "revenue": Decimal("0")})
+    for item in items:
+        revenue = item.price * item.quantity * sign
+        for totals in (products[item.product_id], categories[item.product.category_id]):
+            totals["units"] += item.quantity * sign
+            totals["revenue"] += revenue
+
+    _increment(DailySales, "date", {day: {
+        "orders": sign,
+        "units": sum(item.quantity for item in items) * sign,
+        "revenue": order.total_amount * sign,
+    }})
+    _increment(ProductSales, "product", products)
+    _increment(CategorySales, "category", categories)
+
+
+def record_order(order, items):
+    """Add a placed order and its OrderItems (products loaded) to the rollups."""
+    _add_order(order, items, 1)
+
+
+def forget_order(order):
+    """Take a deleted order back out of the daily, product and category rollups."""
+    _add_order(order, list(order.items.select_related("product")), -1)
+
+
+def record_status_change(previous, current):
+    """
+    Move an order between status rollups. ``previous``/``current`` are
+    (status, total_amount) pairs, or None for a created/deleted order.
+    """
+    rows = defaultdict(lambda: {"orders": 0, "revenue": Decimal("0")})
+    if previous is not None:
+        rows[previous[0]]["orders"] -= 1
+        rows[previous[0]]["revenue"] -= Decimal(previous[1])
+    if current is not None:
+        rows[current[0]]["orders"] += 1
+        rows[current[0]]["revenue"] += Decimal(current[1])
+    _increment(StatusSales, "status", rows)
+
+
+@transaction.atomic
+def rebuild():
+    """Recompute every rollup from Order/OrderItem. Returns the number of orders counted."""
+    for model in ROLLUPS:
+        model.objects.all().delete()
+
+    line_revenue = Sum(F("price") * F("quantity"), output_field=MONEY)
+    units_by_day = dict(
+        OrderItem.objects.annotate(day=TruncDate("order__created_at"))
+        .values("day").annotate(units=Sum("quantity")).order_by().values_list("day", "units")
+    )
+    daily = (
+        Order.objects.annotate(day=TruncDate("created_at")).values("day")
+        .annotate(orders=Count("id"), revenue=Sum("total_amount")).order_by()
+    )
+    DailySales.objects.bulk_create(
+        DailySales(date=row["day"], orders=row["orders"], units=units_by_day.get(row["day"]) or 0,
+                   revenue=row["revenue"])
+        for row in daily
+    )
+    StatusSales.objects.bulk_create(
+        StatusSales(**row)
+        for row in Order.objects.values("status").annotate(orders=Count("id"), revenue=Sum("total_amount")).order_by()
+    )
+    ProductSales.objects.bulk_create(
+        ProductSales(product_id=row["product"], units=row["units"], revenue=row["revenue"])
+        for row in OrderItem.objects.values("product").annotate(units=Sum("quantity"), revenue=line_revenue).order_by()
+    )
+    CategorySales.objects.bulk_create(
+        CategorySales(category_id=row["product__category"], units=row["units"], revenue=row["revenue"])
+        for row in OrderItem.objects.values("product__category")
+        .annotate(units=Sum("quantity"), revenue=line_revenue).order_by()
+    )
+    return DailySales.objects.aggregate(total=Sum("orders"))["total"] or 0
+
+
+def _money(value):
+    return str(Decimal(value or 0).quantize(CENT))
+
+
+def _average(revenue, orders):
+    return _money(Decimal(revenue or 0) / orders) if orders else _money(0)
+
+
+def daily_revenue(days):
+    """One row per day for the last ``days`` days, zero-filled."""
+    today = timezone.localdate()
+    start = today - timedelta(days=days - 1)
+    rows = {row.date: row for row in DailySales.objects.filter(date__gte=start)}
+    result = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        row = rows.get(day)
+        orders, revenue = (row.orders, row.revenue) if row else (0, 0)
+        result.append({
+            "date": day.isoformat(),
+            "orders": orders,
+            "units": row.units if row else 0,
+            "revenue": _money(revenue),
+            "avg_order_value": _average(revenue, orders),
+        })
+    return result
+
+
+def totals(days):
+    start = timezone.localdate() - timedelta(days=days - 1)
+    row = DailySales.objects.filter(date__gte=start).aggregate(
+        orders=Sum("orders"), units=Sum("units"), revenue=Sum("revenue"),
+    )
+    orders = row["orders"] or 0
+    return {
+        "orders": orders,
+        "units": row["units"] or 0,
+        "revenue": _money(row["revenue"]),
+        "avg_order_value": _average(row["revenue"], orders),
+    }
+
+
+def orders_by_status():
+    return [
+        {"status": row.status, "orders": row.orders, "revenue": _money(row.revenue)}
+        for row in StatusSales.objects.filter(orders__gt=0).order_by("-orders", "status")
+    ]
+
+
+def top_products(by, limit):
+    rows = ProductSales.objects.select_related("product").filter(units__gt=0).order_by(f"-{by}", "product_id")
+    return [
+        {"product_id": row.product_id, "name": row.product.name, "units": row.units, "revenue": _money(row.revenue)}
+        for row in rows[:limit]
+    ]
+
+
+def category_share():
+    rows = list(CategorySales.objects.select_related("category").filter(units__gt=0).order_by("-revenue"))
+    total = sum((row.revenue for row in rows), Decimal("0"))
+    return [
+        {
+            "category": row.category.slug,
+            "name": row.category.name,
+            "units": row.units,
+            "revenue": _money(row.revenue),
+            "share": round(float(row.revenue / total), 4) if total else 0.0,
+        }
+        for row in rows
+    ]
+
+
+def summary(days=30, limit=10):
+    """Everything the admin dashboard draws, in a fixed number of small queries."""
+    return {
+        "days": days,
+        "totals": totals(days),
+        "daily": daily_revenue(days),
+        "by_status": orders_by_status(),
+        "top_products": {"units": top_products("units", limit), "revenue": top_products("revenue", limit)},
+        "categories": category_share(),
+    }
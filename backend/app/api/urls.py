@@ -5,9 +5,11 @@ from rest_framework_simplejwt.views import (
     TokenRefreshView,
     TokenVerifyView,
 )
+from app import async_views
+from app.metrics import metrics_view
 from app.api_views import (
     ProductViewSet, CategoryViewSet, CartViewSet, OrderViewSet,
-    UserProfileViewSet, RegisterView, get_current_user
+    UserProfileViewSet, AnalyticsViewSet, ExportViewSet, RegisterView, get_current_user
 )
 
 router = routers.DefaultRouter()
@@ -16,6 +18,8 @@ router.register('categories', CategoryViewSet, basename='category')
 router.register('cart', CartViewSet, basename='cart')
 router.register('orders', OrderViewSet, basename='order')
 router.register('profile', UserProfileViewSet, basename='profile')
+router.register('analytics', AnalyticsViewSet, basename='analytics')
+router.register('export', ExportViewSet, basename='export')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -24,4 +28,10 @@ urlpatterns = [
     path('auth/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('auth/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('auth/token/verify/', TokenVerifyView.as_view(), name='token_verify'),
+    path('metrics/', metrics_view, name='metrics'),
+    # Async (ASGI) read path, side by side with the DRF views above
+    path('async/products/', async_views.product_list, name='async-product-list'),
+    path('async/products/<int:pk>/', async_views.product_detail, name='async-product-detail'),
+    path('async/categories/', async_views.category_list, name='async-category-list'),
+    path('async/cart/summary/', async_views.cart_summary_view, name='async-cart-summary'),
 ]
\ No newline at end of file
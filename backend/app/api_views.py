@@ -3,61 +3,113 @@ from rest_framework.exceptions import ValidationError
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.generics import CreateAPIView
+from rest_framework.parsers import MultiPartParser
 from django.contrib.auth import get_user_model
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from .serializers import UserSerializer
+from . import search as product_search
+from .pagination import CursorOrPageNumberPagination
+from . import analytics, catalog_cache, cart_summary, exporter, importer, reservations
+from .catalog_cache import CatalogCacheMixin
+from .conditional import conditional_response, make_etag
 
-from django.db.models import Q
-from .models import Product, Category, Cart, CartItem, Order, OrderItem, Auth, ProductImage
+import io
+from decimal import Decimal
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Prefetch, prefetch_related_objects
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from .models import Product, Category, Cart, CartItem, Order, OrderItem, Auth, ProductImage, InsufficientStock
 from .serializers import (
     ProductSerializer, CategorySerializer, CartSerializer, 
-    CartItemSerializer, OrderSerializer, RegisterSerializer,
+    CartItemSerializer, CartBatchSerializer, OrderSerializer, RegisterSerializer,
     UserSerializer
 )
 
 User = get_user_model()
 
+def line_items_prefetch(model):
+    """Prefetch cart/order lines with their products, categories and images in fixed queries."""
+    queryset = model.objects.select_related('product__category').prefetch_related(
+        Prefetch('product__images', queryset=ProductImage.objects.order_by('id'))
+    )
+    if model is CartItem:
+        queryset = queryset.with_line_total()
+    return Prefetch('items', queryset=queryset)
+
+def product_queryset(params):
+    """Available products filtered by the catalog query params (shared with app/async_views.py)."""
+    queryset = Product.objects.with_related().filter(available=True)
+    
+    # Filter by category
+    category = params.get('category', None)
+    if category:
+        queryset = queryset.filter(category__slug=category)
+    
+    # Search
+    search = params.get('search', None)
+    if search:
+        queryset = product_search.search(queryset, search)
+    
+    # Price range
+    min_price = params.get('min_price', None)
+    max_price = params.get('max_price', None)
+    if min_price:
+        queryset = queryset.filter(price__gte=min_price)
+    if max_price:
+        queryset = queryset.filter(price__lte=max_price)
+    
+    if search:
+        return queryset.order_by('search_rank', '-created_at', '-id')
+    return queryset.order_by('-created_at', '-id')
+
 class RegisterView(CreateAPIView):
     queryset = Auth.objects.all()  # Use Auth instead of User
     serializer_class = RegisterSerializer
     permission_classes = [permissions.AllowAny]
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(CatalogCacheMixin, viewsets.ModelViewSet):
     serializer_class = ProductSerializer
     permission_classes = [permissions.AllowAny]
+    pagination_class = CursorOrPageNumberPagination
 
     def get_queryset(self):
-        queryset = Product.objects.filter(available=True)
-        
-        # Filter by category
-        category = self.request.query_params.get('category', None)
-        if category:
-            queryset = queryset.filter(category__slug=category)
-        
-        # Search
-        search = self.request.query_params.get('search', None)
-        if search:
-            queryset = queryset.filter(
-                Q(name__icontains=search) | 
-                Q(description__icontains=search)
-            )
-        
-        # Price range
-        min_price = self.request.query_params.get('min_price', None)
-        max_price = self.request.query_params.get('max_price', None)
-        if min_price:
-            queryset = queryset.filter(price__gte=min_price)
-        if max_price:
-            queryset = queryset.filter(price__lte=max_price)
-        
-        return queryset.order_by('-created_at')
+        return product_queryset(self.request.query_params)
 
     def get_permissions(self):
+        if self.action == 'import_products':
+            return [permissions.IsAdminUser()]
         if self.action in ['create', 'update', 'partial_update', 'destroy']:
             return [permissions.IsAuthenticated()]
         return [permissions.AllowAny()]
 
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser])
+    def import_products(self, request):
+        """Staff bulk import: multipart ``file`` (.csv/.jsonl), optional ``format`` and ``chunk_size``."""
+        upload = request.FILES.get('file')
+        if upload is None:
+            raise ValidationError({'file': 'Upload a CSV or JSONL file'})
+        try:
+            format = request.data.get('format') or importer.detect_format(upload.name)
+        except importer.InvalidImportFile as exc:
+            raise ValidationError({'format': str(exc)})
+        if format not in importer.FORMATS:
+            raise ValidationError({'format': f'Expected one of {", ".join(importer.FORMATS)}'})
+        try:
+            chunk_size = max(1, int(request.data.get('chunk_size', 1000)))
+        except ValueError:
+            raise ValidationError({'chunk_size': 'Must be an integer'})
+
+        # Uploads over FILE_UPLOAD_MAX_MEMORY_SIZE are on disk; either way rows are read lazily
+        stream = io.TextIOWrapper(upload.open('rb'), encoding='utf-8-sig', newline='')
+        report = importer.ProductImporter(
+            chunk_size=chunk_size, image_root=settings.PRODUCT_IMPORT_IMAGE_ROOT,
+        ).run(stream, format)
+        return Response(report.as_dict())
+
     def create(self, request, *args, **kwargs):
         allowed = {'fashion','electronics','food','home','gaming'}
         data = request.data.copy()
@@ -73,7 +125,7 @@ class ProductViewSet(viewsets.ModelViewSet):
         output = ProductSerializer(product, context={'request': request}).data
         return Response(output, status=status.HTTP_201_CREATED)
 
-class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
+class CategoryViewSet(CatalogCacheMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [permissions.AllowAny]
@@ -92,9 +144,25 @@ class CartViewSet(viewsets.ModelViewSet):
         return cart
 
     def list(self, request, *args, **kwargs):
-        cart = self.get_object()
-        serializer = self.get_serializer(cart)
-        return Response(serializer.data)
+        # Totals and counts come from one aggregate query, reused by the ETag and the serializer
+        cart = Cart.objects.with_summary().filter(user=request.user).order_by('id').first()
+        if cart is None:
+            cart = Cart.objects.with_summary().get(pk=self.get_object().pk)
+        last_modified = max(filter(None, [cart.updated_at, cart.products_modified]))
+        etag = make_etag(
+            cart.pk, cart.updated_at, catalog_cache.get_version(),
+            cart.line_count, cart.item_count, cart.products_modified,
+        )
+
+        def build_response():
+            prefetch_related_objects([cart], line_items_prefetch(CartItem))
+            return Response(self.get_serializer(cart).data)
+
+        return conditional_response(request, build_response, etag, last_modified, private=True)
+
+    @action(detail=False, methods=['get'])
+    def summary(self, request):
+        return Response(cart_summary.get_summary(request.user))
 
     @action(detail=False, methods=['post'])
     def add_item(self, request):
@@ -103,25 +171,66 @@ class CartViewSet(viewsets.ModelViewSet):
         quantity = int(request.data.get('quantity', 1))
         
         try:
-            product = Product.objects.get(id=product_id, available=True)
+            product = Product.objects.with_related().get(id=product_id, available=True)
         except Product.DoesNotExist:
             return Response(
                 {"error": "Product not found"}, 
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        cart_item, created = CartItem.objects.get_or_create(
-            cart=cart, product=product,
-            defaults={'quantity': quantity}
-        )
-        
-        if not created:
-            cart_item.quantity += quantity
-            cart_item.save()
+        try:
+            with transaction.atomic():
+                # Single-statement upsert; the (cart, product) unique constraint makes it race-free
+                cart_item = CartItem.objects.add(cart, product, quantity)
+                if reservations.enabled():
+                    reservations.hold(cart, {product.pk: cart_item.quantity})
+        except InsufficientStock as exc:
+            return self._out_of_stock(exc)
+        cart.touch()
 
         serializer = CartItemSerializer(cart_item)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['post'])
+    def batch(self, request):
+        """
+        Apply many ``{product_id, quantity}`` lines at once. ``mode=add`` adds to
+        existing quantities, ``mode=set`` replaces them (0 removes the line).
+        All products are checked in one query and the lines are written with a
+        single upsert, so the request costs the same few queries for any size.
+        """
+        serializer = CartBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        quantities = serializer.quantities()
+        upserts = {product_id: quantity for product_id, quantity in quantities.items() if quantity > 0}
+        removals = [product_id for product_id, quantity in quantities.items() if quantity == 0]
+
+        found = set(Product.objects.filter(id__in=upserts, available=True).values_list('id', flat=True))
+        missing = [product_id for product_id in upserts if product_id not in found]
+        if missing:
+            return Response(
+                {"error": "Products not found", "product_ids": missing},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        try:
+            with transaction.atomic():
+                cart = self.get_object()
+                lines = CartItem.objects.upsert(cart, upserts, increment=serializer.validated_data['mode'] == 'add')
+                if reservations.enabled():
+                    reservations.hold(cart, {line.product_id: line.quantity for line in lines})
+                if removals:
+                    reservations.discard(CartItem.objects.filter(cart=cart, product_id__in=removals))
+        except InsufficientStock as exc:
+            return self._out_of_stock(exc)
+        cart.touch()
+
+        return Response({
+            "items": [{"id": line.pk, "product_id": line.product_id, "quantity": line.quantity} for line in lines],
+            "removed": removals,
+            "summary": cart_summary.get_summary(request.user),
+        })
+
     @action(detail=False, methods=['post'])
     def update_item(self, request):
         cart = self.get_object()
@@ -129,13 +238,21 @@ class CartViewSet(viewsets.ModelViewSet):
         quantity = int(request.data.get('quantity', 1))
         
         try:
-            cart_item = CartItem.objects.get(cart=cart, product_id=product_id)
+            cart_item = CartItem.objects.select_related('product__category').prefetch_related(
+                'product__images'
+            ).get(cart=cart, product_id=product_id)
             if quantity <= 0:
-                cart_item.delete()
+                with transaction.atomic():
+                    reservations.discard(CartItem.objects.filter(pk=cart_item.pk))
+                cart.touch()
                 return Response({"message": "Item removed from cart"})
             else:
-                cart_item.quantity = quantity
-                cart_item.save()
+                with transaction.atomic():
+                    cart_item.quantity = quantity
+                    cart_item.save(update_fields=['quantity'])
+                    if reservations.enabled() or cart_item.reserved:
+                        reservations.hold(cart, {cart_item.product_id: quantity})
+                cart.touch()
                 serializer = CartItemSerializer(cart_item)
                 return Response(serializer.data)
         except CartItem.DoesNotExist:
@@ -143,48 +260,204 @@ class CartViewSet(viewsets.ModelViewSet):
                 {"error": "Item not found in cart"}, 
                 status=status.HTTP_404_NOT_FOUND
             )
+        except InsufficientStock as exc:
+            return self._out_of_stock(exc)
+
+    def _out_of_stock(self, exc):
+        return Response(
+            {
+                "error": "Not enough stock",
+                "details": [
+                    {"product_id": product_id, "available": available}
+                    for product_id, available in exc.available.items()
+                ],
+            },
+            status=status.HTTP_409_CONFLICT
+        )
 
 class OrderViewSet(viewsets.ModelViewSet):
     serializer_class = OrderSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CursorOrPageNumberPagination
 
     def get_queryset(self):
-        return Order.objects.filter(user=self.request.user).order_by('-created_at')
+        return (
+            Order.objects.filter(user=self.request.user)
+            .select_related('user')
+            .prefetch_related(line_items_prefetch(OrderItem))
+            .order_by('-created_at', '-id')
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        last_modified = (
+            Order.objects.filter(user=request.user, pk=kwargs.get('pk'))
+            .values_list('updated_at', flat=True).first()
+        )
+        if last_modified is None:
+            return super().retrieve(request, *args, **kwargs)
+        # Order lines are immutable once placed, so updated_at covers the whole order
+        etag = make_etag('order', kwargs.get('pk'), last_modified)
+        return conditional_response(
+            request, lambda: super(OrderViewSet, self).retrieve(request, *args, **kwargs),
+            etag, last_modified, private=True,
+        )
 
     def perform_create(self, serializer):
-        cart, _ = Cart.objects.get_or_create(user=self.request.user)
+        with transaction.atomic():
+            cart, _ = Cart.objects.get_or_create(user=self.request.user)
+            # Lock the lines (PostgreSQL) so the reservation sweeper cannot
+            # release stock this checkout is converting
+            lines = list(cart.items.select_related('product').select_for_update(of=('self',)))
+            if not lines:
+                raise ValidationError({'cart': 'Your cart is empty'})
+
+            requested, held = {}, {}
+            for line in lines:
+                requested[line.product_id] = requested.get(line.product_id, 0) + line.quantity
+                held[line.product_id] = held.get(line.product_id, 0) + line.reserved
+
+            # Reserved units are already out of stock; only the rest is taken here, with
+            # one conditional UPDATE so concurrent checkouts cannot oversell.
+            try:
+                Product.objects.take_stock({
+                    product_id: quantity - held[product_id]
+                    for product_id, quantity in requested.items() if quantity > held[product_id]
+                })
+            except InsufficientStock as exc:
+                self._raise_insufficient_stock(lines, exc.available, held)
+            Product.objects.return_stock({
+                product_id: held[product_id] - quantity
+                for product_id, quantity in requested.items() if held[product_id] > quantity
+            })
+            # With reservations, stock=0 may only mean other carts hold the rest; those units
+            # can come back, so the product is sold out only once nobody else holds any
+            held_elsewhere = CartItem.objects.filter(product=OuterRef('pk'), reserved__gt=0).exclude(cart=cart)
+            sold_out = (
+                Product.objects.filter(pk__in=requested, stock=0, available=True)
+                .exclude(Exists(held_elsewhere)).update(available=False)
+            )
+            if sold_out:
+                # update() bypasses the post_save signals that normally invalidate the catalog cache.
+                # Only a sell-out changes what listings show; stock counts in cached pages lag
+                # until the entry expires, as they do for reservations.
+                transaction.on_commit(catalog_cache.bump_version)
+
+            total = sum((line.product.price * line.quantity for line in lines), Decimal('0'))
+            order = serializer.save(user=self.request.user, total_amount=total)
+            order_items = OrderItem.objects.bulk_create([
+                OrderItem(order=order, product=line.product, quantity=line.quantity, price=line.product.price)
+                for line in lines
+            ])
+            analytics.record_order(order, order_items)
+            cart.items.all().delete()
+            cart.touch()
+            # Loaded before commit: a read that failed after it would report a placed order as an error
+            prefetch_related_objects([order], line_items_prefetch(OrderItem))
 
+    def _raise_insufficient_stock(self, lines, shortages, held):
+        # Raising inside the atomic block rolls back the whole checkout
         insufficient = []
-        for item in cart.items.select_related('product').all():
-            if item.quantity > (item.product.stock or 0):
+        for line in lines:
+            if line.product_id in shortages:
                 insufficient.append({
-                    'product_id': item.product.id,
-                    'name': item.product.name,
-                    'requested': item.quantity,
-                    'available': item.product.stock or 0,
+                    'product_id': line.product_id,
+                    'name': line.product.name,
+                    'requested': line.quantity,
+                    'available': shortages[line.product_id] + held[line.product_id],
                 })
-        if insufficient:
-            raise ValidationError({
-                'stock': 'Insufficient stock for some items',
-                'details': insufficient,
-            })
+        raise ValidationError({
+            'stock': 'Insufficient stock for some items',
+            'details': insufficient,
+        })
 
-        order = serializer.save(user=self.request.user, total_amount=cart.total())
+class AnalyticsViewSet(viewsets.ViewSet):
+    """Staff dashboards, read from the rollups in app/analytics.py rather than from every order."""
+    permission_classes = [permissions.IsAdminUser]
 
-        for cart_item in cart.items.select_related('product').all():
-            OrderItem.objects.create(
-                order=order,
-                product=cart_item.product,
-                quantity=cart_item.quantity,
-                price=cart_item.product.price
-            )
+    def _int_param(self, request, name, default, maximum):
+        value = request.query_params.get(name, default)
+        try:
+            value = int(value)
+        except (TypeError, ValueError):
+            raise ValidationError({name: 'Must be an integer'})
+        if not 1 <= value <= maximum:
+            raise ValidationError({name: f'Must be between 1 and {maximum}'})
+        return value
+
+    def _days(self, request):
+        return self._int_param(request, 'days', 30, 366)
+
+    def _limit(self, request):
+        return self._int_param(request, 'limit', 10, 100)
+
+    def list(self, request):
+        return self.summary(request)
+
+    @action(detail=False, methods=['get'])
+    def summary(self, request):
+        return Response(analytics.summary(days=self._days(request), limit=self._limit(request)))
+
+    @action(detail=False, methods=['get'])
+    def daily(self, request):
+        days = self._days(request)
+        return Response({
+            'days': days,
+            'totals': analytics.totals(days),
+            'daily': analytics.daily_revenue(days),
+        })
+
+    @action(detail=False, methods=['get'], url_path='status')
+    def by_status(self, request):
+        return Response(analytics.orders_by_status())
+
+    @action(detail=False, methods=['get'], url_path='top-products')
+    def top_products(self, request):
+        by = request.query_params.get('by', 'revenue')
+        if by not in ('units', 'revenue'):
+            raise ValidationError({'by': 'Must be "units" or "revenue"'})
+        return Response(analytics.top_products(by, self._limit(request)))
+
+    @action(detail=False, methods=['get'])
+    def categories(self, request):
+        return Response(analytics.category_share())
+
+class ExportViewSet(viewsets.ViewSet):
+    """
+    Staff CSV/NDJSON dumps of the catalog and order history, streamed in
+    constant memory (see app/exporter.py for the filters). The file type is
+    ``?output=csv|jsonl``: ``format`` is DRF's renderer override.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def _stream(self, request, kind):
+        output = request.query_params.get('output', 'jsonl')
+        if output not in exporter.FORMATS:
+            raise ValidationError({'output': f'Expected one of {", ".join(exporter.FORMATS)}'})
+        try:
+            header, rows = exporter.EXPORTS[kind](request.query_params)
+        except exporter.InvalidExportFilter as exc:
+            raise ValidationError({exc.name: exc.message})
+        # The body is read after ReplicaRoutingMiddleware has reset the request's
+        # routing state, so pick the database (replica or primary) now
+        rows = rows.using(rows.db)
+
+        content = exporter.render(header, rows, output)
+        if isinstance(request._request, ASGIRequest):
+            content = exporter.arender(content)
+        response = StreamingHttpResponse(content, content_type=exporter.CONTENT_TYPES[output])
+        filename = f'{kind}-{timezone.now():%Y%m%d-%H%M%S}.{"csv" if output == "csv" else "jsonl"}'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        # Keep a buffering reverse proxy (nginx) from holding the stream back
+        response['X-Accel-Buffering'] = 'no'
+        return response
 
-            product = cart_item.product
-            product.stock = max(0, (product.stock or 0) - cart_item.quantity)
-            product.available = product.stock > 0
-            product.save(update_fields=['stock', 'available', 'updated_at'])
+    @action(detail=False, methods=['get'])
+    def products(self, request):
+        return self._stream(request, 'products')
 
-        cart.items.all().delete()
+    @action(detail=False, methods=['get'])
+    def orders(self, request):
+        return self._stream(request, 'orders')
 
 class UserProfileViewSet(viewsets.GenericViewSet):
     permission_classes = [permissions.IsAuthenticated]
@@ -0,0 +1,121 @@
+"""
+Async versions of the read-only catalog endpoints, for ASGI deployments.
+
+Mounted under /api/async/ next to the DRF views they mirror (same filters,
+page-number pagination, payloads and catalog cache), so the two can be
+compared and switched per route. Under ASGI with an async middleware stack a
+request waiting on the cache, the database or a slow client does not hold a
+worker thread. DRF views are sync-only, so these are plain Django async views:
+data comes from the async ORM and cache APIs, and the DRF serializers only
+format already-loaded rows.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse
+from rest_framework.exceptions import APIException, MethodNotAllowed, NotFound
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from . import cart_summary, catalog_cache
+from .api_views import product_queryset
+from .authentication import CachedJWTAuthentication
+from .models import Category, Product
+from .serializers import CategorySerializer, ProductSerializer
+
+PAGE_QUERY_PARAM = "page"
+
+
+def json_response(data, status=200):
+    return JsonResponse(data, status=status, encoder=JSONEncoder, safe=False)
+
+
+def api_errors(view):
+    """Render DRF exceptions (authentication, not found) the way DRF views do."""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            if request.method != "GET":
+                raise MethodNotAllowed(request.method)
+            return await view(request, *args, **kwargs)
+        except APIException as exc:
+            return json_response({"detail": exc.detail}, status=exc.status_code)
+    return wrapper
+
+
+async def paginate(request, queryset, serializer_class):
+    """PageNumberPagination's response shape with acount() and a sliced async fetch."""
+    page_size = settings.REST_FRAMEWORK["PAGE_SIZE"]
+    try:
+        page = int(request.GET.get(PAGE_QUERY_PARAM, 1))
+    except ValueError:
+        page = 0
+    count = await queryset.acount()
+    pages = max(1, -(-count // page_size))
+    if not 1 <= page <= pages:
+        raise NotFound("Invalid page.")
+
+    offset = (page - 1) * page_size
+    rows = [row async for row in queryset[offset:offset + page_size]]
+    url = request.build_absolute_uri()
+    previous = None
+    if page > 1:
+        previous = (
+            remove_query_param(url, PAGE_QUERY_PARAM) if page == 2
+            else replace_query_param(url, PAGE_QUERY_PARAM, page - 1)
+        )
+    return {
+        "count": count,
+        "next": replace_query_param(url, PAGE_QUERY_PARAM, page + 1) if page < pages else None,
+        "previous": previous,
+        "results": serializer_class(rows, many=True, context={"request": request}).data,
+    }
+
+
+async def cached(request, scope, build):
+    key = catalog_cache.make_key(request, scope, await catalog_cache.aget_version())
+    data = await catalog_cache.aget(key)
+    if data is None:
+        data = await build()
+        await catalog_cache.aset(key, data)
+    return json_response(data)
+
+
+@api_errors
+async def product_list(request):
+    async def build():
+        # search() may look up the FTS table once, so the queryset is built off the event loop
+        queryset = await sync_to_async(product_queryset)(request.GET)
+        return await paginate(request, queryset, ProductSerializer)
+
+    return await cached(request, "async-product:list", build)
+
+
+@api_errors
+async def product_detail(request, pk):
+    async def build():
+        try:
+            product = await Product.objects.with_related().filter(available=True).aget(pk=pk)
+        except Product.DoesNotExist:
+            raise NotFound()
+        return ProductSerializer(product, context={"request": request}).data
+
+    return await cached(request, f"async-product:retrieve:{pk}", build)
+
+
+@api_errors
+async def category_list(request):
+    async def build():
+        return await paginate(request, Category.objects.order_by("id"), CategorySerializer)
+
+    return await cached(request, "async-category:list", build)
+
+
+@api_errors
+async def cart_summary_view(request):
+    # Token and user checks are sync (cached user lookups can fall back to the ORM)
+    result = await sync_to_async(CachedJWTAuthentication().authenticate)(request)
+    if result is None:
+        return json_response({"detail": "Authentication credentials were not provided."}, status=401)
+    return json_response(await cart_summary.aget_summary(result[0]))
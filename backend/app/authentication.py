@@ -0,0 +1,359 @@
+"""
+JWT authentication without per-request database round trips.
+
+* ``CachedJWTAuthentication`` resolves the token's user from the cache
+  (``AUTH_USER_CACHE_TIMEOUT``); app.signals drops the entry whenever the
+  ``Auth`` row is saved or deleted. Cached users leave the password hash
+  deferred.
+* Refresh-token blacklist checks consult a per-process Bloom filter of
+  blacklisted JTIs and only query ``token_blacklist`` on a filter hit. Every
+  new BlacklistedToken changes a version stamp in the shared cache, which tells
+  the other processes to load the new rows before answering. Like the other
+  cache-versioned state in this app, that needs a cache shared by all workers
+  (DJANGO_CACHE_BACKEND) once there is more than one process.
+* ``last_login`` is written behind: logins are buffered per process and
+  flushed in one UPDATE at most ``LAST_LOGIN_FLUSH_SECONDS`` after the first
+  buffered login (a timer thread covers idle processes), after
+  ``LAST_LOGIN_BATCH_SIZE`` logins, and at exit. A killed process loses at
+  most one interval of logins.
+
+Expired outstanding tokens are purged by ``manage.py purge_expired_tokens``.
+"""
+import atexit
+import hashlib
+import logging
+import math
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.db.models import Case, DateTimeField, Value, When
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed, ValidationError
+from rest_framework_simplejwt import serializers as jwt_serializers
+from rest_framework_simplejwt import tokens
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.utils import datetime_from_epoch, get_md5_hash_password
+
+from . import db_router
+
+logger = logging.getLogger(__name__)
+
+
+# --- Cached user resolution -------------------------------------------------
+
+def _user_key(user_id):
+    return f"auth-user:{user_id}"
+
+
+# What authentication and permission checks read; the password hash is deferred so it
+# never reaches the shared cache (reading it loads it from the database)
+CACHED_USER_FIELDS = ("email", "is_active", "is_staff", "is_superuser", "last_login")
+
+
+def get_user(user_id):
+    """The user with ``USER_ID_FIELD`` == ``user_id``, from the cache when possible; None if missing."""
+    key = _user_key(user_id)
+    user = cache.get(key)
+    if user is None:
+        User = get_user_model()
+        users = User.objects.filter(**{api_settings.USER_ID_FIELD: user_id})
+        user = users.only(*CACHED_USER_FIELDS).first()
+        if user is not None:
+            if api_settings.CHECK_REVOKE_TOKEN:
+                # Tokens carry a digest of the hash; cache that instead of the hash
+                user.password_digest = get_md5_hash_password(users.values_list("password", flat=True).get())
+            cache.set(key, user, getattr(settings, "AUTH_USER_CACHE_TIMEOUT", 300))
+    return user
+
+
+def invalidate_user(user_id):
+    cache.delete(_user_key(user_id))
+    # A request still reading the old row could re-cache it before the write commits
+    transaction.on_commit(lambda: cache.delete(_user_key(user_id)))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        user = get_user(user_id)
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != user.password_digest:
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
+
+
+# --- Blacklist lookups --------------------------------------------------------
+
+class BloomFilter:
+    """Fixed-size set membership with no false negatives and ``error_rate`` false positives."""
+
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = capacity
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], "big"), int.from_bytes(digest[8:], "big") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+BLACKLIST_VERSION_KEY = "jwt-blacklist:version"
+# Rows are re-read from a little before the previous sync, so a blacklisting
+# transaction that commits after a later one is still picked up
+SYNC_OVERLAP = timedelta(minutes=1)
+
+
+def blacklist_changed():
+    """Tell every process to load new BlacklistedToken rows (called once the row is committed)."""
+    cache.set(BLACKLIST_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+
+
+class BlacklistIndex:
+    def __init__(self, capacity=10_000):
+        self.min_capacity = capacity
+        self.lock = threading.Lock()
+        self.filter = None
+        self.version = None
+        self.synced_at = None
+
+    def _current_version(self):
+        version = cache.get(BLACKLIST_VERSION_KEY)
+        if version is None:
+            # Evicted or never set: start a new version so every process reloads
+            cache.add(BLACKLIST_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+            version = cache.get(BLACKLIST_VERSION_KEY)
+        return version
+
+    def _is_current(self, version):
+        return self.filter is not None and version is not None and version == self.version
+
+    def _sync(self):
+        version = self._current_version()
+        if self._is_current(version):
+            return
+        with self.lock:
+            if self._is_current(version):
+                return
+            started = timezone.now()
+            live = BlacklistedToken.objects.filter(token__expires_at__gt=started)
+            if self.filter is None or self.filter.count >= self.filter.capacity:
+                jtis = list(live.values_list("token__jti", flat=True))
+                bloom = BloomFilter(max(self.min_capacity, 2 * len(jtis)))
+            else:
+                jtis = list(
+                    live.filter(blacklisted_at__gte=self.synced_at - SYNC_OVERLAP).values_list("token__jti", flat=True)
+                )
+                bloom = self.filter
+            for jti in jtis:
+                bloom.add(jti)
+            self.filter, self.version, self.synced_at = bloom, version, started
+
+    def contains(self, jti):
+        self._sync()
+        if jti not in self.filter:
+            return False
+        return BlacklistedToken.objects.filter(token__jti=jti).exists()
+
+    def add(self, jti):
+        with self.lock:
+            if self.filter is not None:
+                self.filter.add(jti)
+
+    def reset(self):
+        with self.lock:
+            self.filter = self.version = self.synced_at = None
+
+
+blacklist = BlacklistIndex()
+
+
+class RefreshToken(tokens.RefreshToken):
+    """RefreshToken whose blacklist check and bookkeeping use the index and the user cache."""
+
+    def check_blacklist(self):
+        if blacklist.contains(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_("Token is blacklisted"))
+
+    def _outstanding(self):
+        user_id = self.payload.get(api_settings.USER_ID_CLAIM)
+        token, _ = OutstandingToken.objects.get_or_create(
+            jti=self.payload[api_settings.JTI_CLAIM],
+            defaults={
+                "user": get_user(user_id) if user_id is not None else None,
+                "created_at": self.current_time,
+                "token": str(self),
+                "expires_at": datetime_from_epoch(self.payload["exp"]),
+            },
+        )
+        return token
+
+    def blacklist(self):
+        result = BlacklistedToken.objects.get_or_create(token=self._outstanding())
+        blacklist.add(self.payload[api_settings.JTI_CLAIM])
+        return result
+
+    def outstand(self):
+        return self._outstanding()
+
+
+# --- Write-behind last_login --------------------------------------------------
+
+class LastLoginBuffer:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.flushed_at = time.monotonic()
+        self.timer = None
+
+    def record(self, user_id, when=None):
+        interval = getattr(settings, "LAST_LOGIN_FLUSH_SECONDS", 60)
+        with self.lock:
+            self.pending[user_id] = when or timezone.now()
+            due = (
+                len(self.pending) >= getattr(settings, "LAST_LOGIN_BATCH_SIZE", 100)
+                or time.monotonic() - self.flushed_at >= interval
+            )
+            if not due and self.timer is None:
+                # Without another login nothing else would flush this process
+                self.timer = threading.Timer(interval, self._flush_on_timer)
+                self.timer.daemon = True
+                self.timer.start()
+        if due:
+            self.flush()
+
+    def _flush_on_timer(self):
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Could not write buffered last_login values")
+        finally:
+            # This thread's own connection; nothing else would close it
+            connections.close_all()
+
+    def flush(self):
+        """Write every buffered login in one UPDATE. Returns the number of users updated."""
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            self.flushed_at = time.monotonic()
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+        if not pending:
+            return 0
+        User = get_user_model()
+        User.objects.filter(pk__in=pending).update(last_login=Case(
+            *[When(pk=user_id, then=Value(when)) for user_id, when in pending.items()],
+            output_field=DateTimeField(),
+        ))
+        # update() skips the signals; cached copies would otherwise save the old value back
+        cache.delete_many([_user_key(user_id) for user_id in pending])
+        return len(pending)
+
+
+last_logins = LastLoginBuffer()
+
+
+@atexit.register
+def _flush_last_logins():
+    try:
+        last_logins.flush()
+    except Exception:
+        logger.exception("Could not write buffered last_login values")
+
+
+# --- Expired tokens -----------------------------------------------------------
+
+def purge_expired_tokens(batch_size=1000, now=None):
+    """Delete expired outstanding (and with them blacklisted) tokens in short batches."""
+    now = now or timezone.now()
+    purged = 0
+    while True:
+        ids = list(OutstandingToken.objects.filter(expires_at__lte=now).values_list("id", flat=True)[:batch_size])
+        if not ids:
+            return purged
+        # Deletes the BlacklistedToken rows too (on_delete=CASCADE)
+        OutstandingToken.objects.filter(id__in=ids).delete()
+        purged += len(ids)
+
+
+# --- Token endpoint serializers (SIMPLE_JWT TOKEN_*_SERIALIZER) ---------------
+
+class TokenObtainPairSerializer(jwt_serializers.TokenObtainPairSerializer):
+    token_class = RefreshToken
+
+    def validate(self, attrs):
+        data = jwt_serializers.TokenObtainSerializer.validate(self, attrs)
+        refresh = self.get_token(self.user)
+        data["refresh"] = str(refresh)
+        data["access"] = str(refresh.access_token)
+        if api_settings.UPDATE_LAST_LOGIN:
+            last_logins.record(self.user.pk)
+        # The client's next request carries a token the router has not seen yet
+        db_router.record_identity(self.user.pk)
+        return data
+
+
+class TokenRefreshSerializer(jwt_serializers.TokenRefreshSerializer):
+    token_class = RefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+
+        user_id = refresh.payload.get(api_settings.USER_ID_CLAIM)
+        if user_id is not None:
+            user = get_user(user_id)
+            if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+                raise AuthenticationFailed(self.error_messages["no_active_account"], "no_active_account")
+
+        data = {"access": str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                refresh.blacklist()
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            refresh.outstand()
+            data["refresh"] = str(refresh)
+
+        return data
+
+
+class TokenVerifySerializer(jwt_serializers.TokenVerifySerializer):
+    def validate(self, attrs):
+        token = tokens.UntypedToken(attrs["token"])
+        if api_settings.BLACKLIST_AFTER_ROTATION and blacklist.contains(token.get(api_settings.JTI_CLAIM)):
+            raise ValidationError(_("Token is blacklisted"))
+        return {}
@@ -0,0 +1,244 @@
+"""
+HTTP load benchmark for the shopping API hot paths.
+
+Used by the ``benchmark_api`` management command. Each scenario is driven by a
+thread pool against a real HTTP server (an in-process threaded WSGI server by
+default, or uvicorn for ASGI), and queries per request are read back from the
+``Server-Timing`` header that PerformanceMiddleware adds.
+
+The ``*_async`` scenarios hit the async views in app/async_views.py; compare
+them with their sync twins at high concurrency (fan-in) and with
+``slow_client_ms`` set, where each client trickles its request in two parts.
+"""
+import http.client
+import json
+import random
+import re
+import socket
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+
+SCENARIOS = (
+    "products", "products_filtered", "cart_add", "cart", "checkout",
+    "products_async", "product_detail", "product_detail_async", "categories", "categories_async",
+    "cart_summary", "cart_summary_async",
+)
+SEARCH_TERMS = ("shirt", "phone", "game", "lamp", "sho", "pro", "blue")
+_QUERIES_RE = re.compile(r'db;[^,]*desc="(\d+) queries"')
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    requests: int = 0
+    errors: int = 0
+    elapsed: float = 0.0
+    latencies: list = field(default_factory=list, repr=False)
+    queries: list = field(default_factory=list, repr=False)
+    statuses: Counter = field(default_factory=Counter)
+
+    def percentile(self, pct):
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+        return ordered[index]
+
+    def summary(self):
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "throughput_rps": round(self.requests / self.elapsed, 2) if self.elapsed else 0.0,
+            "p50_ms": round(self.percentile(50) * 1000, 2),
+            "p95_ms": round(self.percentile(95) * 1000, 2),
+            "p99_ms": round(self.percentile(99) * 1000, 2),
+            "queries_per_request": round(sum(self.queries) / len(self.queries), 2) if self.queries else None,
+            "statuses": {str(code): count for code, count in sorted(self.statuses.items())},
+        }
+
+
+@dataclass
+class BenchmarkConfig:
+    base_url: str
+    tokens: list
+    product_ids: list
+    categories: list
+    concurrency: int = 8
+    requests: int = 200
+    seed: int = 1234
+    slow_client_ms: int = 0
+
+
+class Runner:
+    def __init__(self, config):
+        self.config = config
+        self._rngs = {}
+
+    def _rng(self, worker):
+        # Seeded per worker index, not per thread, so --seed reproduces the request mix
+        rng = self._rngs.get(worker)
+        if rng is None:
+            rng = self._rngs[worker] = random.Random(f"{self.config.seed}-{worker}")
+        return rng
+
+    def _token(self, worker):
+        return self.config.tokens[worker % len(self.config.tokens)]
+
+    def _request(self, method, path, token=None, body=None):
+        headers = {"Accept": "application/json"}
+        data = None
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        if body is not None:
+            data = json.dumps(body).encode()
+            headers["Content-Type"] = "application/json"
+        started = time.perf_counter()
+        try:
+            if self.config.slow_client_ms:
+                status, timing = self._trickled_request(method, path, headers, data)
+            else:
+                request = urllib.request.Request(self.config.base_url + path, data=data, headers=headers, method=method)
+                with urllib.request.urlopen(request, timeout=60) as response:
+                    response.read()
+                    status, timing = response.status, response.headers.get("Server-Timing", "")
+        except urllib.error.HTTPError as exc:
+            exc.read()
+            status, timing = exc.code, exc.headers.get("Server-Timing", "")
+        except OSError:
+            # Refused/reset connections (e.g. a full listen backlog) are reported as status 0
+            status, timing = 0, ""
+        elapsed = time.perf_counter() - started
+        match = _QUERIES_RE.search(timing or "")
+        return status, elapsed, int(match.group(1)) if match else None
+
+    def _trickled_request(self, method, path, headers, data):
+        """A slow client: send half the request, pause ``slow_client_ms``, send the rest."""
+        url = urllib.parse.urlsplit(self.config.base_url)
+        lines = [f"{method} {url.path}{path} HTTP/1.1", f"Host: {url.netloc}", "Connection: close"]
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        if data is not None:
+            lines.append(f"Content-Length: {len(data)}")
+        raw = ("\r\n".join(lines) + "\r\n\r\n").encode() + (data or b"")
+        with socket.create_connection((url.hostname, url.port), timeout=60) as sock:
+            sock.sendall(raw[:len(raw) // 2])
+            time.sleep(self.config.slow_client_ms / 1000)
+            sock.sendall(raw[len(raw) // 2:])
+            response = http.client.HTTPResponse(sock)
+            response.begin()
+            response.read()
+            return response.status, response.getheader("Server-Timing", "")
+
+    # Each scenario step returns the measured (status, seconds, queries) tuple.
+    def products(self, worker, prefix="/api"):
+        page = self._rng(worker).randint(1, 3)
+        return self._request("GET", f"{prefix}/products/?page={page}")
+
+    def products_async(self, worker):
+        return self.products(worker, "/api/async")
+
+    def product_detail(self, worker, prefix="/api"):
+        return self._request("GET", f"{prefix}/products/{self._rng(worker).choice(self.config.product_ids)}/")
+
+    def product_detail_async(self, worker):
+        return self.product_detail(worker, "/api/async")
+
+    def categories(self, worker, prefix="/api"):
+        return self._request("GET", f"{prefix}/categories/")
+
+    def categories_async(self, worker):
+        return self.categories(worker, "/api/async")
+
+    def cart_summary(self, worker, prefix="/api"):
+        return self._request("GET", f"{prefix}/cart/summary/", self._token(worker))
+
+    def cart_summary_async(self, worker):
+        return self.cart_summary(worker, "/api/async")
+
+    def products_filtered(self, worker):
+        rng = self._rng(worker)
+        params = []
+        if rng.random() < 0.6 and self.config.categories:
+            params.append(f"category={rng.choice(self.config.categories)}")
+        if rng.random() < 0.5:
+            params.append(f"search={rng.choice(SEARCH_TERMS)}")
+        if rng.random() < 0.4:
+            low = rng.randint(0, 200)
+            params.append(f"min_price={low}&max_price={low + rng.randint(10, 500)}")
+        return self._request("GET", "/api/products/?" + "&".join(params))
+
+    def cart_add(self, worker):
+        product_id = self._rng(worker).choice(self.config.product_ids)
+        return self._request("POST", "/api/cart/add_item/", self._token(worker), {"product_id": product_id, "quantity": 1})
+
+    def cart(self, worker):
+        return self._request("GET", "/api/cart/", self._token(worker))
+
+    def checkout(self, worker):
+        token = self._token(worker)
+        # Only the order POST is measured; filling the cart is setup
+        for product_id in self._rng(worker).sample(self.config.product_ids, min(3, len(self.config.product_ids))):
+            self._request("POST", "/api/cart/add_item/", token, {"product_id": product_id, "quantity": 1})
+        return self._request("POST", "/api/orders/", token, {"shipping_address": "Benchmark"})
+
+    def run(self, name):
+        step = getattr(self, name)
+        result = ScenarioResult(name)
+        # Every scenario starts from the same streams, whichever ran before it
+        self._rngs = {}
+        lock = threading.Lock()
+        counter = iter(range(self.config.requests))
+
+        def worker(index):
+            while True:
+                with lock:
+                    if next(counter, None) is None:
+                        return
+                status, seconds, queries = step(index)
+                with lock:
+                    result.requests += 1
+                    result.latencies.append(seconds)
+                    result.statuses[status] += 1
+                    if queries is not None:
+                        result.queries.append(queries)
+                    if status == 0 or status >= 400:
+                        result.errors += 1
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.config.concurrency) as pool:
+            list(pool.map(worker, range(self.config.concurrency)))
+        result.elapsed = time.perf_counter() - started
+        return result
+
+
+def compare(baseline, current, threshold_pct):
+    """
+    Compare two ``{"scenarios": {name: summary}}`` reports. Returns rows of
+    (scenario, metric, before, after, change_pct, regressed).
+    """
+    rows = []
+    for name, after in current["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if not before:
+            continue
+        for metric, higher_is_better in (("throughput_rps", True), ("p95_ms", False), ("p99_ms", False),
+                                         ("queries_per_request", False)):
+            old, new = before.get(metric), after.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old * 100
+            regressed = (-change if higher_is_better else change) > threshold_pct
+            rows.append((name, metric, old, new, round(change, 1), regressed))
+    return rows
+
+
+def report(results, config):
+    return {
+        "config": {k: v for k, v in asdict(config).items() if k not in ("tokens", "product_ids")},
+        "scenarios": {result.name: result.summary() for result in results},
+    }
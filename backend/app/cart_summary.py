@@ -0,0 +1,55 @@
+"""
+Cached cart summary (line count, item count, total) for the header badge.
+
+Entries are per user and embed the catalog version, so product price changes
+expire them; cart mutations delete the entry through Cart.touch().
+"""
+from django.conf import settings
+from django.core.cache import caches
+
+from . import catalog_cache
+
+
+def _cache():
+    return caches[getattr(settings, "CATALOG_CACHE_ALIAS", "default")]
+
+
+def _key(user_id, version=None):
+    return f"cart-summary:{user_id}:{catalog_cache.get_version() if version is None else version}"
+
+
+def _summary(cart):
+    return {
+        "line_count": cart.line_count if cart else 0,
+        "item_count": cart.item_count if cart else 0,
+        "total": str(cart.total()) if cart else "0.00",
+    }
+
+
+def get_summary(user):
+    key = _key(user.pk)
+    data = _cache().get(key)
+    if data is None:
+        from .models import Cart
+
+        cart = Cart.objects.with_summary().filter(user=user).order_by("id").first()
+        data = _summary(cart)
+        _cache().set(key, data, getattr(settings, "CART_SUMMARY_CACHE_TIMEOUT", 300))
+    return data
+
+
+async def aget_summary(user):
+    """``get_summary`` for async views, on the async cache and ORM APIs."""
+    key = _key(user.pk, await catalog_cache.aget_version())
+    data = await _cache().aget(key)
+    if data is None:
+        from .models import Cart
+
+        cart = await Cart.objects.with_summary().filter(user=user).order_by("id").afirst()
+        data = _summary(cart)
+        await _cache().aset(key, data, getattr(settings, "CART_SUMMARY_CACHE_TIMEOUT", 300))
+    return data
+
+
+def invalidate(user_id):
+    _cache().delete(_key(user_id))
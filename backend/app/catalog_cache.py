@@ -0,0 +1,134 @@
+"""
+Response cache for the read-only catalog endpoints.
+
+Keys embed a catalog version number stored in the cache itself; any write to
+Product, ProductImage or Category bumps the version (see app.signals), which
+orphans every cached page at once instead of tracking individual keys.
+Checkout only bumps it when a product sells out, so cached stock counts can lag
+by up to CATALOG_CACHE_TIMEOUT.
+
+The version must be shared by every worker process, so CATALOG_CACHE_ALIAS has
+to name a shared backend (Redis, Memcached, database or file based) whenever
+CATALOG_CACHE_TIMEOUT > 0; `manage.py check --deploy` fails on LocMemCache.
+
+Each entry keeps a digest of its payload, which is the response's ETag: a cache
+hit, including one answered with 304 Not Modified, runs no SQL, and the ETag
+changes whenever a rebuilt payload does.
+"""
+import hashlib
+from collections import Counter
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from rest_framework import status
+from rest_framework.response import Response
+
+from .conditional import conditional_response, make_etag
+
+VERSION_KEY = "catalog:version"
+CACHED_QUERY_PARAMS = ("category", "search", "min_price", "max_price", "page", "cursor", "pagination")
+
+stats = Counter()
+
+
+def _cache():
+    return caches[getattr(settings, "CATALOG_CACHE_ALIAS", "default")]
+
+
+def _timeout():
+    return getattr(settings, "CATALOG_CACHE_TIMEOUT", 300)
+
+
+def get_version():
+    cache = _cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, 1, timeout=None)
+        version = cache.get(VERSION_KEY, 1)
+    return version
+
+
+async def aget_version():
+    cache = _cache()
+    version = await cache.aget(VERSION_KEY)
+    if version is None:
+        await cache.aadd(VERSION_KEY, 1, timeout=None)
+        version = await cache.aget(VERSION_KEY, 1)
+    return version
+
+
+def bump_version(**kwargs):
+    cache = _cache()
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 2, timeout=None)
+
+
+@checks.register(checks.Tags.caches, deploy=True)
+def check_shared_cache(app_configs=None, **kwargs):
+    alias = getattr(settings, "CATALOG_CACHE_ALIAS", "default")
+    backend = settings.CACHES.get(alias, {}).get("BACKEND", "")
+    if _timeout() and backend.endswith(".LocMemCache"):
+        return [checks.Error(
+            f"The catalog cache ({alias!r}) is a per-process LocMemCache.",
+            hint="A version bump in one worker does not reach the others, which keep serving stale pages. "
+                 "Point CATALOG_CACHE_ALIAS at a shared backend (DJANGO_CACHE_BACKEND) or set "
+                 "CATALOG_CACHE_TIMEOUT = 0.",
+            id="app.E001",
+        )]
+    return []
+
+
+def make_key(request, scope, version=None):
+    """Key on the view scope, the normalized known query params and the host (URLs in payloads are absolute)."""
+    query_params = getattr(request, "query_params", request.GET)
+    params = []
+    for name in CACHED_QUERY_PARAMS:
+        value = query_params.get(name, "").strip()
+        if value and not (name == "page" and value == "1"):
+            params.append((name, value))
+    raw = repr((request.scheme, request.get_host(), scope, params))
+    digest = hashlib.sha1(raw.encode()).hexdigest()
+    return f"catalog:{get_version() if version is None else version}:{digest}"
+
+
+async def aget(key):
+    data = await _cache().aget(key)
+    stats["hits" if data is not None else "misses"] += 1
+    return data
+
+
+async def aset(key, data):
+    await _cache().aset(key, data, _timeout())
+
+
+class CatalogCacheMixin:
+    """Serve list/retrieve from the catalog cache, with ETags; only successful responses are stored."""
+
+    def list(self, request, *args, **kwargs):
+        return self._cached_response("list", super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        scope = f"retrieve:{kwargs.get(self.lookup_url_kwarg or self.lookup_field)}"
+        return self._cached_response(scope, super().retrieve, request, *args, **kwargs)
+
+    def _cached_response(self, action, handler, request, *args, **kwargs):
+        key = make_key(request, f"{self.basename}:{action}")
+        cache = _cache()
+        entry = cache.get(key)
+        if entry is not None:
+            stats["hits"] += 1
+            data, digest = entry
+        else:
+            stats["misses"] += 1
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            data, digest = response.data, hashlib.sha1(repr(response.data).encode()).hexdigest()
+            cache.set(key, (data, digest), _timeout())
+
+        # The same data renders differently per format (JSON, browsable API)
+        etag = make_etag(digest, request.accepted_renderer.format)
+        return conditional_response(request, lambda: Response(data), etag)
@@ -0,0 +1,38 @@
+"""
+ETag / Last-Modified support for API views.
+
+Validators are computed from cheap aggregate queries (max updated_at, counts)
+before the view serializes anything, so a matching If-None-Match or
+If-Modified-Since short-circuits to a 304 without building the body. Cached
+catalog responses take theirs from the cache entry (app.catalog_cache).
+"""
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+
+
+def make_etag(*parts):
+    return quote_etag(hashlib.sha1(repr(parts).encode()).hexdigest())
+
+
+def conditional_response(request, build_response, etag, last_modified=None, private=False):
+    """
+    Return 304 when the client's validators match, otherwise ``build_response()``
+    with ETag/Last-Modified attached. ``private`` marks per-user responses.
+    """
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    not_modified = get_conditional_response(request._request, etag=etag, last_modified=timestamp)
+    response = not_modified if not_modified is not None else build_response()
+
+    if response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+        response["ETag"] = etag
+        if timestamp is not None:
+            response["Last-Modified"] = http_date(timestamp)
+        if private:
+            response["Cache-Control"] = "private, no-cache"
+            patch_vary_headers(response, ["Authorization"])
+        else:
+            response["Cache-Control"] = "no-cache"
+    return response
@@ -0,0 +1,206 @@
+"""
+Read-replica routing.
+
+Reads made while serving a safe (GET/HEAD/OPTIONS) request go to one of
+``DATABASE_REPLICAS``, chosen once per request; everything else, including
+reads outside a request (commands, the shell), uses the primary. Once a
+request writes, the rest of it reads from the primary, and the client is
+pinned to the primary for ``REPLICA_PIN_SECONDS`` so it reads back its own
+cart and order changes. Clients are told apart by session cookie, by
+Authorization header and by user id (the JWT's claim, read without verifying
+it since it only picks a database). A writing request pins every identity it
+has, including a session cookie it sets and the user it logged in, so the
+first request made with new credentials still reads from the primary.
+Sessions, users and tokens are always read from the primary. A replica that
+fails to connect is skipped for ``REPLICA_RETRY_SECONDS``.
+"""
+import contextvars
+import hashlib
+import logging
+import random
+import time
+
+import jwt
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connections
+from django.utils.connection import ConnectionDoesNotExist
+from django.utils.functional import empty
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+PRIMARY = "default"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+# Login, logout and token checks must see the rows the previous request wrote
+PRIMARY_APPS = ("auth", "sessions", "token_blacklist")
+
+logger = logging.getLogger(__name__)
+
+_state = contextvars.ContextVar("db_routing_state", default=None)
+_down_until = {}
+
+
+class _RequestState:
+    __slots__ = ("use_primary", "wrote", "replica", "user_id")
+
+    def __init__(self, use_primary):
+        self.use_primary = use_primary
+        self.wrote = False
+        self.replica = None
+        self.user_id = None
+
+
+def record_identity(user_id):
+    """Pin ``user_id`` too if the current request writes (logins, whose credentials are new)."""
+    state = _state.get()
+    if state is not None:
+        state.user_id = user_id
+
+
+def replicas():
+    return getattr(settings, "DATABASE_REPLICAS", [])
+
+
+def _available(alias):
+    if _down_until.get(alias, 0) > time.monotonic():
+        return False
+    try:
+        connections[alias].ensure_connection()
+    except (DatabaseError, ConnectionDoesNotExist):
+        logger.warning("Replica %s is unavailable; reading from the primary", alias, exc_info=True)
+        _down_until[alias] = time.monotonic() + getattr(settings, "REPLICA_RETRY_SECONDS", 30)
+        return False
+    return True
+
+
+def _pick_replica():
+    candidates = list(replicas())
+    random.shuffle(candidates)
+    return next((alias for alias in candidates if _available(alias)), PRIMARY)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or state.use_primary or state.wrote:
+            return PRIMARY
+        if model._meta.app_label in PRIMARY_APPS or model._meta.label == settings.AUTH_USER_MODEL:
+            return PRIMARY
+        if state.replica is None:
+            state.replica = _pick_replica()
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas are copies of the primary, so rows from any of them relate
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in replicas():
+            return False
+        return None
+
+
+def _pin_key(kind, value):
+    return f"db-pin:{kind}:" + hashlib.sha1(str(value).encode()).hexdigest()
+
+
+def _token_user_id(authorization):
+    scheme, _, token = authorization.partition(" ")
+    if scheme not in jwt_settings.AUTH_HEADER_TYPES or not token:
+        return None
+    try:
+        return jwt.decode(token, options={"verify_signature": False}).get(jwt_settings.USER_ID_CLAIM)
+    except jwt.InvalidTokenError:
+        return None
+
+
+def _request_keys(request):
+    """Pin keys for the identities the request arrived with."""
+    keys = []
+    authorization = request.headers.get("Authorization")
+    if authorization:
+        keys.append(_pin_key("auth", authorization))
+        user_id = _token_user_id(authorization)
+        if user_id is not None:
+            keys.append(_pin_key("user", user_id))
+    session = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if session:
+        keys.append(_pin_key("session", session))
+    return keys
+
+
+def _response_keys(request, response, state):
+    """Pin keys for identities established while serving the request."""
+    keys = []
+    cookie = response.cookies.get(settings.SESSION_COOKIE_NAME)
+    if cookie is not None and cookie.value:
+        keys.append(_pin_key("session", cookie.value))
+    user_id = state.user_id
+    if user_id is None:
+        # Set by DRF authentication or login(); an unevaluated lazy user would cost a session read
+        user = request.__dict__.get("user")
+        if user is not None and getattr(user, "_wrapped", None) is not empty and user.is_authenticated:
+            user_id = user.pk
+    if user_id is not None:
+        keys.append(_pin_key("user", user_id))
+    return keys
+
+
+def _pin(request, response, state):
+    keys = _request_keys(request) + _response_keys(request, response, state)
+    return dict.fromkeys(keys, 1)
+
+
+class ReplicaRoutingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not replicas():
+            return self.get_response(request)
+
+        keys = _request_keys(request)
+        safe = request.method in SAFE_METHODS
+        pinned = safe and bool(keys) and bool(cache.get_many(keys))
+        state = _RequestState(use_primary=not safe or pinned)
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+
+        if state.wrote:
+            cache.set_many(_pin(request, response, state), getattr(settings, "REPLICA_PIN_SECONDS", 10))
+        return response
+
+    async def __acall__(self, request):
+        if not replicas():
+            return await self.get_response(request)
+
+        # sync_to_async copies the context, so ORM calls in the request's sync thread see this state
+        keys = _request_keys(request)
+        safe = request.method in SAFE_METHODS
+        pinned = safe and bool(keys) and bool(await cache.aget_many(keys))
+        state = _RequestState(use_primary=not safe or pinned)
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+
+        if state.wrote:
+            await cache.aset_many(_pin(request, response, state), getattr(settings, "REPLICA_PIN_SECONDS", 10))
+        return response
@@ -0,0 +1,159 @@
+"""
+Streaming CSV / NDJSON exports of products and orders.
+
+Rows come from ``values_list()`` over ``.iterator(chunk_size=...)``, so no
+model instances are built and only one fetch batch is in memory at a time:
+memory stays flat however many rows are exported, and the header (CSV) or first
+batch is sent as soon as the first fetch returns. Product exports use the
+column names ``manage.py import_products`` reads, so they can be re-imported.
+
+Filters (query params on /api/export/..., options on ``manage.py export``):
+``date_from`` / ``date_to`` (ISO date or datetime, on ``created_at``; a plain
+``date_to`` includes that whole day), ``category`` (product slugs) and
+``status`` (order statuses), both comma-separated, and ``available`` for
+products.
+"""
+import csv
+from datetime import datetime, time, timedelta
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Order, OrderItem, Product
+
+FORMATS = ("csv", "jsonl")
+CONTENT_TYPES = {"csv": "text/csv; charset=utf-8", "jsonl": "application/x-ndjson"}
+CHUNK_SIZE = 2000
+# Rows per string handed to the server: one write per row would cost a syscall each
+ROWS_PER_WRITE = 500
+
+
+class InvalidExportFilter(Exception):
+    def __init__(self, name, message):
+        super().__init__(f"{name}: {message}")
+        self.name = name
+        self.message = message
+
+
+def _parse_moment(name, value, end=False):
+    """(aware datetime, is a whole day) for ``value``; with ``end`` a date means the start of the next day."""
+    try:
+        # Both return None for malformed input but raise for well-formed impossible dates
+        moment = parse_datetime(value)
+        day = parse_date(value) if moment is None else None
+    except ValueError:
+        raise InvalidExportFilter(name, f"{value!r} is not a valid date or datetime")
+    if moment is None:
+        if day is None:
+            raise InvalidExportFilter(name, f"{value!r} is not an ISO date or datetime")
+        moment = datetime.combine(day + timedelta(days=1) if end else day, time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment, day is not None
+
+
+def _date_range(queryset, filters):
+    if filters.get("date_from"):
+        moment, _ = _parse_moment("date_from", filters["date_from"])
+        queryset = queryset.filter(created_at__gte=moment)
+    if filters.get("date_to"):
+        moment, whole_day = _parse_moment("date_to", filters["date_to"], end=True)
+        queryset = queryset.filter(**{"created_at__lt" if whole_day else "created_at__lte": moment})
+    return queryset
+
+
+def _split(value):
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def product_rows(filters):
+    """(header, values_list queryset) for products matching ``filters``."""
+    queryset = _date_range(Product.objects.all(), filters)
+    if filters.get("category"):
+        queryset = queryset.filter(category__slug__in=_split(filters["category"]))
+    if filters.get("available"):
+        available = filters["available"].lower()
+        if available not in ("true", "false", "1", "0"):
+            raise InvalidExportFilter("available", "Expected true or false")
+        queryset = queryset.filter(available=available in ("true", "1"))
+
+    columns = {
+        "id": "id", "sku": "sku", "name": "name", "description": "description", "price": "price",
+        "stock": "stock", "available": "available", "category": F("category__slug"),
+        "created_at": "created_at", "updated_at": "updated_at",
+    }
+    return list(columns), queryset.order_by("id").values_list(*columns.values())
+
+
+def order_rows(filters):
+    """(header, values_list queryset) for orders matching ``filters``, with item and unit counts."""
+    queryset = _date_range(Order.objects.all(), filters)
+    if filters.get("status"):
+        queryset = queryset.filter(status__in=_split(filters["status"]))
+
+    # Correlated subqueries rather than a GROUP BY over the join, which would
+    # have to aggregate every order before the first row could be sent
+    lines = OrderItem.objects.filter(order=OuterRef("pk")).order_by().values("order")
+    columns = {
+        "id": "id", "user": F("user__email"), "status": "status", "total_amount": "total_amount",
+        "payment_method": "payment_method",
+        "items": Subquery(lines.annotate(n=Count("id")).values("n"), output_field=IntegerField()),
+        "units": Subquery(lines.annotate(n=Sum("quantity")).values("n"), output_field=IntegerField()),
+        "shipping_address": "shipping_address", "created_at": "created_at", "updated_at": "updated_at",
+    }
+    return list(columns), queryset.order_by("id").values_list(*columns.values())
+
+
+EXPORTS = {"products": product_rows, "orders": order_rows}
+
+
+class _Echo:
+    """File-like object whose write() returns the line csv.writer formatted."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if value is None:
+        return ""
+    return value
+
+
+def render(header, rows, format, chunk_size=CHUNK_SIZE):
+    """Yield the export as strings of up to ROWS_PER_WRITE rows, starting with the CSV header."""
+    if format not in FORMATS:
+        raise ValueError(f"Unknown format {format!r}; expected one of {', '.join(FORMATS)}")
+    if format == "csv":
+        writer = csv.writer(_Echo())
+        yield writer.writerow(header)
+        encode = lambda row: writer.writerow([_csv_value(value) for value in row])
+    else:
+        encoder = DjangoJSONEncoder()
+        encode = lambda row: encoder.encode(dict(zip(header, row))) + "\n"
+
+    batch = []
+    for row in rows.iterator(chunk_size=chunk_size):
+        batch.append(encode(row))
+        if len(batch) >= ROWS_PER_WRITE:
+            yield "".join(batch)
+            batch = []
+    if batch:
+        yield "".join(batch)
+
+
+async def arender(lines):
+    """
+    render() as an async iterator for ASGI, which would otherwise buffer a sync
+    iterator whole. Each step runs in the same sync thread (thread-sensitive),
+    so the open cursor stays on the connection that created it.
+    """
+    iterator = iter(lines)
+    next_part = sync_to_async(lambda: next(iterator, None))
+    while (part := await next_part()) is not None:
+        yield part
@@ -0,0 +1,133 @@
+"""
+Responsive WebP variants for uploaded product/item images.
+
+Resizing and encoding are CPU-bound, so they run in a process pool; the
+parent process only reads the original through the storage backend and saves
+the encoded variants back through it. Generated variant names are recorded
+on the image row (``variants``: {"<width>": "<storage name>"}).
+"""
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+
+VARIANT_WIDTHS = (160, 320, 640, 1280)
+WEBP_QUALITY = 80
+
+_executor = None
+
+
+def _workers():
+    return getattr(settings, "IMAGE_VARIANT_WORKERS", min(4, os.cpu_count() or 1))
+
+
+def get_executor():
+    global _executor
+    if _executor is None and _workers() > 0:
+        _executor = ProcessPoolExecutor(max_workers=_workers())
+    return _executor
+
+
+def encode_variants(data, widths=VARIANT_WIDTHS, quality=WEBP_QUALITY):
+    """
+    Worker-side: resize ``data`` (original image bytes) to each width not larger
+    than the original and encode as WebP. Returns [(width, webp_bytes)].
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(data)) as original:
+        original = ImageOps.exif_transpose(original)
+        if original.mode not in ("RGB", "RGBA"):
+            original = original.convert("RGBA" if "transparency" in original.info else "RGB")
+        # Always produce the smallest variant so every image has a thumbnail
+        targets = [w for w in widths if w <= original.width] or [min(widths)]
+        results = []
+        for width in targets:
+            height = max(1, round(original.height * width / original.width))
+            resized = original.resize((width, height), Image.LANCZOS)
+            buffer = io.BytesIO()
+            resized.save(buffer, "WEBP", quality=quality, method=4)
+            results.append((width, buffer.getvalue()))
+        return results
+
+
+def variant_name(name, width):
+    directory, filename = os.path.split(name)
+    stem = os.path.splitext(filename)[0]
+    return os.path.join(directory, "variants", f"{stem}_{width}w.webp")
+
+
+def _read(image_field):
+    image_field.open("rb")
+    try:
+        return image_field.read()
+    finally:
+        image_field.close()
+
+
+def generate_variants(images):
+    """
+    Build variants for ProductImage/ItemImage rows in parallel and save them.
+    Images whose file is missing or unreadable are skipped. Returns the number
+    of images processed.
+    """
+    jobs = []
+    for image in images:
+        try:
+            jobs.append((image, _read(image.image)))
+        except (OSError, ValueError):
+            continue
+
+    executor = get_executor()
+    if executor is None:
+        encoded = (_safe_encode(data) for _, data in jobs)
+    else:
+        encoded = executor.map(_safe_encode, [data for _, data in jobs])
+
+    processed = 0
+    for (image, _), variants in zip(jobs, encoded):
+        if not variants:
+            continue
+        storage = image.image.storage
+        # Release the variants being replaced (with ContentAddressedStorage, a dereference)
+        for old_name in image.variants.values():
+            storage.delete(old_name)
+        names = {}
+        for width, content in variants:
+            names[str(width)] = storage.save(variant_name(image.image.name, width), ContentFile(content))
+        image.variants = names
+        image.save(update_fields=["variants"])
+        processed += 1
+    return processed
+
+
+def _safe_encode(data):
+    try:
+        return encode_variants(data)
+    except Exception:
+        # Not a decodable image (or PIL lacks the codec); keep serving the original
+        return []
+
+
+class ResponsiveImageMixin:
+    """URL helpers for models with ``image`` and ``variants`` fields."""
+
+    def variant_urls(self):
+        return {
+            int(width): self.image.storage.url(name)
+            for width, name in sorted(self.variants.items(), key=lambda kv: int(kv[0]))
+        }
+
+    def srcset(self):
+        return ", ".join(f"{url} {width}w" for width, url in self.variant_urls().items())
+
+    def thumbnail_url(self, min_width=320):
+        urls = self.variant_urls()
+        for width, url in urls.items():
+            if width >= min_width:
+                return url
+        if urls:
+            return list(urls.values())[-1]
+        return self.image.url if self.image else None
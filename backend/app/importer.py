@@ -0,0 +1,262 @@
+"""
+Streaming bulk product import from CSV or JSONL.
+
+Rows are read lazily and handled ``chunk_size`` at a time, each chunk in its
+own transaction: validate every row, resolve its category from a map loaded
+once, upsert the chunk by ``sku`` with one ``bulk_create(update_conflicts=...)``
+and attach images read from local paths. Only the current chunk is held in
+memory. Rejected rows are reported with their line number and are not written.
+
+CSV columns / JSONL keys: sku, name, description, price, stock, available,
+category (slug or name) and images (a list in JSONL, ``|``-separated in CSV,
+paths relative to the image root).
+"""
+import csv
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from django.core.files import File
+from django.db import transaction
+from rest_framework import serializers
+from rest_framework.serializers import as_serializer_error
+
+from . import catalog_cache
+from .images import generate_variants
+from .models import Category, Product, ProductImage
+
+FORMATS = ("csv", "jsonl")
+UPDATE_FIELDS = ["name", "description", "price", "stock", "available", "category", "updated_at"]
+MAX_REPORTED_REJECTIONS = 1000
+
+
+class InvalidImportFile(Exception):
+    pass
+
+
+def detect_format(filename):
+    extension = os.path.splitext(filename or "")[1].lower()
+    if extension == ".csv":
+        return "csv"
+    if extension in (".jsonl", ".ndjson"):
+        return "jsonl"
+    raise InvalidImportFile(f"Cannot tell the format of {filename!r}; use a .csv or .jsonl file or pass the format")
+
+
+def read_rows(stream, format):
+    """Yield (line number, row dict or error message) from a text stream, one row at a time."""
+    if format == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            # Blank cells fall back to the field defaults
+            row = {key.strip(): value.strip() for key, value in row.items() if key and value and value.strip()}
+            if "images" in row:
+                row["images"] = [path.strip() for path in row["images"].split("|") if path.strip()]
+            yield reader.line_num, row
+    elif format == "jsonl":
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as exc:
+                yield line_number, f"Invalid JSON: {exc}"
+                continue
+            yield line_number, row if isinstance(row, dict) else "Expected a JSON object"
+    else:
+        raise InvalidImportFile(f"Unknown format {format!r}; expected one of {', '.join(FORMATS)}")
+
+
+class ProductImportRowSerializer(serializers.Serializer):
+    sku = serializers.CharField(max_length=64)
+    name = serializers.CharField(max_length=100)
+    description = serializers.CharField(required=False, allow_blank=True, default="")
+    price = serializers.DecimalField(max_digits=6, decimal_places=2, min_value=0)
+    stock = serializers.IntegerField(required=False, min_value=0, default=0)
+    available = serializers.BooleanField(required=False, default=True)
+    category = serializers.CharField()
+    images = serializers.ListField(child=serializers.CharField(), required=False, default=list)
+
+    def validate_category(self, value):
+        category_id = self.context["categories"].get(value.strip().lower())
+        if category_id is None:
+            raise serializers.ValidationError(f"Unknown category {value!r}")
+        return category_id
+
+    def validate_images(self, paths):
+        root = self.context["image_root"]
+        resolved = []
+        for path in paths:
+            full_path = (root / path).resolve() if root else Path(path).resolve()
+            if root and not full_path.is_relative_to(root):
+                raise serializers.ValidationError(f"{path!r} is outside the image directory")
+            if not full_path.is_file():
+                raise serializers.ValidationError(f"{path!r} does not exist")
+            resolved.append(full_path)
+        return resolved
+
+
+@dataclass
+class ChunkReport:
+    index: int
+    rows: int
+    created: int
+    updated: int
+    rejected: int
+    images: int
+    seconds: float
+
+    @property
+    def rows_per_second(self):
+        return round(self.rows / self.seconds, 1) if self.seconds else 0.0
+
+
+@dataclass
+class ImportReport:
+    created: int = 0
+    updated: int = 0
+    images: int = 0
+    rejected_count: int = 0
+    rejected: list = field(default_factory=list)
+    chunks: list = field(default_factory=list)
+    seconds: float = 0.0
+
+    def reject(self, line, errors):
+        self.rejected_count += 1
+        if len(self.rejected) < MAX_REPORTED_REJECTIONS:
+            self.rejected.append({"line": line, "errors": errors})
+
+    def as_dict(self):
+        rows = self.created + self.updated + self.rejected_count
+        return {
+            "created": self.created,
+            "updated": self.updated,
+            "rejected_count": self.rejected_count,
+            "rejected": self.rejected,
+            "images": self.images,
+            "seconds": round(self.seconds, 3),
+            "rows_per_second": round(rows / self.seconds, 1) if self.seconds else 0.0,
+            "chunks": [
+                {
+                    "chunk": chunk.index, "rows": chunk.rows, "created": chunk.created, "updated": chunk.updated,
+                    "rejected": chunk.rejected, "images": chunk.images, "seconds": round(chunk.seconds, 3),
+                    "rows_per_second": chunk.rows_per_second,
+                }
+                for chunk in self.chunks
+            ],
+        }
+
+
+def category_map():
+    """Lower-cased slug and name -> Category id, creating any allowed category that is missing."""
+    existing = set(Category.objects.values_list("slug", flat=True))
+    Category.objects.bulk_create(
+        [Category(slug=slug, name=name) for slug, name in Category.ALLOWED if slug not in existing],
+        ignore_conflicts=True,
+    )
+    mapping = {}
+    for category_id, slug, name in Category.objects.values_list("id", "slug", "name"):
+        mapping[name.lower()] = category_id
+        mapping[slug.lower()] = category_id
+    return mapping
+
+
+class ProductImporter:
+    def __init__(self, chunk_size=1000, image_root=None, variants=True, on_chunk=None):
+        self.chunk_size = chunk_size
+        self.image_root = Path(image_root).resolve() if image_root else None
+        self.variants = variants
+        self.on_chunk = on_chunk
+
+    def run(self, stream, format):
+        report = ImportReport()
+        # One serializer validates every row: building one per row deep-copies its
+        # fields each time, which costs more than the writes
+        validator = ProductImportRowSerializer(
+            context={"categories": category_map(), "image_root": self.image_root},
+        )
+        started = time.perf_counter()
+        chunk = []
+        for line, row in read_rows(stream, format):
+            chunk.append((line, row))
+            if len(chunk) >= self.chunk_size:
+                self._import_chunk(chunk, validator, report)
+                chunk = []
+        if chunk:
+            self._import_chunk(chunk, validator, report)
+        report.seconds = time.perf_counter() - started
+        return report
+
+    def _import_chunk(self, chunk, validator, report):
+        started = time.perf_counter()
+        rejected_before = report.rejected_count
+        # Keyed by sku: a later row for the same sku replaces an earlier one
+        valid = {}
+        for line, row in chunk:
+            if isinstance(row, str):
+                report.reject(line, {"row": [row]})
+                continue
+            try:
+                data = validator.run_validation(row)
+            except serializers.ValidationError as exc:
+                report.reject(line, as_serializer_error(exc))
+                continue
+            valid[data["sku"]] = data
+
+        created = updated = images = 0
+        if valid:
+            with transaction.atomic():
+                existing = set(Product.objects.filter(sku__in=valid).values_list("sku", flat=True))
+                products = Product.objects.bulk_create(
+                    [
+                        Product(
+                            sku=sku, name=data["name"], description=data["description"], price=data["price"],
+                            stock=data["stock"], available=data["available"], category_id=data["category"],
+                        )
+                        for sku, data in valid.items()
+                    ],
+                    update_conflicts=True, unique_fields=["sku"], update_fields=UPDATE_FIELDS,
+                )
+                images = self._attach_images(products, valid)
+                # bulk_create sends no post_save, which normally expires the catalog cache
+                transaction.on_commit(catalog_cache.bump_version)
+            updated = len(existing)
+            created = len(valid) - updated
+
+        chunk_report = ChunkReport(
+            index=len(report.chunks) + 1, rows=len(chunk), created=created, updated=updated,
+            rejected=report.rejected_count - rejected_before, images=images,
+            seconds=time.perf_counter() - started,
+        )
+        report.created += created
+        report.updated += updated
+        report.images += images
+        report.chunks.append(chunk_report)
+        if self.on_chunk:
+            self.on_chunk(chunk_report)
+
+    def _attach_images(self, products, valid):
+        wanted = [(product, path) for product in products for path in valid[product.sku]["images"]]
+        if not wanted:
+            return 0
+        storage = ProductImage._meta.get_field("image").storage
+        upload_to = ProductImage._meta.get_field("image").upload_to
+        attached = set(
+            ProductImage.objects.filter(product__in=[product for product, _ in wanted]).values_list("product_id", "image")
+        )
+        new_images = []
+        for product, path in wanted:
+            with open(path, "rb") as fh:
+                name = storage.save(upload_to + path.name, File(fh))
+            if (product.pk, name) in attached:
+                # Same content already on this product: drop the reference save() just added
+                storage.delete(name)
+                continue
+            attached.add((product.pk, name))
+            new_images.append(ProductImage(product=product, image=name))
+        ProductImage.objects.bulk_create(new_images)
+        if self.variants:
+            generate_variants(new_images)
+        return len(new_images)
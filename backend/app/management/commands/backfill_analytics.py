@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from app.analytics import rebuild
+
+
+class Command(BaseCommand):
+    help = "Rebuild the sales rollups behind /api/analytics/ from the order tables"
+
+    def handle(self, *args, **options):
+        orders = rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt sales rollups from {orders} orders."))
@@ -0,0 +1,257 @@
+import json
+import os
+import socket
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.db import connections
+from rest_framework_simplejwt.tokens import AccessToken
+
+from app import benchmark
+from app.models import Auth, Category, Product
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = "Load-test /api/products/, /api/cart/ and checkout; report throughput, latency percentiles and queries"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scenarios", default=",".join(benchmark.SCENARIOS),
+                            help=f"Comma-separated subset of: {', '.join(benchmark.SCENARIOS)}")
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument("--requests", type=int, default=200, help="Requests per scenario")
+        parser.add_argument("--db", help="Run against this SQLite file (migrated on start) instead of the configured database")
+        parser.add_argument("--in-place", action="store_true",
+                            help="Seed and benchmark the configured database itself instead of a throwaway copy")
+        parser.add_argument("--base-url", help="Benchmark an already running server instead of booting one in-process")
+        parser.add_argument("--server", choices=("wsgi", "asgi"), default="wsgi",
+                            help="In-process server: threaded WSGI (default) or uvicorn running the ASGI app")
+        parser.add_argument("--slow-client-ms", type=int, default=0,
+                            help="Simulate slow clients: pause this long halfway through sending each request")
+        parser.add_argument("--products", type=int, default=200, help="Minimum catalog size to seed")
+        parser.add_argument("--no-catalog-cache", action="store_true", help="Disable the catalog response cache")
+        parser.add_argument("--seed", type=int, default=1234)
+        parser.add_argument("--output", help="Write the JSON report here")
+        parser.add_argument("--compare", help="Baseline JSON report to compare against")
+        parser.add_argument("--threshold", type=float, default=10.0, help="Regression threshold in percent")
+
+    def handle(self, *args, **options):
+        scenarios = [name.strip() for name in options["scenarios"].split(",") if name.strip()]
+        unknown = set(scenarios) - set(benchmark.SCENARIOS)
+        if unknown:
+            raise CommandError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+        if options["base_url"] and not (options["db"] or options["in_place"]):
+            raise CommandError(
+                "--base-url benchmarks a server with its own database; pass --in-place (or --db) to seed it"
+            )
+        if options["no_catalog_cache"]:
+            settings.CATALOG_CACHE_TIMEOUT = 0
+
+        self.seeded_users, self.seeded_products = [], []
+        with self.database(options["db"], options["in_place"]) as throwaway:
+            try:
+                report = self.run(scenarios, options, throwaway)
+            finally:
+                if not throwaway:
+                    self.remove_seeded_rows()
+
+        self.print_report(report)
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                json.dump(report, fh, indent=2)
+            self.stdout.write(f"Report written to {options['output']}")
+
+        if options["compare"]:
+            with open(options["compare"]) as fh:
+                baseline = json.load(fh)
+            self.check_regressions(baseline, report, options["threshold"])
+
+    @contextmanager
+    def database(self, path, in_place):
+        """Point the default connection at the database to seed; yields True when it is a throwaway copy."""
+        connection = connections["default"]
+        if in_place:
+            yield False
+            return
+        if not path and connection.vendor != "sqlite":
+            raise CommandError(
+                "Only SQLite databases are copied for benchmarking; pass --db or --in-place to seed the "
+                "configured database"
+            )
+
+        original = connection.settings_dict["NAME"]
+        with tempfile.TemporaryDirectory(prefix="benchmark_api-") as tmp:
+            throwaway = not path
+            if throwaway:
+                path = os.path.join(tmp, "db.sqlite3")
+                self.copy_sqlite(original, path)
+            connection.close()
+            connection.settings_dict["NAME"] = path
+            try:
+                call_command("migrate", verbosity=0)
+                yield throwaway
+            finally:
+                connection.close()
+                connection.settings_dict["NAME"] = original
+
+    def copy_sqlite(self, source, target):
+        # The backup API copies a consistent snapshot, WAL contents included
+        if str(source) == ":memory:" or not os.path.exists(source):
+            return
+        with sqlite3.connect(source) as src, sqlite3.connect(target) as dst:
+            src.backup(dst)
+        self.stdout.write(f"Benchmarking a copy of {source}")
+
+    def run(self, scenarios, options, throwaway):
+        config = benchmark.BenchmarkConfig(
+            base_url="",
+            tokens=self.prepare_users(options["concurrency"]),
+            product_ids=self.prepare_catalog(options["products"], own_only=not throwaway),
+            categories=[slug for slug, _ in Category.ALLOWED],
+            concurrency=options["concurrency"],
+            requests=options["requests"],
+            seed=options["seed"],
+            slow_client_ms=options["slow_client_ms"],
+        )
+
+        stop = None
+        if options["base_url"]:
+            config.base_url = options["base_url"].rstrip("/")
+        elif options["server"] == "asgi":
+            config.base_url, stop = self.start_asgi_server()
+        else:
+            config.base_url, stop = self.start_wsgi_server()
+
+        try:
+            runner = benchmark.Runner(config)
+            results = []
+            for name in scenarios:
+                self.stdout.write(f"Running {name} ({config.requests} requests, concurrency {config.concurrency})...")
+                results.append(runner.run(name))
+        finally:
+            if stop is not None:
+                stop()
+        return benchmark.report(results, config)
+
+    def remove_seeded_rows(self):
+        # Carts and orders belong to the bench users and only reference bench products,
+        # so the cascades take them (and their sales rollups) along
+        for model, ids in ((Auth, self.seeded_users), (Product, self.seeded_products)):
+            for start in range(0, len(ids), 500):
+                model.objects.filter(pk__in=ids[start:start + 500]).delete()
+        self.stdout.write(
+            f"Removed {len(self.seeded_users)} seeded users and {len(self.seeded_products)} seeded products"
+        )
+
+    def start_wsgi_server(self):
+        server = ThreadedWSGIServer(("127.0.0.1", 0), QuietHandler)
+        server.set_app(WSGIHandler())
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        def stop():
+            server.shutdown()
+            server.server_close()
+        return f"http://127.0.0.1:{server.server_port}", stop
+
+    def start_asgi_server(self):
+        try:
+            import uvicorn
+        except ImportError:
+            raise CommandError("--server asgi needs uvicorn (pip install uvicorn), or pass --base-url")
+        from django.core.asgi import get_asgi_application
+
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        server = uvicorn.Server(uvicorn.Config(
+            get_asgi_application(), lifespan="off", log_level="warning", access_log=False,
+            backlog=4096, timeout_keep_alive=5,
+        ))
+        thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True)
+        thread.start()
+        while not server.started:
+            time.sleep(0.05)
+
+        def stop():
+            server.should_exit = True
+            thread.join()
+            sock.close()
+        return f"http://127.0.0.1:{sock.getsockname()[1]}", stop
+
+    def prepare_users(self, count):
+        tokens = []
+        for index in range(count):
+            user, created = Auth.objects.get_or_create(email=f"bench{index}@bench.local")
+            if created:
+                user.set_unusable_password()
+                user.save()
+                self.seeded_users.append(user.pk)
+            tokens.append(str(AccessToken.for_user(user)))
+        return tokens
+
+    def prepare_catalog(self, minimum, own_only=False):
+        """Seed products up to `minimum`; with own_only, cart and checkout only touch seeded products."""
+        categories = []
+        for slug, name in Category.ALLOWED:
+            category, _ = Category.objects.get_or_create(slug=slug, defaults={"name": name})
+            categories.append(category)
+
+        def products():
+            queryset = Product.objects.filter(available=True)
+            # Checkout decrements stock; leave the real catalog alone
+            return queryset.filter(pk__in=self.seeded_products) if own_only else queryset
+
+        missing = minimum - products().count()
+        if missing > 0:
+            created = Product.objects.bulk_create([
+                Product(
+                    name=f"Bench product {index}",
+                    description="Seeded by benchmark_api",
+                    price=Decimal(5 + index % 500),
+                    stock=1_000_000,
+                    category=categories[index % len(categories)],
+                )
+                for index in range(missing)
+            ], batch_size=500)
+            self.seeded_products.extend(product.pk for product in created)
+        # Keep checkout from failing on stock so it measures the happy path
+        Product.objects.filter(description="Seeded by benchmark_api").update(stock=1_000_000, available=True)
+        return list(products().values_list("id", flat=True)[:5000])
+
+    def print_report(self, report):
+        header = f"{'scenario':<20}{'req':>6}{'err':>6}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'q/req':>8}"
+        self.stdout.write(header)
+        self.stdout.write("-" * len(header))
+        for name, row in report["scenarios"].items():
+            queries = row["queries_per_request"]
+            self.stdout.write(
+                f"{name:<20}{row['requests']:>6}{row['errors']:>6}{row['throughput_rps']:>10}"
+                f"{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}{queries if queries is not None else '-':>8}"
+                f"  {row['statuses']}"
+            )
+
+    def check_regressions(self, baseline, report, threshold):
+        rows = benchmark.compare(baseline, report, threshold)
+        regressions = []
+        self.stdout.write(f"\nComparison against baseline (threshold {threshold}%):")
+        for scenario, metric, before, after, change, regressed in rows:
+            marker = self.style.ERROR("REGRESSION") if regressed else ""
+            self.stdout.write(f"  {scenario:<20}{metric:<22}{before:>10} -> {after:<10}{change:+.1f}% {marker}")
+            if regressed:
+                regressions.append(f"{scenario}.{metric}")
+        if regressions:
+            raise CommandError(f"Performance regressions: {', '.join(regressions)}")
+        self.stdout.write(self.style.SUCCESS("No regressions."))
@@ -1,3 +1,4 @@
+from django.core.management import call_command
 from django.core.management.base import BaseCommand
 from app.models import (
     Product, ProductImage, Category,
@@ -38,4 +39,7 @@ class Command(BaseCommand):
         for slug, name in ALLOWED.items():
             Category.objects.update_or_create(slug=slug, defaults={"name": name})
 
+        # Deleting image rows only releases their blobs; remove the now-unused files
+        call_command("gc_media", stdout=self.stdout)
+
         self.stdout.write(self.style.SUCCESS("Site data cleared and categories enforced."))
\ No newline at end of file
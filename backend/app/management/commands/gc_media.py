@@ -0,0 +1,77 @@
+import os
+from collections import Counter
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from app.models import ItemImage, MediaBlob, ProductImage
+
+
+class Command(BaseCommand):
+    help = "Delete stored media blobs that no ProductImage/ItemImage references any more"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reconcile", action="store_true",
+            help="Recount references from the image tables before collecting",
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        if options["reconcile"]:
+            self.reconcile()
+
+        batch_size = options["batch_size"]
+        removed = freed = 0
+        last_id = 0
+        while True:
+            batch = list(
+                MediaBlob.objects.filter(ref_count__lte=0, id__gt=last_id)
+                .order_by("id").values_list("id", "name", "size")[:batch_size]
+            )
+            if not batch:
+                break
+            last_id = batch[-1][0]
+            if not options["dry_run"]:
+                batch = self.collect([blob_id for blob_id, _, _ in batch])
+            removed += len(batch)
+            freed += sum(size for _, _, size in batch)
+
+        verb = "Would remove" if options["dry_run"] else "Removed"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {removed} blobs ({freed / 1024 / 1024:.1f} MiB)."))
+
+    def collect(self, ids):
+        """Delete the rows among ``ids`` still unreferenced and their files; returns what was deleted."""
+        with transaction.atomic():
+            # Locked until the files are gone: ContentAddressedStorage._save() takes its
+            # reference before checking for the file, so a re-upload either keeps the row
+            # (and this skips it) or waits and then finds the file missing and rewrites it
+            batch = list(
+                MediaBlob.objects.select_for_update()
+                .filter(id__in=ids, ref_count__lte=0).values_list("id", "name", "size")
+            )
+            MediaBlob.objects.filter(id__in=[blob_id for blob_id, _, _ in batch], ref_count__lte=0).delete()
+            for _, name, _ in batch:
+                try:
+                    os.remove(default_storage.path(name))
+                except FileNotFoundError:
+                    pass
+        return batch
+
+    def reconcile(self):
+        counts = Counter()
+        for model in (ProductImage, ItemImage):
+            for name, variants in model.objects.values_list("image", "variants").iterator(chunk_size=2000):
+                counts[name] += 1
+                for variant in (variants or {}).values():
+                    counts[variant] += 1
+
+        changed = 0
+        for blob in MediaBlob.objects.only("id", "name", "ref_count").iterator(chunk_size=2000):
+            expected = counts.get(blob.name, 0)
+            if blob.ref_count != expected:
+                MediaBlob.objects.filter(id=blob.id).update(ref_count=expected)
+                changed += 1
+        self.stdout.write(f"Reconciled reference counts for {changed} blobs.")
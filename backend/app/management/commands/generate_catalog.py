@@ -0,0 +1,240 @@
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from app import analytics, catalog_cache, search
+from app.models import Auth, Cart, CartItem, Category, Order, OrderItem, Product, ProductImage
+
+ADJECTIVES = ["Classic", "Slim", "Wireless", "Organic", "Premium", "Compact", "Vintage", "Smart",
+              "Rugged", "Deluxe", "Eco", "Ultra", "Pro", "Mini", "Blue", "Red", "Black", "Silver"]
+NOUNS = {
+    "fashion": ["Shirt", "Jeans", "Jacket", "Sneakers", "Dress", "Hoodie", "Scarf", "Handbag", "Watch"],
+    "electronics": ["Phone", "Laptop", "Headphones", "Speaker", "Monitor", "Charger", "Tablet", "Camera"],
+    "food": ["Coffee", "Tea", "Chocolate", "Honey", "Pasta", "Olive Oil", "Granola", "Spice Mix"],
+    "home": ["Lamp", "Chair", "Rug", "Mug", "Pillow", "Shelf", "Vase", "Blanket", "Clock"],
+    "gaming": ["Controller", "Keyboard", "Mouse", "Headset", "Console", "Game", "Chair", "Mousepad"],
+}
+# Share of the catalog per category
+CATEGORY_WEIGHTS = {"fashion": 35, "electronics": 25, "home": 20, "food": 12, "gaming": 8}
+STATUSES = [("delivered", 70), ("shipped", 12), ("pending", 10), ("cancelled", 8)]
+
+
+@contextmanager
+def manual_timestamps(*fields):
+    """Let bulk_create keep generated created_at values instead of auto_now_add."""
+    for f in fields:
+        f.auto_now_add = False
+    try:
+        yield
+    finally:
+        for f in fields:
+            f.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = "Generate a large synthetic catalog, users, carts and orders for benchmarking"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=100_000)
+        parser.add_argument("--images-per-product", type=int, default=1)
+        parser.add_argument("--users", type=int, default=10_000)
+        parser.add_argument("--carts", type=int, default=2_000)
+        parser.add_argument("--orders", type=int, default=20_000)
+        parser.add_argument("--batch-size", type=int, default=5_000)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--days", type=int, default=730, help="Spread created_at over this many days")
+        parser.add_argument("--keep-search-index", action="store_true",
+                            help="Index rows as they are inserted instead of rebuilding once at the end")
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        self.now = timezone.now()
+        self.days = options["days"]
+        self.tag = f"gen{options['seed']}"
+        started = time.perf_counter()
+
+        # Generated users are keyed by seed; a rerun would hit the unique email halfway through,
+        # after products were already committed, so refuse before writing anything
+        if Auth.objects.filter(email__startswith=f"{self.tag}-").exists():
+            raise CommandError(
+                f"Data for --seed {options['seed']} already exists; pass a different --seed or delete "
+                f"the {self.tag}-* users first."
+            )
+
+        # SQLite refuses to change the safety level inside a transaction (e.g. under call_command in tests)
+        if connection.vendor == "sqlite" and not connection.in_atomic_block:
+            with connection.cursor() as cursor:
+                cursor.execute("PRAGMA synchronous = OFF")
+                cursor.execute("PRAGMA temp_store = MEMORY")
+
+        rebuild_index = not options["keep_search_index"]
+        if rebuild_index:
+            # Per-row FTS triggers dominate insert time; rebuild once instead
+            search.uninstall(connection)
+
+        try:
+            categories = self.ensure_categories()
+            products = self.create_products(options["products"], categories)
+            self.create_images(products, options["images_per_product"])
+            user_ids = self.create_users(options["users"])
+            self.create_carts(user_ids, products, options["carts"])
+            self.create_orders(user_ids, products, options["orders"])
+            # bulk_create skips the signals that keep the sales rollups current
+            self.step("Rebuilding sales rollups", analytics.rebuild)
+        finally:
+            if rebuild_index:
+                self.step("Rebuilding search index", lambda: search.install(connection) and None)
+            # bulk_create skips the signals that normally invalidate cached catalog pages
+            catalog_cache.bump_version()
+
+        self.stdout.write(self.style.SUCCESS(f"Done in {time.perf_counter() - started:.1f}s"))
+
+    def step(self, label, func):
+        started = time.perf_counter()
+        count = func()
+        elapsed = time.perf_counter() - started
+        rate = f", {count / elapsed:,.0f} rows/s" if count and elapsed else ""
+        self.stdout.write(f"{label}: {elapsed:.1f}s{rate}")
+        return count
+
+    def bulk(self, model, objects):
+        with transaction.atomic():
+            return model.objects.bulk_create(objects, batch_size=self.batch_size)
+
+    def random_timestamp(self):
+        # Skewed towards recent dates, like a growing catalog
+        age = self.days * (self.rng.random() ** 2)
+        return self.now - timedelta(days=age)
+
+    def popular_index(self, size):
+        # Heavy-tailed popularity: low indexes are picked far more often
+        return min(size - 1, int(size * (self.rng.random() ** 3)))
+
+    def ensure_categories(self):
+        categories = {}
+        for slug, name in Category.ALLOWED:
+            categories[slug], _ = Category.objects.get_or_create(slug=slug, defaults={"name": name})
+        return categories
+
+    def create_products(self, count, categories):
+        slugs = list(CATEGORY_WEIGHTS)
+        weights = list(CATEGORY_WEIGHTS.values())
+        created = []
+
+        def run():
+            with manual_timestamps(Product._meta.get_field("created_at")):
+                for start in range(0, count, self.batch_size):
+                    batch = []
+                    for index in range(start, min(count, start + self.batch_size)):
+                        slug = self.rng.choices(slugs, weights)[0]
+                        noun = self.rng.choice(NOUNS[slug])
+                        name = f"{self.rng.choice(ADJECTIVES)} {noun} {index}"
+                        # Log-normal prices, capped by the max_digits=6 column
+                        price = min(Decimal("9999.99"), Decimal(f"{self.rng.lognormvariate(3.4, 1.0):.2f}"))
+                        stock = 0 if self.rng.random() < 0.05 else int(self.rng.paretovariate(1.2) * 5)
+                        batch.append(Product(
+                            name=name,
+                            description=f"{name}: {self.rng.choice(ADJECTIVES).lower()} {noun.lower()} "
+                                        f"for everyday use in the {slug} range.",
+                            price=price,
+                            stock=stock,
+                            available=stock > 0,
+                            category=categories[slug],
+                            created_at=self.random_timestamp(),
+                        ))
+                    created.extend((p.id, p.price) for p in self.bulk(Product, batch))
+            return len(created)
+
+        self.step(f"Products ({count:,})", run)
+        return created
+
+    def create_images(self, products, per_product):
+        def run():
+            total = 0
+            for start in range(0, len(products), self.batch_size):
+                batch = [
+                    ProductImage(product_id=product_id, image="blank_image.png")
+                    for product_id, _ in products[start:start + self.batch_size]
+                    for _ in range(per_product)
+                ]
+                total += len(self.bulk(ProductImage, batch))
+            return total
+
+        if per_product > 0:
+            self.step(f"Product images ({len(products) * per_product:,})", run)
+
+    def create_users(self, count):
+        # Hashing is deliberately slow; every generated user shares one hash
+        password = make_password("benchmark")
+
+        def run():
+            for start in range(0, count, self.batch_size):
+                self.bulk(Auth, [
+                    Auth(email=f"{self.tag}-{index}@example.test", password=password)
+                    for index in range(start, min(count, start + self.batch_size))
+                ])
+            return count
+
+        self.step(f"Users ({count:,})", run)
+        return list(
+            Auth.objects.filter(email__startswith=f"{self.tag}-").order_by("id").values_list("id", flat=True)
+        )
+
+    def create_carts(self, user_ids, products, count):
+        if not user_ids or not products:
+            return
+
+        def run():
+            carts = self.bulk(Cart, [Cart(user_id=user_id) for user_id in self.rng.sample(user_ids, min(count, len(user_ids)))])
+            lines = []
+            for cart in carts:
+                picked = {self.popular_index(len(products)) for _ in range(self.rng.randint(1, 6))}
+                lines.extend(
+                    CartItem(cart=cart, product_id=products[index][0], quantity=self.rng.randint(1, 3))
+                    for index in picked
+                )
+            self.bulk(CartItem, lines)
+            return len(carts) + len(lines)
+
+        self.step(f"Carts ({count:,})", run)
+
+    def create_orders(self, user_ids, products, count):
+        if not user_ids or not products:
+            return
+        statuses = [status for status, _ in STATUSES]
+        status_weights = [weight for _, weight in STATUSES]
+
+        def run():
+            total = 0
+            with manual_timestamps(Order._meta.get_field("created_at")):
+                for start in range(0, count, self.batch_size):
+                    orders, order_lines = [], []
+                    for _ in range(min(self.batch_size, count - start)):
+                        picked = {self.popular_index(len(products)) for _ in range(self.rng.randint(1, 5))}
+                        lines = [(products[i][0], self.rng.randint(1, 3), products[i][1]) for i in picked]
+                        orders.append(Order(
+                            user_id=self.rng.choice(user_ids),
+                            total_amount=sum(price * quantity for _, quantity, price in lines),
+                            status=self.rng.choices(statuses, status_weights)[0],
+                            shipping_address="1 Benchmark Way",
+                            created_at=self.random_timestamp(),
+                        ))
+                        order_lines.append(lines)
+                    orders = self.bulk(Order, orders)
+                    items = [
+                        OrderItem(order=order, product_id=product_id, quantity=quantity, price=price)
+                        for order, lines in zip(orders, order_lines)
+                        for product_id, quantity, price in lines
+                    ]
+                    total += len(orders) + len(self.bulk(OrderItem, items))
+            return total
+
+        self.step(f"Orders ({count:,})", run)
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from app.images import generate_variants
+from app.models import ItemImage, ProductImage
+
+
+class Command(BaseCommand):
+    help = "Backfill resized WebP variants for existing product and item images"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Regenerate images that already have variants")
+        parser.add_argument("--batch-size", type=int, default=200)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        for model in (ProductImage, ItemImage):
+            queryset = model.objects.order_by("id")
+            if not options["force"]:
+                queryset = queryset.filter(variants={})
+
+            processed = total = 0
+            last_id = 0
+            while True:
+                # Keyset batches: rows drop out of the variants={} filter as they are processed
+                batch = list(queryset.filter(id__gt=last_id)[:batch_size])
+                if not batch:
+                    break
+                last_id = batch[-1].id
+                total += len(batch)
+                processed += generate_variants(batch)
+                self.stdout.write(f"{model.__name__}: {processed}/{total} processed")
+
+            self.stdout.write(self.style.SUCCESS(
+                f"{model.__name__}: generated variants for {processed} of {total} images."
+            ))
@@ -0,0 +1,53 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app.importer import FORMATS, InvalidImportFile, ProductImporter, detect_format
+
+
+class Command(BaseCommand):
+    help = "Stream products from a CSV or JSONL file into the catalog, upserting by sku"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV/JSONL file, or - for stdin (then --format is required)")
+        parser.add_argument("--format", choices=FORMATS, help="Default: from the file extension")
+        parser.add_argument("--chunk-size", type=int, default=1000, help="Rows validated and written per transaction")
+        parser.add_argument("--images-dir", help="Resolve image paths against (and only allow them inside) this directory")
+        parser.add_argument("--no-variants", action="store_true",
+                            help="Skip WebP variant generation (run generate_image_variants later)")
+
+    def handle(self, *args, **options):
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be at least 1")
+        importer = ProductImporter(
+            chunk_size=options["chunk_size"], image_root=options["images_dir"],
+            variants=not options["no_variants"], on_chunk=self.print_chunk,
+        )
+        try:
+            format = options["format"] or detect_format(options["path"])
+            if options["path"] == "-":
+                report = importer.run(sys.stdin, format)
+            else:
+                with open(options["path"], newline="", encoding="utf-8-sig") as stream:
+                    report = importer.run(stream, format)
+        except (InvalidImportFile, OSError) as exc:
+            raise CommandError(str(exc))
+
+        for rejection in report.rejected:
+            self.stderr.write(f"line {rejection['line']}: {json.dumps(rejection['errors'])}")
+        if report.rejected_count > len(report.rejected):
+            self.stderr.write(f"... and {report.rejected_count - len(report.rejected)} more rejected rows")
+        summary = report.as_dict()
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report.created} new and {report.updated} updated products "
+            f"({report.images} images), rejected {report.rejected_count} rows "
+            f"in {summary['seconds']}s ({summary['rows_per_second']} rows/s)."
+        ))
+
+    def print_chunk(self, chunk):
+        self.stdout.write(
+            f"chunk {chunk.index}: {chunk.rows} rows, {chunk.created} created, {chunk.updated} updated, "
+            f"{chunk.rejected} rejected, {chunk.images} images in {chunk.seconds:.2f}s "
+            f"({chunk.rows_per_second} rows/s)"
+        )
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from app.authentication import purge_expired_tokens
+
+
+class Command(BaseCommand):
+    help = "Purge expired JWT outstanding/blacklisted tokens"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--interval", type=float, default=0,
+            help="Keep running, purging every N seconds (default: purge once and exit)",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            purged = purge_expired_tokens(batch_size=options["batch_size"])
+            if purged or not options["interval"]:
+                self.stdout.write(self.style.SUCCESS(f"Purged {purged} expired tokens."))
+            if not options["interval"]:
+                return
+            time.sleep(options["interval"])
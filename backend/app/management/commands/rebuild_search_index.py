@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from app import search
+
+
+class Command(BaseCommand):
+    help = "Create (if missing) and rebuild the product/item full-text search index"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        connection = connections[options["database"]]
+        # install() is idempotent and rebuilds; it also restores SQLite triggers
+        # dropped when a migration remakes app_product/app_item.
+        if search.install(connection):
+            self.stdout.write(self.style.SUCCESS(f"Search index rebuilt ({connection.vendor})."))
+        else:
+            self.stdout.write(self.style.WARNING(
+                f"No full-text backend for {connection.vendor}; search uses icontains."
+            ))
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from app.reservations import release_expired
+
+
+class Command(BaseCommand):
+    help = "Return stock held by cart reservations whose TTL has passed"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--interval", type=float, default=0,
+            help="Keep running as a sweeper, waking every N seconds (default: sweep once and exit)",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            released = release_expired(batch_size=options["batch_size"])
+            if released or not options["interval"]:
+                self.stdout.write(self.style.SUCCESS(f"Released {released} expired reservations."))
+            if not options["interval"]:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,51 @@
+import os
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+def replica_path(alias):
+    name = str(connections[alias].settings_dict["NAME"])
+    if name.startswith("file:"):
+        name = name[len("file:"):].split("?", 1)[0]
+    return name
+
+
+class Command(BaseCommand):
+    help = "Copy the primary SQLite database over each SQLite read replica (a local stand-in for replication)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval", type=float, default=0,
+            help="Keep re-copying every N seconds (default: copy once and exit)",
+        )
+
+    def handle(self, *args, **options):
+        primary = connections["default"]
+        if primary.vendor != "sqlite":
+            raise CommandError("The primary database is not SQLite.")
+        aliases = [alias for alias in settings.DATABASE_REPLICAS if connections[alias].vendor == "sqlite"]
+        if not aliases:
+            raise CommandError("No SQLite replicas configured; set DJANGO_DB_REPLICAS.")
+
+        while True:
+            primary.ensure_connection()
+            for alias in aliases:
+                path = replica_path(alias)
+                tmp_path = f"{path}.tmp"
+                # The online backup API copies a consistent snapshot while writers continue
+                target = sqlite3.connect(tmp_path)
+                try:
+                    primary.connection.backup(target)
+                    # Replicas are opened read-only, which cannot use a WAL database without its -shm file
+                    target.execute("PRAGMA journal_mode=DELETE")
+                finally:
+                    target.close()
+                os.replace(tmp_path, path)
+                self.stdout.write(f"{alias}: copied to {path}")
+            if not options["interval"]:
+                return
+            time.sleep(options["interval"])
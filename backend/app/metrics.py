@@ -0,0 +1,205 @@
+"""
+Per-request performance instrumentation.
+
+PerformanceMiddleware times each request, counts and times its SQL through
+``connection.execute_wrapper``, splits view time from template/renderer time,
+and adds a ``Server-Timing`` header. Aggregates are kept in process memory and
+exposed in Prometheus text format by ``metrics_view`` (staff only).
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+from rest_framework import permissions
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
+from rest_framework.renderers import BaseRenderer
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _ViewStats:
+    __slots__ = ("buckets", "count", "seconds", "queries", "query_seconds", "response_bytes", "errors")
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.seconds = 0.0
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.response_bytes = 0
+        self.errors = 0
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def observe(self, view, seconds, queries, query_seconds, response_bytes, error):
+        with self._lock:
+            stats = self._views.get(view)
+            if stats is None:
+                stats = self._views[view] = _ViewStats()
+            stats.buckets[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            stats.count += 1
+            stats.seconds += seconds
+            stats.queries += queries
+            stats.query_seconds += query_seconds
+            stats.response_bytes += response_bytes
+            stats.errors += error
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+    def render(self):
+        """Prometheus text exposition format."""
+        from . import catalog_cache
+
+        with self._lock:
+            views = sorted(self._views.items())
+            lines = [
+                "# HELP app_request_duration_seconds Request latency by view.",
+                "# TYPE app_request_duration_seconds histogram",
+            ]
+            for view, stats in views:
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), stats.buckets):
+                    cumulative += count
+                    lines.append(f'app_request_duration_seconds_bucket{{view="{view}",le="{bound}"}} {cumulative}')
+                lines.append(f'app_request_duration_seconds_sum{{view="{view}"}} {stats.seconds:.6f}')
+                lines.append(f'app_request_duration_seconds_count{{view="{view}"}} {stats.count}')
+
+            counters = (
+                ("app_db_queries_total", "SQL queries executed.", "queries", "{}"),
+                ("app_db_query_seconds_total", "Time spent in SQL.", "query_seconds", "{:.6f}"),
+                ("app_response_bytes_total", "Response body bytes.", "response_bytes", "{}"),
+                ("app_request_errors_total", "Responses with status >= 500.", "errors", "{}"),
+            )
+            for name, help_text, attr, fmt in counters:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} counter")
+                for view, stats in views:
+                    lines.append(f'{name}{{view="{view}"}} {fmt.format(getattr(stats, attr))}')
+
+        lines.append("# HELP app_catalog_cache_requests_total Catalog response cache lookups.")
+        lines.append("# TYPE app_catalog_cache_requests_total counter")
+        for result in ("hits", "misses"):
+            lines.append(f'app_catalog_cache_requests_total{{result="{result}"}} {catalog_cache.stats[result]}')
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+class _RequestTimer:
+    __slots__ = ("start", "view_end", "render_end", "queries", "query_seconds", "view")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.view_end = None
+        self.render_end = None
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.view = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.query_seconds += time.perf_counter() - started
+            self.queries += 1
+
+
+class PerformanceMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.server_timing = getattr(settings, "SERVER_TIMING_HEADER", True)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def _instrument(stack, timer):
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(timer))
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timer = _RequestTimer()
+        request._performance_timer = timer
+        with ExitStack() as stack:
+            self._instrument(stack, timer)
+            response = self.get_response(request)
+        return self._finish(timer, response)
+
+    async def __acall__(self, request):
+        timer = _RequestTimer()
+        request._performance_timer = timer
+        # Connections are per thread, and under ASGI every sync_to_async call of a
+        # request (async ORM calls, sync views) runs in that request's one sync
+        # thread, so the wrappers go onto that thread's connections
+        stack = ExitStack()
+        await sync_to_async(self._instrument)(stack, timer)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return self._finish(timer, response)
+
+    def _finish(self, timer, response):
+        end = time.perf_counter()
+        total = end - timer.start
+        view_end = timer.view_end or end
+        render = (timer.render_end or view_end) - view_end if timer.view_end else 0.0
+        view = max(0.0, (view_end - timer.start) - timer.query_seconds)
+        size = 0 if response.streaming else len(response.content)
+
+        registry.observe(
+            timer.view or "unresolved", total, timer.queries, timer.query_seconds, size,
+            response.status_code >= 500,
+        )
+        if self.server_timing:
+            response["Server-Timing"] = ", ".join([
+                f'db;dur={timer.query_seconds * 1000:.2f};desc="{timer.queries} queries"',
+                f"app;dur={view * 1000:.2f}",
+                f"render;dur={render * 1000:.2f}",
+                f"total;dur={total * 1000:.2f}",
+            ])
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        match = request.resolver_match
+        request._performance_timer.view = (match.view_name or match._func_path) if match else None
+
+    def process_template_response(self, request, response):
+        # Called after the view returns and before the response is rendered
+        timer = request._performance_timer
+        timer.view_end = time.perf_counter()
+        response.add_post_render_callback(lambda rendered: setattr(timer, "render_end", time.perf_counter()))
+        return response
+
+
+class PrometheusTextRenderer(BaseRenderer):
+    media_type = "text/plain"
+    format = "txt"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return data
+
+
+@api_view(["GET"])
+@permission_classes([permissions.IsAdminUser])
+@renderer_classes([PrometheusTextRenderer])
+def metrics_view(request):
+    return HttpResponse(registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,19 @@
+from django.db import migrations
+
+from app import search
+
+
+def reinstall_search_index(apps, schema_editor):
+    # Stores the weighted bm25() that search() now reads through FTS5's rank column
+    search.install(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0017_product_sku'),
+    ]
+
+    operations = [
+        migrations.RunPython(reinstall_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+
+def enable_wal(apps, schema_editor):
+    # journal_mode=WAL is stored in the database file, so it is set once here rather than
+    # on every connection; WAL lets readers run alongside the single writer
+    if schema_editor.connection.vendor == 'sqlite':
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode=WAL')
+
+
+class Migration(migrations.Migration):
+    # SQLite cannot switch journal modes inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('app', '0018_search_rank'),
+    ]
+
+    operations = [
+        migrations.RunPython(enable_wal, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:56
+
+import app.search
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0019_sqlite_wal'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemSearchIndex',
+            fields=[
+                ('item', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_index', serialize=False, to='app.item')),
+                ('document', app.search.FullTextField(db_column='app_item_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'app_item_fts',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductSearchIndex',
+            fields=[
+                ('product', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_index', serialize=False, to='app.product')),
+                ('document', app.search.FullTextField(db_column='app_product_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'app_product_fts',
+                'managed': False,
+            },
+        ),
+    ]
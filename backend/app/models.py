@@ -1,4 +1,11 @@
-from django.db import models
+from decimal import Decimal
+
+from django.db import connections, models, transaction
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .images import ResponsiveImageMixin
+from .search import FullTextField
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 
 class AuthManager(BaseUserManager):
@@ -44,7 +51,63 @@ class Category(models.Model):
     def __str__(self):
         return self.name
 
+class ProductQuerySet(models.QuerySet):
+    def with_related(self):
+        """Join the category and prefetch images so serializing a page is a fixed number of queries."""
+        return self.select_related("category").prefetch_related(
+            models.Prefetch("images", queryset=ProductImage.objects.order_by("id"))
+        )
+
+    def take_stock(self, quantities):
+        """
+        Decrement stock for ``{product_id: quantity}`` in one conditional UPDATE.
+        A row is only decremented if it still has enough stock, so concurrent
+        callers cannot oversell. If any product is short nothing is decremented
+        and InsufficientStock is raised. Must be called inside a transaction.
+        """
+        if not quantities:
+            return
+        enough_stock = models.Q()
+        for product_id, quantity in quantities.items():
+            enough_stock |= models.Q(pk=product_id, stock__gte=quantity)
+        savepoint = transaction.savepoint(using=self.db)
+        decremented = self.filter(enough_stock).update(
+            stock=models.F("stock") - self._per_product(quantities), updated_at=timezone.now(),
+        )
+        if decremented == len(quantities):
+            transaction.savepoint_commit(savepoint, using=self.db)
+            return
+        transaction.savepoint_rollback(savepoint, using=self.db)
+        current = dict(self.filter(pk__in=quantities).values_list("pk", "stock"))
+        raise InsufficientStock({
+            product_id: current.get(product_id, 0)
+            for product_id, quantity in quantities.items()
+            if quantity > current.get(product_id, 0)
+        })
+
+    def return_stock(self, quantities):
+        """Add ``{product_id: quantity}`` back to stock in one UPDATE."""
+        if quantities:
+            self.filter(pk__in=quantities).update(
+                stock=models.F("stock") + self._per_product(quantities), updated_at=timezone.now(),
+            )
+
+    @staticmethod
+    def _per_product(quantities):
+        return models.Case(
+            *[models.When(pk=product_id, then=models.Value(quantity)) for product_id, quantity in quantities.items()],
+            output_field=models.PositiveIntegerField(),
+        )
+
+class InsufficientStock(Exception):
+    def __init__(self, available):
+        # {product_id: units in stock} for every product that was short
+        self.available = available
+        super().__init__(f"Insufficient stock for products {sorted(available)}")
+
 class Product(models.Model):
+    # Natural key for bulk imports (app/importer.py); optional for products created one by one
+    sku = models.CharField(max_length=64, unique=True, null=True, blank=True)
     name = models.CharField(max_length=100)
     description = models.TextField()
     price = models.DecimalField(max_digits=6, decimal_places=2, default=0)
@@ -54,30 +117,171 @@ class Product(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ProductQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Catalog listing: available=True ordered by (created_at, id) for keyset pagination.
+            # Partial, because SQLite filters booleans as bare `WHERE available`, which
+            # cannot use a leading `available` index column.
+            models.Index(
+                fields=["-created_at", "-id"], condition=models.Q(available=True), name="product_listing_idx"
+            ),
+            # ?category= listing, same ordering
+            models.Index(
+                fields=["category", "-created_at", "-id"], condition=models.Q(available=True),
+                name="product_category_listing_idx",
+            ),
+            # ?min_price=/?max_price= range filters
+            models.Index(fields=["price"], condition=models.Q(available=True), name="product_price_idx"),
+        ]
+
     def __str__(self):
         return self.name
 
-class ProductImage(models.Model):
+class ProductSearchIndex(models.Model):
+    """The SQLite FTS5 index of Product (app/search.py); read-only, kept in sync by triggers."""
+    product = models.OneToOneField(
+        Product, models.DO_NOTHING, primary_key=True, db_column="rowid", related_name="search_index",
+    )
+    document = FullTextField(db_column="app_product_fts")
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = "app_product_fts"
+
+class ProductImage(ResponsiveImageMixin, models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="images")
     image = models.ImageField(upload_to="item_images/", default="blank_image.png")
+    variants = models.JSONField(default=dict, blank=True)
 
     def __str__(self):
         return f"Image for {self.product.name}"
 
+MONEY = models.DecimalField(max_digits=12, decimal_places=2)
+CENT = Decimal("0.01")
+
+def line_total(prefix=""):
+    return models.ExpressionWrapper(
+        models.F(f"{prefix}quantity") * models.F(f"{prefix}product__price"), output_field=MONEY
+    )
+
+class CartQuerySet(models.QuerySet):
+    def with_summary(self):
+        """Annotate line/item counts and the cart total, computed in one aggregate query."""
+        return self.annotate(
+            line_count=models.Count("items"),
+            item_count=Coalesce(models.Sum("items__quantity"), 0),
+            total_amount=Coalesce(
+                models.Sum(line_total("items__")), models.Value(Decimal("0")), output_field=MONEY
+            ),
+            products_modified=models.Max("items__product__updated_at"),
+        )
+
 class Cart(models.Model):
     user = models.ForeignKey(Auth, on_delete=models.CASCADE, related_name="carts")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    objects = CartQuerySet.as_manager()
     
     def total(self):
-        return sum(item.subtotal() for item in self.items.all())
+        # SQLite returns computed decimals unquantized; normalise to cents
+        if hasattr(self, "total_amount"):
+            return Decimal(self.total_amount).quantize(CENT)
+        total = self.items.aggregate(total=models.Sum(line_total()))["total"]
+        return Decimal(total or 0).quantize(CENT)
+
+    def touch(self):
+        """Bump updated_at after a line changes so cart ETags/Last-Modified move."""
+        from .cart_summary import invalidate
+
+        self.updated_at = timezone.now()
+        Cart.objects.filter(pk=self.pk).update(updated_at=self.updated_at)
+        invalidate(self.user_id)
+
+class CartItemQuerySet(models.QuerySet):
+    def with_line_total(self):
+        return self.annotate(line_total=line_total())
+
+    def add(self, cart, product, quantity):
+        """
+        Insert a line or add ``quantity`` to the existing one in a single
+        statement (INSERT ... ON CONFLICT DO UPDATE), returning the line.
+        """
+        line = self.upsert(cart, {product.pk: quantity})[0]
+        line.product = product
+        return line
+
+    def upsert(self, cart, quantities, increment=True):
+        """
+        Write ``{product_id: quantity}`` to the cart in one multi-row
+        INSERT ... ON CONFLICT DO UPDATE. With ``increment`` quantities are added
+        to existing lines, otherwise they replace them. Returns the lines (without
+        products loaded) in ``quantities`` order.
+        """
+        if not quantities:
+            return []
+        connection = connections[self.db]
+        if connection.vendor not in ("sqlite", "postgresql"):
+            return self._upsert_fallback(cart, quantities, increment)
+
+        table = self.model._meta.db_table
+        update = f"{table}.quantity + excluded.quantity" if increment else "excluded.quantity"
+        rows = ", ".join(["(%s, %s, %s, 0)"] * len(quantities))
+        params = [value for product_id, quantity in quantities.items() for value in (cart.pk, product_id, quantity)]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} (cart_id, product_id, quantity, reserved) VALUES {rows} "
+                f"ON CONFLICT (cart_id, product_id) DO UPDATE SET quantity = {update} "
+                f"RETURNING id, product_id, quantity, reserved",
+                params,
+            )
+            returned = {row[1]: row for row in cursor.fetchall()}
+        return [
+            self.model(pk=pk, cart=cart, product_id=product_id, quantity=total, reserved=reserved)
+            for pk, product_id, total, reserved in (returned[product_id] for product_id in quantities)
+        ]
+
+    def _upsert_fallback(self, cart, quantities, increment):
+        if not increment:
+            self.bulk_create(
+                [self.model(cart=cart, product_id=product_id, quantity=quantity)
+                 for product_id, quantity in quantities.items()],
+                update_conflicts=True, unique_fields=["cart", "product"], update_fields=["quantity"],
+            )
+        else:
+            for product_id, quantity in quantities.items():
+                line, created = self.get_or_create(cart=cart, product_id=product_id, defaults={"quantity": quantity})
+                if not created:
+                    self.filter(pk=line.pk).update(quantity=models.F("quantity") + quantity)
+        lines = self.filter(cart=cart, product_id__in=quantities).in_bulk(field_name="product_id")
+        return [lines[product_id] for product_id in quantities]
 
 class CartItem(models.Model):
     cart = models.ForeignKey(Cart, on_delete=models.CASCADE, related_name="items")
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField(default=1)
+    # Units taken from Product.stock and held for this line (see app/reservations.py)
+    reserved = models.PositiveIntegerField(default=0)
+    reserved_until = models.DateTimeField(null=True, blank=True)
+
+    objects = CartItemQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["cart", "product"], name="cartitem_cart_product_uniq"),
+        ]
+        indexes = [
+            # Reservation sweeper: lines still holding stock, oldest expiry first
+            models.Index(fields=["reserved_until"], name="cartitem_reserved_until_idx",
+                         condition=models.Q(reserved__gt=0)),
+        ]
     
     def subtotal(self):
+        if hasattr(self, "line_total"):
+            return Decimal(self.line_total).quantize(CENT)
         return self.product.price * self.quantity
 
 class Order(models.Model):
@@ -89,6 +293,12 @@ class Order(models.Model):
     payment_method = models.CharField(max_length=20, default='cod')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Order history: user's orders ordered by (created_at, id)
+            models.Index(fields=["user", "-created_at", "-id"], name="order_user_created_idx"),
+        ]
     
     def __str__(self):
         return f"Order {self.id} by {self.user.email}"
@@ -102,7 +312,41 @@ class OrderItem(models.Model):
     def subtotal(self):
         return self.price * self.quantity
 
+# Sales rollups for the analytics API, maintained by app/analytics.py
+class DailySales(models.Model):
+    date = models.DateField(unique=True)
+    orders = models.IntegerField(default=0)
+    units = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+class StatusSales(models.Model):
+    status = models.CharField(max_length=20, unique=True)
+    orders = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+class ProductSales(models.Model):
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, related_name="sales")
+    units = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        indexes = [
+            # Top products by units / by revenue
+            models.Index(fields=["-units"], name="productsales_units_idx"),
+            models.Index(fields=["-revenue"], name="productsales_revenue_idx"),
+        ]
+
+class CategorySales(models.Model):
+    category = models.OneToOneField(Category, on_delete=models.CASCADE, related_name="sales")
+    units = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
 # Your existing models
+class ItemQuerySet(models.QuerySet):
+    def with_images(self):
+        """Prefetch images (by id) so listing pages render cards in a fixed number of queries."""
+        return self.prefetch_related(models.Prefetch("images", queryset=ItemImage.objects.order_by("id")))
+
 class Item(models.Model):
     CATEGORY_CHOICES = [
         ("fashion", "Fashion"),
@@ -120,12 +364,41 @@ class Item(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ItemQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Item_Auth duplicate-name check
+            models.Index(fields=["name"], name="item_name_idx"),
+            # views.category filter; Shop/category pages order by -id
+            models.Index(fields=["category", "-id"], name="item_category_idx"),
+        ]
+
     def __str__(self):
         return f"{self.name} ({self.category})"
 
-class ItemImage(models.Model):
+    @property
+    def primary_image(self):
+        """The card image (lowest id); reuses the with_images() prefetch instead of .first()."""
+        images = self.images.all()
+        if not images:
+            return None
+        return min(images, key=lambda image: image.id)
+
+class ItemSearchIndex(models.Model):
+    """The SQLite FTS5 index of Item (app/search.py); read-only, kept in sync by triggers."""
+    item = models.OneToOneField(Item, models.DO_NOTHING, primary_key=True, db_column="rowid", related_name="search_index")
+    document = FullTextField(db_column="app_item_fts")
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = "app_item_fts"
+
+class ItemImage(ResponsiveImageMixin, models.Model):
     item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name="images")
     image = models.ImageField(upload_to="item_images/", default="blank_image.png")
+    variants = models.JSONField(default=dict, blank=True)
 
     def __str__(self):
         return f"Image for {self.item.name}"
@@ -136,4 +409,15 @@ class Specification(models.Model):
     value = models.CharField(max_length=255)
 
     def __str__(self):
-        return f"{self.key}: {self.value}"
\ No newline at end of file
+        return f"{self.key}: {self.value}"
+
+class MediaBlob(models.Model):
+    """One stored file in ContentAddressedStorage and how many rows reference it."""
+    name = models.CharField(max_length=255, unique=True)
+    digest = models.CharField(max_length=64, db_index=True)
+    size = models.BigIntegerField(default=0)
+    ref_count = models.IntegerField(default=0, db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} refs)"
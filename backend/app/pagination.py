@@ -0,0 +1,109 @@
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, CursorPagination, PageNumberPagination
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """
+    Keyset pagination on (created_at, id): no COUNT(*) and no OFFSET scan.
+
+    DRF positions a cursor on the first ordering field alone and steps over
+    ties with an offset. Here the position is the (created_at, id) pair, so it
+    is unique and rows sharing a timestamp are neither skipped nor repeated
+    across a page boundary.
+    """
+    ordering = ('-created_at', '-id')
+
+    def _get_position_from_instance(self, instance, ordering):
+        return f'{instance.created_at.isoformat()},{instance.pk}'
+
+    def _parse_position(self, position):
+        created_at, _, pk = position.rpartition(',')
+        try:
+            created_at, pk = parse_datetime(created_at), int(pk)
+        except ValueError:
+            created_at = None
+        if created_at is None:
+            raise NotFound(self.invalid_cursor_message)
+        return created_at, pk
+
+    def paginate_queryset(self, queryset, request, view=None):
+        # Same flow as CursorPagination.paginate_queryset, filtering on the pair
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+        offset, reverse, current_position = self.cursor or (0, False, None)
+
+        if reverse:
+            queryset = queryset.order_by('created_at', 'id')
+        else:
+            queryset = queryset.order_by(*self.ordering)
+        if current_position is not None:
+            created_at, pk = self._parse_position(current_position)
+            lookup = 'gt' if reverse else 'lt'
+            queryset = queryset.filter(
+                Q(**{f'created_at__{lookup}': created_at}) | Q(created_at=created_at, **{f'id__{lookup}': pk})
+            )
+
+        results = list(queryset[offset:offset + self.page_size + 1])
+        self.page = results[:self.page_size]
+        following_position = (
+            self._get_position_from_instance(results[-1], self.ordering) if len(results) > len(self.page) else None
+        )
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = current_position is not None or offset > 0
+            self.has_previous = following_position is not None
+            self.next_position, self.previous_position = current_position, following_position
+        else:
+            self.has_next = following_position is not None
+            self.has_previous = current_position is not None or offset > 0
+            self.next_position, self.previous_position = following_position, current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+
+class CursorOrPageNumberPagination(BasePagination):
+    """
+    Page-number pagination by default so existing clients keep working.
+    Requests that pass ``?cursor=...`` or ``?pagination=cursor`` get keyset
+    pagination instead (ordered newest first, ignoring search rank).
+    """
+    mode_query_param = 'pagination'
+
+    def __init__(self):
+        self.page_number = PageNumberPagination()
+        self.cursor = CreatedAtCursorPagination()
+        self.active = self.page_number
+
+    def use_cursor(self, request):
+        return (
+            self.cursor.cursor_query_param in request.query_params
+            or request.query_params.get(self.mode_query_param) == 'cursor'
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.active = self.cursor if self.use_cursor(request) else self.page_number
+        return self.active.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.active.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.page_number.get_paginated_response_schema(schema)
+
+    def to_html(self):
+        return self.active.to_html()
+
+    def get_schema_operation_parameters(self, view):
+        return (
+            self.page_number.get_schema_operation_parameters(view)
+            + self.cursor.get_schema_operation_parameters(view)
+        )
@@ -0,0 +1,171 @@
+"""
+Full-text search for Product and Item.
+
+SQLite gets an external-content FTS5 table per model (``<table>_fts``) kept in
+sync by triggers, so bulk_create/update() writes are indexed too. PostgreSQL
+uses a GIN expression index over ``to_tsvector`` which needs no syncing. Any
+other engine, or SQLite built without FTS5, falls back to icontains.
+
+On SQLite the FTS5 table is mapped by an unmanaged model (ProductSearchIndex,
+ItemSearchIndex) whose primary key is the indexed row's id, so querysets join
+it through ``search_index`` and filter with the ``match`` lookup.
+
+Search terms are reduced to words before they reach the index, so FTS5 and
+tsquery operators typed by users are matched as plain words. Every word is
+prefix-matched; words in double quotes must appear together as a phrase.
+"""
+import re
+
+from django.db import connections, DatabaseError
+from django.db.models import BooleanField, F, FloatField, Lookup, Q, TextField
+from django.db.models.expressions import RawSQL
+
+SEARCH_TABLES = ("app_product", "app_item")
+PG_CONFIG = "english"
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_PHRASE_RE = re.compile(r'"([^"]*)"')
+# Name matches weigh ten times description matches in FTS5's rank column
+SQLITE_RANK = "bm25(10.0, 1.0)"
+_fts_ready = {}
+
+
+class FullTextField(TextField):
+    """FTS5's hidden column named after its table; only meaningful with the ``match`` lookup."""
+
+
+@FullTextField.register_lookup
+class Match(Lookup):
+    lookup_name = "match"
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} MATCH {rhs}", (*lhs_params, *rhs_params)
+
+
+def _pg_vector(table):
+    return (
+        f"to_tsvector('{PG_CONFIG}', coalesce(\"{table}\".\"name\", '') || ' ' || "
+        f"coalesce(\"{table}\".\"description\", ''))"
+    )
+
+
+def _sqlite_statements(table):
+    fts = f"{table}_fts"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"name, description, content='{table}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, name, description) VALUES (new.id, new.name, new.description); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, name, description) "
+        f"VALUES ('delete', old.id, old.name, old.description); END",
+        # Only reindex when searchable columns change, not on stock/price updates
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF name, description ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, name, description) "
+        f"VALUES ('delete', old.id, old.name, old.description); "
+        f"INSERT INTO {fts}(rowid, name, description) VALUES (new.id, new.name, new.description); END",
+        f"INSERT INTO {fts}({fts}, rank) VALUES ('rank', '{SQLITE_RANK}')",
+    ]
+
+
+def install(connection):
+    """Create the search index structures for the connection's engine."""
+    _fts_ready.clear()
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            for table in SEARCH_TABLES:
+                try:
+                    for statement in _sqlite_statements(table):
+                        cursor.execute(statement)
+                except DatabaseError:
+                    # SQLite compiled without FTS5: searches fall back to icontains
+                    return False
+        elif connection.vendor == "postgresql":
+            for table in SEARCH_TABLES:
+                cursor.execute(
+                    f"CREATE INDEX IF NOT EXISTS {table}_search_idx ON {table} USING GIN ({_pg_vector(table)})"
+                )
+        else:
+            return False
+    rebuild(connection)
+    return True
+
+
+def uninstall(connection):
+    _fts_ready.clear()
+    with connection.cursor() as cursor:
+        for table in SEARCH_TABLES:
+            if connection.vendor == "sqlite":
+                for suffix in ("ai", "ad", "au"):
+                    cursor.execute(f"DROP TRIGGER IF EXISTS {table}_fts_{suffix}")
+                cursor.execute(f"DROP TABLE IF EXISTS {table}_fts")
+            elif connection.vendor == "postgresql":
+                cursor.execute(f"DROP INDEX IF EXISTS {table}_search_idx")
+
+
+def rebuild(connection):
+    """Repopulate the index from the base tables."""
+    with connection.cursor() as cursor:
+        for table in SEARCH_TABLES:
+            if connection.vendor == "sqlite" and _has_fts(connection, table):
+                fts = f"{table}_fts"
+                cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+                cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('optimize')")
+            elif connection.vendor == "postgresql":
+                cursor.execute(f"REINDEX INDEX {table}_search_idx")
+
+
+def _has_fts(connection, table):
+    key = (connection.alias, table)
+    if key not in _fts_ready:
+        _fts_ready[key] = f"{table}_fts" in connection.introspection.table_names()
+    return _fts_ready[key]
+
+
+def _parse(term):
+    """Split ``term`` into phrases (lists of words): one per quoted part, one per other word."""
+    phrases = []
+    for index, part in enumerate(_PHRASE_RE.split(term)):
+        # Odd parts were inside quotes (an unbalanced quote just ends the phrase)
+        words = _TOKEN_RE.findall(part)
+        if index % 2 and words:
+            phrases.append(words)
+        elif not index % 2:
+            phrases.extend([word] for word in words)
+    return phrases
+
+
+def search(queryset, term):
+    """
+    Filter ``queryset`` (Product or Item) to rows matching ``term`` and add
+    ``search_rank``; lower ranks are better matches. All phrases must match,
+    and the last word of each is prefix-matched.
+    """
+    phrases = _parse(term)
+    connection = connections[queryset.db]
+    table = queryset.model._meta.db_table
+
+    if phrases and connection.vendor == "sqlite" and _has_fts(connection, table):
+        match = " ".join('"%s"*' % " ".join(words) for words in phrases)
+        # Joined rather than looked up per row, so MATCH runs once and the rank
+        # comes from the same scan (the annotation reuses the filter's join)
+        return queryset.filter(search_index__document__match=match).annotate(search_rank=F("search_index__rank"))
+
+    if phrases and connection.vendor == "postgresql":
+        tsquery = " & ".join(" <-> ".join(words) + ":*" for words in phrases)
+        vector = _pg_vector(table)
+        return queryset.filter(
+            RawSQL(f"{vector} @@ to_tsquery('{PG_CONFIG}', %s)", (tsquery,), output_field=BooleanField())
+        ).annotate(
+            search_rank=RawSQL(
+                f"-ts_rank({vector}, to_tsquery('{PG_CONFIG}', %s))", (tsquery,), output_field=FloatField()
+            )
+        )
+
+    term = term.replace('"', "").strip()
+    return queryset.filter(
+        Q(name__icontains=term) | Q(description__icontains=term)
+    ).annotate(search_rank=RawSQL("0", (), output_field=FloatField()))
@@ -2,6 +2,7 @@ from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
 from .models import Product, Category, Cart, CartItem, Order, OrderItem, ProductImage
+from .images import generate_variants
 
 User = get_user_model()
 
@@ -39,33 +40,58 @@ class ProductSerializer(serializers.ModelSerializer):
     category_name = serializers.CharField(source='category.name', read_only=True)
     images = serializers.SerializerMethodField()
     image = serializers.SerializerMethodField()
+    image_srcset = serializers.SerializerMethodField()
     
     class Meta:
         model = Product
         fields = [
-            'id', 'name', 'description', 'price', 
-            'category', 'category_slug', 'category_name', 'images', 'image',
+            'id', 'sku', 'name', 'description', 'price', 
+            'category', 'category_slug', 'category_name', 'images', 'image', 'image_srcset',
             'available', 'stock', 'created_at', 'updated_at'
         ]
 
-    def get_images(self, obj):
+    def _build_url(self, image_field):
         request = self.context.get('request')
-        def build_url(image_field):
-            url = image_field.url if hasattr(image_field, 'url') else image_field
-            if request and url and not url.startswith('http'):
-                return request.build_absolute_uri(url)
-            return url
-        return [{'id': img.id, 'url': build_url(img.image)} for img in obj.images.all()]
+        url = image_field.url if hasattr(image_field, 'url') else image_field
+        if request and url and not url.startswith('http'):
+            return request.build_absolute_uri(url)
+        return url
+
+    def _srcset(self, img):
+        return ', '.join(
+            f'{self._build_url(url)} {width}w' for width, url in img.variant_urls().items()
+        )
+
+    def _primary_image(self, obj):
+        # Avoid .first(): it re-queries even when images are already prefetched
+        images = obj.images.all()
+        if not images:
+            return None
+        return min(images, key=lambda img: img.id)
+
+    def get_images(self, obj):
+        # .all() reuses the prefetch cache from Product.objects.with_related()
+        return [
+            {
+                'id': img.id,
+                'url': self._build_url(img.image),
+                'variants': {width: self._build_url(url) for width, url in img.variant_urls().items()},
+                'srcset': self._srcset(img),
+            }
+            for img in obj.images.all()
+        ]
 
     def get_image(self, obj):
-        request = self.context.get('request')
-        first = obj.images.first()
+        first = self._primary_image(obj)
         if not first:
             return None
-        url = first.image.url if hasattr(first.image, 'url') else first.image
-        if request and url and not url.startswith('http'):
-            return request.build_absolute_uri(url)
-        return url
+        return self._build_url(first.image)
+
+    def get_image_srcset(self, obj):
+        first = self._primary_image(obj)
+        if not first:
+            return ''
+        return self._srcset(first)
 
     def validate(self, attrs):
         category = attrs.get('category')
@@ -89,11 +115,7 @@ class ProductSerializer(serializers.ModelSerializer):
 
         product = Product.objects.create(**validated_data)
 
-        request = self.context.get('request')
-        if request and hasattr(request, 'FILES'):
-            for file in request.FILES.getlist('images'):
-                ProductImage.objects.create(product=product, image=file)
-
+        self._save_images(product)
         return product
 
     def update(self, instance, validated_data):
@@ -109,12 +131,17 @@ class ProductSerializer(serializers.ModelSerializer):
             setattr(instance, attr, value)
         instance.save()
 
+        self._save_images(instance)
+        return instance
+
+    def _save_images(self, product):
         request = self.context.get('request')
         if request and hasattr(request, 'FILES'):
-            for file in request.FILES.getlist('images'):
-                ProductImage.objects.create(product=instance, image=file)
-
-        return instance
+            created = [
+                ProductImage.objects.create(product=product, image=file)
+                for file in request.FILES.getlist('images')
+            ]
+            generate_variants(created)
 
 class ProductImageSerializer(serializers.ModelSerializer):
     class Meta:
@@ -133,6 +160,31 @@ class CartItemSerializer(serializers.ModelSerializer):
     def get_total_price(self, obj):
         return obj.subtotal()
 
+class CartBatchLineSerializer(serializers.Serializer):
+    product_id = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=0)
+
+class CartBatchSerializer(serializers.Serializer):
+    MAX_LINES = 200
+
+    mode = serializers.ChoiceField(choices=['add', 'set'], default='add')
+    items = CartBatchLineSerializer(many=True, allow_empty=False, max_length=MAX_LINES)
+
+    def validate(self, attrs):
+        if attrs['mode'] == 'add' and any(line['quantity'] < 1 for line in attrs['items']):
+            raise serializers.ValidationError({"items": "Quantities must be at least 1 when adding."})
+        return attrs
+
+    def quantities(self):
+        """Merge repeated products: summed when adding, last one wins when setting."""
+        merged = {}
+        for line in self.validated_data['items']:
+            if self.validated_data['mode'] == 'add':
+                merged[line['product_id']] = merged.get(line['product_id'], 0) + line['quantity']
+            else:
+                merged[line['product_id']] = line['quantity']
+        return merged
+
 class CartSerializer(serializers.ModelSerializer):
     items = CartItemSerializer(many=True, read_only=True)
     total = serializers.SerializerMethodField()
@@ -0,0 +1,59 @@
+"""
+Fragment and page caching for the server-rendered shop (app/views.py).
+
+Listing fragments are keyed on a version number per scope ("all" for Shop,
+"category:<key>" for a category page) kept in the cache itself; app.signals
+bumps the affected scopes on Item, ItemImage and Specification writes. Item
+cards and item detail fragments are keyed on ``Item.updated_at``, which the
+same signals touch when an item's images or specifications change.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+
+def timeout():
+    return getattr(settings, "SHOP_CACHE_TIMEOUT", 3600)
+
+
+def _version_key(scope):
+    return f"shop:version:{scope}"
+
+
+def get_version(scope):
+    key = _version_key(scope)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, 1, timeout=None)
+        version = cache.get(key, 1)
+    return version
+
+
+def bump(*scopes):
+    for scope in scopes:
+        try:
+            cache.incr(_version_key(scope))
+        except ValueError:
+            cache.set(_version_key(scope), 2, timeout=None)
+
+
+def scopes_for(*categories):
+    return ("all", *(f"category:{category}" for category in categories if category))
+
+
+def listing_context(scope):
+    """Template context for the cached listing fragment in products.html."""
+    return {"fragment_timeout": timeout(), "listing_scope": scope, "listing_version": get_version(scope)}
+
+
+def item_changed(item_id):
+    """An item's images or specifications changed: move its cache keys and its listings."""
+    from .models import Item
+
+    category = Item.objects.filter(pk=item_id).values_list("category", flat=True).first()
+    if category is None:
+        # Deleted along with its item, whose own signal handles the listings
+        return
+    Item.objects.filter(pk=item_id).update(updated_at=timezone.now())
+    transaction.on_commit(lambda: bump(*scopes_for(category)))
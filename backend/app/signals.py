@@ -0,0 +1,85 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from . import analytics, authentication, cart_summary, catalog_cache, shop_cache
+from .models import Auth, Cart, Category, Item, ItemImage, Order, Product, ProductImage, Specification
+from .storage import release_image_files
+
+
+@receiver([post_save, post_delete], sender=Product)
+@receiver([post_save, post_delete], sender=ProductImage)
+@receiver([post_save, post_delete], sender=Category)
+def invalidate_catalog_cache(sender, **kwargs):
+    transaction.on_commit(catalog_cache.bump_version)
+
+
+@receiver(post_delete, sender=ProductImage)
+@receiver(post_delete, sender=ItemImage)
+def release_image_blobs(sender, instance, **kwargs):
+    transaction.on_commit(lambda: release_image_files(instance))
+
+
+@receiver(post_delete, sender=Cart)
+def invalidate_cart_summary(sender, instance, **kwargs):
+    cart_summary.invalidate(instance.user_id)
+
+
+@receiver(pre_save, sender=Item)
+def remember_item_category(sender, instance, raw=False, **kwargs):
+    # An edit can move the item to another category; both listings change
+    if instance.pk and not raw:
+        instance._previous_category = (
+            Item.objects.filter(pk=instance.pk).values_list("category", flat=True).first()
+        )
+
+
+@receiver([post_save, post_delete], sender=Item)
+def invalidate_item_listings(sender, instance, **kwargs):
+    scopes = shop_cache.scopes_for(instance.category, getattr(instance, "_previous_category", None))
+    transaction.on_commit(lambda: shop_cache.bump(*scopes))
+
+
+@receiver([post_save, post_delete], sender=ItemImage)
+@receiver([post_save, post_delete], sender=Specification)
+def invalidate_item_fragments(sender, instance, **kwargs):
+    shop_cache.item_changed(instance.item_id)
+
+
+@receiver(pre_save, sender=Order)
+def remember_order_status(sender, instance, raw=False, **kwargs):
+    if instance.pk and not raw:
+        instance._previous_sales = (
+            Order.objects.filter(pk=instance.pk).values_list("status", "total_amount").first()
+        )
+
+
+@receiver(post_save, sender=Order)
+def update_status_sales(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = None if created else getattr(instance, "_previous_sales", None)
+    current = (instance.status, instance.total_amount)
+    if previous != current:
+        analytics.record_status_change(previous, current)
+    instance._previous_sales = current
+
+
+@receiver(pre_delete, sender=Order)
+def forget_order_sales(sender, instance, **kwargs):
+    # Runs before the cascade removes the order's lines
+    analytics.forget_order(instance)
+    analytics.record_status_change((instance.status, instance.total_amount), None)
+
+
+@receiver([post_save, post_delete], sender=Auth)
+def invalidate_cached_user(sender, instance, **kwargs):
+    authentication.invalidate_user(getattr(instance, jwt_settings.USER_ID_FIELD))
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def announce_blacklisted_token(sender, created, **kwargs):
+    if created:
+        transaction.on_commit(authentication.blacklist_changed)
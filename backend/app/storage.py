@@ -0,0 +1,98 @@
+"""
+Content-addressed, deduplicating media storage.
+
+Uploads are streamed to a temporary file in chunks while being hashed, then
+moved to ``<upload dir>/<aa>/<sha256><ext>``. Identical content maps to the
+same file, so it is written once however many products reuse it. Each save
+adds a reference on the blob's MediaBlob row and ``delete()`` removes one.
+Files are only unlinked by the ``gc_media`` command once nothing references
+them.
+"""
+import hashlib
+import os
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    tmp_dir = "tmp"
+
+    def get_available_name(self, name, max_length=None):
+        # Names are derived from content in _save(); an existing name is a dedupe hit, not a clash
+        return name
+
+    def _save(self, name, content):
+        tmp_root = self.path(self.tmp_dir)
+        os.makedirs(tmp_root, exist_ok=True)
+
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=tmp_root)
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                if hasattr(content, "seek"):
+                    content.seek(0)
+                for chunk in content.chunks():
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode()
+                    digest.update(chunk)
+                    tmp.write(chunk)
+                    size += len(chunk)
+
+            hexdigest = digest.hexdigest()
+            directory = os.path.dirname(name)
+            extension = os.path.splitext(name)[1].lower()
+            blob_name = os.path.join(directory, hexdigest[:2], hexdigest + extension).replace("\\", "/")
+            full_path = self.path(blob_name)
+
+            with transaction.atomic():
+                # Reference first, then look for the file: gc_media deletes only
+                # unreferenced rows and unlinks in the same transaction, so either
+                # the row survives it or the file is already gone and written again
+                add_reference(blob_name, hexdigest, size)
+                if not os.path.exists(full_path):
+                    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                    os.replace(tmp_path, full_path)
+                    if self.file_permissions_mode is not None:
+                        os.chmod(full_path, self.file_permissions_mode)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return blob_name
+
+    def delete(self, name):
+        """Drop one reference; the file itself is removed by ``gc_media``."""
+        if name:
+            release_reference(name)
+
+
+def add_reference(name, digest, size):
+    from .models import MediaBlob
+
+    # The conditional UPDATE locks the row until the caller's transaction ends
+    if MediaBlob.objects.filter(name=name).update(ref_count=F("ref_count") + 1):
+        return
+    try:
+        with transaction.atomic():
+            MediaBlob.objects.create(name=name, digest=digest, size=size, ref_count=1)
+    except IntegrityError:
+        # Another upload of the same content created the row first
+        MediaBlob.objects.filter(name=name).update(ref_count=F("ref_count") + 1)
+
+
+def release_reference(name):
+    from .models import MediaBlob
+
+    MediaBlob.objects.filter(name=name, ref_count__gt=0).update(ref_count=F("ref_count") - 1)
+
+
+def release_image_files(instance):
+    """Release the original and variant blobs of a ProductImage/ItemImage row."""
+    storage = instance.image.storage
+    names = [instance.image.name, *instance.variants.values()]
+    for name in names:
+        if name:
+            storage.delete(name)
@@ -0,0 +1,118 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from app.models import (
+    Auth, Cart, CartItem, Category, CategorySales, DailySales, Order, Product, ProductSales, StatusSales,
+)
+
+
+def rollups():
+    return {
+        "daily": list(DailySales.objects.order_by("date").values_list("date", "orders", "units", "revenue")),
+        "status": list(StatusSales.objects.filter(orders__gt=0).order_by("status").values_list("status", "orders", "revenue")),
+        "products": list(ProductSales.objects.order_by("product").values_list("product", "units", "revenue")),
+        "categories": list(CategorySales.objects.order_by("category").values_list("category", "units", "revenue")),
+    }
+
+
+class AnalyticsTests(TestCase):
+    def setUp(self):
+        self.fashion = Category.objects.create(name="Fashion", slug="fashion")
+        self.books = Category.objects.create(name="Books", slug="books")
+        self.shirt = Product.objects.create(
+            name="Shirt", description="", price=Decimal("10.00"), stock=50, category=self.fashion,
+        )
+        self.novel = Product.objects.create(
+            name="Novel", description="", price=Decimal("4.50"), stock=50, category=self.books,
+        )
+        self.user = Auth.objects.create_user("buyer@example.com", "pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.staff = Auth.objects.create_user("staff@example.com", "pw", is_staff=True)
+        self.staff_client = APIClient()
+        self.staff_client.force_authenticate(self.staff)
+
+    def checkout(self, *lines):
+        cart, _ = Cart.objects.get_or_create(user=self.user)
+        for product, quantity in lines:
+            CartItem.objects.create(cart=cart, product=product, quantity=quantity)
+        response = self.client.post("/api/orders/", {}, format="json")
+        self.assertEqual(response.status_code, 201, response.content)
+        return Order.objects.get(pk=response.data["id"])
+
+    def test_checkout_updates_rollups(self):
+        self.checkout((self.shirt, 2), (self.novel, 1))
+        self.checkout((self.shirt, 1))
+
+        day = DailySales.objects.get(date=timezone.localdate())
+        self.assertEqual((day.orders, day.units, day.revenue), (2, 4, Decimal("34.50")))
+        self.assertEqual(ProductSales.objects.get(product=self.shirt).revenue, Decimal("30.00"))
+        self.assertEqual(CategorySales.objects.get(category=self.books).units, 1)
+        self.assertEqual(StatusSales.objects.get(status="pending").orders, 2)
+
+    def test_status_change_moves_order_between_rollups(self):
+        order = self.checkout((self.shirt, 1))
+        order.status = "shipped"
+        order.save()
+
+        self.assertEqual(StatusSales.objects.get(status="pending").orders, 0)
+        shipped = StatusSales.objects.get(status="shipped")
+        self.assertEqual((shipped.orders, shipped.revenue), (1, Decimal("10.00")))
+
+    def test_deleting_an_order_takes_it_out(self):
+        self.checkout((self.shirt, 1))
+        self.checkout((self.novel, 2)).delete()
+
+        day = DailySales.objects.get(date=timezone.localdate())
+        self.assertEqual((day.orders, day.units, day.revenue), (1, 1, Decimal("10.00")))
+        self.assertEqual(ProductSales.objects.get(product=self.novel).units, 0)
+        self.assertEqual(StatusSales.objects.get(status="pending").orders, 1)
+
+    def test_backfill_matches_incremental_rollups(self):
+        self.checkout((self.shirt, 2), (self.novel, 1))
+        order = self.checkout((self.novel, 3))
+        order.status = "delivered"
+        order.save()
+        incremental = rollups()
+
+        out = StringIO()
+        call_command("backfill_analytics", stdout=out)
+
+        self.assertIn("from 2 orders", out.getvalue())
+        self.assertEqual(rollups(), incremental)
+
+    def test_summary(self):
+        self.checkout((self.shirt, 2), (self.novel, 1))
+        self.checkout((self.novel, 2))
+
+        response = self.staff_client.get("/api/analytics/summary/", {"days": 7})
+
+        self.assertEqual(response.status_code, 200)
+        data = response.data
+        self.assertEqual(len(data["daily"]), 7)
+        self.assertEqual(data["daily"][-1]["revenue"], "33.50")
+        self.assertEqual(data["totals"], {"orders": 2, "units": 5, "revenue": "33.50", "avg_order_value": "16.75"})
+        self.assertEqual(data["by_status"], [{"status": "pending", "orders": 2, "revenue": "33.50"}])
+        self.assertEqual([row["name"] for row in data["top_products"]["units"]], ["Novel", "Shirt"])
+        self.assertEqual([row["name"] for row in data["top_products"]["revenue"]], ["Shirt", "Novel"])
+        self.assertEqual([(row["category"], row["share"]) for row in data["categories"]],
+                         [("fashion", 0.597), ("books", 0.403)])
+
+    def test_summary_query_count_is_fixed(self):
+        self.checkout((self.shirt, 1))
+        with self.assertNumQueries(6):
+            self.staff_client.get("/api/analytics/summary/")
+        self.checkout((self.shirt, 3), (self.novel, 1))
+        with self.assertNumQueries(6):
+            self.staff_client.get("/api/analytics/summary/")
+
+    def test_staff_only(self):
+        self.assertEqual(self.client.get("/api/analytics/summary/").status_code, 403)
+        self.assertEqual(APIClient().get("/api/analytics/daily/").status_code, 401)
+        self.assertEqual(self.staff_client.get("/api/analytics/top-products/", {"by": "price"}).status_code, 400)
+        self.assertEqual(self.staff_client.get("/api/analytics/daily/", {"days": "0"}).status_code, 400)
@@ -0,0 +1,96 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from app.models import Auth, Cart, CartItem, Category, Product, ProductImage
+
+
+@override_settings(CATALOG_CACHE_TIMEOUT=0)
+class AsyncCatalogTests(TestCase):
+    """The async endpoints return what the DRF views they mirror return."""
+
+    def setUp(self):
+        cache.clear()
+        self.fashion = Category.objects.create(name="Fashion", slug="fashion")
+        self.gaming = Category.objects.create(name="Gaming", slug="gaming")
+        self.products = []
+        for index in range(15):
+            product = Product.objects.create(
+                name=f"Shirt {index}", description="cotton", price=Decimal(10 + index), stock=5,
+                category=self.fashion if index % 3 else self.gaming,
+            )
+            ProductImage.objects.create(product=product, image="blank_image.png")
+            self.products.append(product)
+        self.user = Auth.objects.create_user("async@example.com", "pw")
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {AccessToken.for_user(self.user)}"}
+
+    def assertSamePayload(self, sync_path, async_path, payload_sync, payload_async):
+        if isinstance(payload_sync, dict):
+            for key in ("next", "previous"):
+                if payload_sync.get(key):
+                    payload_sync[key] = payload_sync[key].replace(sync_path, async_path)
+        self.assertEqual(payload_async, payload_sync)
+
+    async def compare(self, sync_path, async_path, query=""):
+        sync_response = await self.async_client.get(sync_path + query)
+        async_response = await self.async_client.get(async_path + query)
+        self.assertEqual(async_response.status_code, sync_response.status_code)
+        self.assertSamePayload(sync_path, async_path, sync_response.json(), async_response.json())
+        return async_response
+
+    async def test_product_list_matches_sync_view(self):
+        for query in ("", "?page=2", "?category=gaming", "?min_price=12&max_price=20", "?search=shirt"):
+            with self.subTest(query=query):
+                await self.compare("/api/products/", "/api/async/products/", query)
+
+    async def test_product_detail_and_categories_match_sync_views(self):
+        product = self.products[3]
+        await self.compare(f"/api/products/{product.pk}/", f"/api/async/products/{product.pk}/")
+        await self.compare("/api/categories/", "/api/async/categories/")
+
+    async def test_errors(self):
+        self.assertEqual((await self.async_client.get("/api/async/products/999999/")).status_code, 404)
+        self.assertEqual((await self.async_client.get("/api/async/products/?page=9")).status_code, 404)
+        self.assertEqual((await self.async_client.post("/api/async/products/")).status_code, 405)
+        self.assertEqual((await self.async_client.get("/api/async/cart/summary/")).status_code, 401)
+        response = await self.async_client.get("/api/async/cart/summary/", HTTP_AUTHORIZATION="Bearer nope")
+        self.assertEqual(response.status_code, 401)
+
+    def test_cart_summary(self):
+        cart = Cart.objects.create(user=self.user)
+        CartItem.objects.create(cart=cart, product=self.products[0], quantity=2)
+        CartItem.objects.create(cart=cart, product=self.products[1], quantity=1)
+
+        sync_response = self.client.get("/api/cart/summary/", **self.auth)
+        cache.clear()
+        async_response = self.client.get("/api/async/cart/summary/", **self.auth)
+
+        self.assertEqual(async_response.status_code, 200)
+        self.assertEqual(async_response.json(), sync_response.json())
+        self.assertEqual(async_response.json(), {"line_count": 2, "item_count": 3, "total": "31.00"})
+
+    def test_list_query_count_is_fixed(self):
+        # COUNT, page, category join is selected, images prefetch
+        with self.assertNumQueries(3):
+            self.client.get("/api/async/products/")
+        Product.objects.bulk_create(
+            Product(name=f"More {index}", description="", price=1, stock=1, category=self.fashion)
+            for index in range(30)
+        )
+        with self.assertNumQueries(3):
+            self.client.get("/api/async/products/?page=2")
+
+    @override_settings(CATALOG_CACHE_TIMEOUT=300)
+    def test_cached_responses_skip_the_database(self):
+        self.client.get("/api/async/products/")
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/async/products/")
+        self.assertEqual(response.json()["count"], 15)
+
+    async def test_middleware_counts_queries_on_the_async_path(self):
+        response = await self.async_client.get("/api/async/products/")
+        self.assertIn('desc="3 queries"', response["Server-Timing"])
+        response = await self.async_client.get("/api/products/")
+        self.assertIn("queries", response["Server-Timing"])
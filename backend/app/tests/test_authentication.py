@@ -0,0 +1,172 @@
+import pickle
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from app import authentication
+from app.models import Auth
+
+
+class JWTTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        authentication.blacklist.reset()
+        self.user = Auth.objects.create_user("jwt@example.com", "secret-pw")
+        self.client = APIClient()
+        # Writes (inside this test's transaction) and cancels the pending flush timer
+        self.addCleanup(authentication.last_logins.flush)
+
+    def obtain(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                "/api/auth/token/", {"email": "jwt@example.com", "password": "secret-pw"}, format="json",
+            )
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.data
+
+    def refresh(self, token):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post("/api/auth/token/refresh/", {"refresh": token}, format="json")
+
+
+class CachedUserTests(JWTTestCase):
+    def test_authenticated_requests_reuse_the_cached_user(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.obtain()['access']}")
+        self.assertEqual(self.client.get("/api/auth/user/").status_code, 200)
+
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/auth/user/")
+        self.assertEqual(response.data["email"], "jwt@example.com")
+
+    def test_cached_user_leaves_out_the_password_hash(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.obtain()['access']}")
+        self.client.get("/api/auth/user/")
+
+        cached = cache.get(authentication._user_key(self.user.pk))
+        self.assertEqual(cached.get_deferred_fields(), {"password"})
+        self.assertEqual((cached.email, cached.is_active, cached.is_staff), ("jwt@example.com", True, False))
+        self.assertNotIn(self.user.password.encode(), pickle.dumps(cached))
+
+    def test_revoked_token_is_rejected_without_caching_the_hash(self):
+        # simplejwt modules hold their own reference to api_settings, so patch the flag on it
+        with mock.patch.object(authentication.api_settings, "CHECK_REVOKE_TOKEN", True):
+            self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.obtain()['access']}")
+            self.assertEqual(self.client.get("/api/auth/user/").status_code, 200)
+            self.assertNotIn(self.user.password.encode(), pickle.dumps(cache.get(authentication._user_key(self.user.pk))))
+
+            with self.captureOnCommitCallbacks(execute=True):
+                self.user.set_password("changed-pw")
+                self.user.save()
+            self.assertEqual(self.client.get("/api/auth/user/").status_code, 401)
+
+    def test_user_changes_invalidate_the_cache(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.obtain()['access']}")
+        self.client.get("/api/auth/user/")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+
+        self.assertEqual(self.client.get("/api/auth/user/").status_code, 401)
+
+
+class BlacklistTests(JWTTestCase):
+    def test_rotated_refresh_token_is_rejected(self):
+        tokens = self.obtain()
+        response = self.refresh(tokens["refresh"])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.data["refresh"], tokens["refresh"])
+
+        self.assertEqual(self.refresh(tokens["refresh"]).status_code, 401)
+        verify = self.client.post("/api/auth/token/verify/", {"token": tokens["refresh"]}, format="json")
+        self.assertEqual(verify.status_code, 400)
+        self.assertEqual(self.refresh(response.data["refresh"]).status_code, 200)
+
+    def test_other_processes_learn_about_new_blacklist_entries(self):
+        tokens = self.obtain()
+        verify = lambda: self.client.post("/api/auth/token/verify/", {"token": tokens["refresh"]}, format="json")
+        self.assertEqual(verify().status_code, 200)
+
+        # Blacklisted elsewhere: only the row and the shared version stamp change here
+        with self.captureOnCommitCallbacks(execute=True):
+            BlacklistedToken.objects.create(token=OutstandingToken.objects.get())
+
+        self.assertEqual(verify().status_code, 400)
+
+    def test_verify_does_not_query_when_nothing_changed(self):
+        access = self.obtain()["access"]
+        self.client.post("/api/auth/token/verify/", {"token": access}, format="json")
+
+        with self.assertNumQueries(0):
+            response = self.client.post("/api/auth/token/verify/", {"token": access}, format="json")
+        self.assertEqual(response.status_code, 200)
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        bloom = authentication.BloomFilter(1000)
+        values = [f"jti-{index}" for index in range(1000)]
+        for value in values:
+            bloom.add(value)
+
+        self.assertTrue(all(value in bloom for value in values))
+        false_positives = sum(f"other-{index}" in bloom for index in range(10000))
+        self.assertLess(false_positives, 50)
+
+
+class LastLoginTests(JWTTestCase):
+    @override_settings(LAST_LOGIN_FLUSH_SECONDS=3600, LAST_LOGIN_BATCH_SIZE=100)
+    def test_logins_are_written_in_batches(self):
+        authentication.last_logins.flush()
+        other = Auth.objects.create_user("other@example.com", "secret-pw")
+        self.obtain()
+        authentication.last_logins.record(other.pk)
+        self.user.refresh_from_db()
+        self.assertIsNone(self.user.last_login)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(authentication.last_logins.flush(), 2)
+
+        self.assertEqual(Auth.objects.filter(last_login__isnull=False).count(), 2)
+
+    @override_settings(LAST_LOGIN_FLUSH_SECONDS=0)
+    def test_flush_interval(self):
+        self.obtain()
+        self.user.refresh_from_db()
+        self.assertIsNotNone(self.user.last_login)
+
+
+class LastLoginTimerTests(TransactionTestCase):
+    @override_settings(LAST_LOGIN_FLUSH_SECONDS=0.2, LAST_LOGIN_BATCH_SIZE=100)
+    def test_idle_process_flushes_without_another_login(self):
+        user = Auth.objects.create_user("idle@example.com", "secret-pw")
+        authentication.last_logins.flush()
+        authentication.last_logins.record(user.pk)
+        self.assertIsNone(Auth.objects.get(pk=user.pk).last_login)
+
+        deadline = time.monotonic() + 5
+        while Auth.objects.get(pk=user.pk).last_login is None and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertIsNotNone(Auth.objects.get(pk=user.pk).last_login)
+        self.assertIsNone(authentication.last_logins.timer)
+
+
+class PurgeExpiredTokensTests(JWTTestCase):
+    def test_purges_only_expired_tokens(self):
+        now = timezone.now()
+        for index, expires in enumerate([now - timedelta(days=1), now - timedelta(minutes=1), now + timedelta(days=1)]):
+            token = OutstandingToken.objects.create(jti=f"jti-{index}", token="", expires_at=expires, user=self.user)
+            BlacklistedToken.objects.create(token=token)
+
+        out = StringIO()
+        call_command("purge_expired_tokens", "--batch-size", "1", stdout=out)
+
+        self.assertIn("Purged 2", out.getvalue())
+        self.assertEqual(list(OutstandingToken.objects.values_list("jti", flat=True)), ["jti-2"])
+        self.assertEqual(BlacklistedToken.objects.count(), 1)
@@ -0,0 +1,68 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from app import benchmark
+
+
+def summary(rps=100.0, p95=10.0, p99=20.0, queries=3.0):
+    return {"throughput_rps": rps, "p95_ms": p95, "p99_ms": p99, "queries_per_request": queries}
+
+
+class RunnerSeedTests(SimpleTestCase):
+    def paths(self, seed, workers=3, steps=5):
+        config = benchmark.BenchmarkConfig(
+            base_url="", tokens=["t"], product_ids=list(range(1, 500)), categories=["fashion", "home"], seed=seed,
+        )
+        runner = benchmark.Runner(config)
+        with mock.patch.object(runner, "_request", side_effect=lambda method, path, *args: path):
+            return [runner.products_filtered(worker) for worker in range(workers) for _ in range(steps)]
+
+    def test_request_mix_follows_the_seed(self):
+        self.assertEqual(self.paths(7), self.paths(7))
+        self.assertNotEqual(self.paths(7), self.paths(8))
+
+    def test_each_scenario_restarts_the_streams(self):
+        config = benchmark.BenchmarkConfig(base_url="", tokens=["t"], product_ids=[1, 2, 3], categories=[],
+                                           concurrency=1, requests=4)
+        runner = benchmark.Runner(config)
+        paths = []
+
+        def request(method, path, *args):
+            paths.append(path)
+            return 200, 0.001, 1
+
+        with mock.patch.object(runner, "_request", side_effect=request):
+            runner.run("product_detail")
+            runner.run("product_detail")
+        self.assertEqual(paths[:4], paths[4:])
+
+
+class CompareTests(SimpleTestCase):
+    def regressions(self, before, after, threshold=10.0):
+        rows = benchmark.compare({"scenarios": {"products": before}}, {"scenarios": {"products": after}}, threshold)
+        return {metric: regressed for _, metric, _, _, _, regressed in rows}
+
+    def test_changes_within_threshold_pass(self):
+        self.assertEqual(set(self.regressions(summary(), summary(rps=91, p95=10.9, queries=3.3)).values()), {False})
+
+    def test_slower_or_chattier_beyond_threshold_regresses(self):
+        self.assertEqual(self.regressions(summary(), summary(rps=89, p95=11.5, p99=19, queries=4)), {
+            "throughput_rps": True, "p95_ms": True, "p99_ms": False, "queries_per_request": True,
+        })
+
+    def test_improvements_never_regress(self):
+        self.assertEqual(set(self.regressions(summary(), summary(rps=500, p95=1, p99=1, queries=1)).values()), {False})
+
+    def test_threshold_is_configurable(self):
+        self.assertTrue(self.regressions(summary(), summary(p95=10.6), threshold=5)["p95_ms"])
+        self.assertFalse(self.regressions(summary(), summary(p95=10.6), threshold=10)["p95_ms"])
+
+    def test_missing_values_are_skipped(self):
+        rows = benchmark.compare(
+            {"scenarios": {"products": summary(queries=None)}},
+            {"scenarios": {"products": summary(), "cart": summary()}},
+            10.0,
+        )
+        self.assertEqual([(name, metric) for name, metric, *_ in rows],
+                         [("products", "throughput_rps"), ("products", "p95_ms"), ("products", "p99_ms")])
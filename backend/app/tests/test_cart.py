@@ -0,0 +1,58 @@
+from decimal import Decimal
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from app.models import Auth, CartItem, Category, Product
+
+
+class CartBatchTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name="Fashion", slug="fashion")
+        self.user = Auth.objects.create_user("batch@example.com", "pw")
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+        self.shirt, self.hat, self.sold_out = (
+            Product.objects.create(name=name, price=Decimal(price), stock=5, category=category, available=available)
+            for name, price, available in (("Shirt", "10.00", True), ("Hat", "4.50", True), ("Boots", "60.00", False))
+        )
+
+    def batch(self, items, mode="add"):
+        return self.api.post("/api/cart/batch/", {"mode": mode, "items": items}, format="json")
+
+    def quantities(self):
+        return dict(CartItem.objects.filter(cart__user=self.user).values_list("product_id", "quantity"))
+
+    def test_add_merges_with_existing_lines(self):
+        self.api.post("/api/cart/add_item/", {"product_id": self.shirt.id, "quantity": 1}, format="json")
+        response = self.batch([
+            {"product_id": self.shirt.id, "quantity": 2},
+            {"product_id": self.hat.id, "quantity": 1},
+            {"product_id": self.hat.id, "quantity": 1},
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.quantities(), {self.shirt.id: 3, self.hat.id: 2})
+        self.assertEqual(response.data["summary"], {"line_count": 2, "item_count": 5, "total": "39.00"})
+
+    def test_set_replaces_and_removes(self):
+        self.batch([{"product_id": self.shirt.id, "quantity": 4}, {"product_id": self.hat.id, "quantity": 1}])
+        response = self.batch(
+            [{"product_id": self.shirt.id, "quantity": 1}, {"product_id": self.hat.id, "quantity": 0}], mode="set",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["removed"], [self.hat.id])
+        self.assertEqual(self.quantities(), {self.shirt.id: 1})
+
+    def test_unknown_or_unavailable_products_reject_the_whole_batch(self):
+        response = self.batch([
+            {"product_id": self.shirt.id, "quantity": 1},
+            {"product_id": self.sold_out.id, "quantity": 1},
+            {"product_id": 999999, "quantity": 1},
+        ])
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.data["product_ids"], [self.sold_out.id, 999999])
+        self.assertEqual(self.quantities(), {})
+
+    def test_add_rejects_zero_quantities(self):
+        response = self.batch([{"product_id": self.shirt.id, "quantity": 0}])
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,72 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from app import catalog_cache
+from app.models import Category, Product
+
+
+@override_settings(CATALOG_CACHE_TIMEOUT=300)
+class CatalogConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name="Fashion", slug="fashion")
+        self.product = Product.objects.create(
+            name="Shirt", description="", price=Decimal("10.00"), stock=5, category=self.category,
+        )
+
+    def test_list_revalidates_without_queries(self):
+        response = self.client.get("/api/products/?category=fashion")
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/products/?category=fashion", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get("/api/products/?category=fashion").status_code, 200)
+
+    def test_product_write_changes_etag(self):
+        etag = self.client.get("/api/products/")["ETag"]
+        detail_etag = self.client.get(f"/api/products/{self.product.pk}/")["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.name = "Linen shirt"
+            self.product.save()
+
+        response = self.client.get("/api/products/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.data["results"][0]["name"], "Linen shirt")
+        response = self.client.get(f"/api/products/{self.product.pk}/", HTTP_IF_NONE_MATCH=detail_etag)
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(CATALOG_CACHE_TIMEOUT=0)
+    def test_uncached_etag_follows_content(self):
+        etag = self.client.get("/api/products/")["ETag"]
+        self.assertEqual(self.client.get("/api/products/", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # A change that bumps no version still shows up once the page is rebuilt
+        Product.objects.filter(pk=self.product.pk).update(stock=4)
+        self.assertEqual(self.client.get("/api/products/", HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_category_list(self):
+        etag = self.client.get("/api/categories/")["ETag"]
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get("/api/categories/", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+
+class SharedCacheCheckTests(TestCase):
+    LOCMEM = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    SHARED = {"default": {"BACKEND": "django.core.cache.backends.db.DatabaseCache", "LOCATION": "cache"}}
+
+    def test_per_process_cache_fails_deploy_check(self):
+        with override_settings(CACHES=self.LOCMEM, CATALOG_CACHE_TIMEOUT=300):
+            self.assertEqual([error.id for error in catalog_cache.check_shared_cache()], ["app.E001"])
+        with override_settings(CACHES=self.LOCMEM, CATALOG_CACHE_TIMEOUT=0):
+            self.assertEqual(catalog_cache.check_shared_cache(), [])
+        with override_settings(CACHES=self.SHARED, CATALOG_CACHE_TIMEOUT=300):
+            self.assertEqual(catalog_cache.check_shared_cache(), [])
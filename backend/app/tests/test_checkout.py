@@ -0,0 +1,241 @@
+import logging
+import threading
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from app import catalog_cache
+from app.models import Auth, Cart, CartItem, Category, Order, OrderItem, Product
+from app.reservations import release_expired
+
+
+def make_product(category, stock, price="10.00", name="Product"):
+    return Product.objects.create(
+        name=name, description="", price=Decimal(price), stock=stock, category=category
+    )
+
+
+def fill_cart(user, lines):
+    cart, _ = Cart.objects.get_or_create(user=user)
+    for product, quantity in lines:
+        CartItem.objects.create(cart=cart, product=product, quantity=quantity)
+    return cart
+
+
+class CheckoutTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name="Fashion", slug="fashion")
+        self.user = Auth.objects.create_user("buyer@example.com", "pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_checkout_creates_lines_and_decrements_stock(self):
+        shirt = make_product(self.category, stock=5, price="20.00")
+        socks = make_product(self.category, stock=2, price="3.50")
+        fill_cart(self.user, [(shirt, 2), (socks, 2)])
+
+        response = self.client.post("/api/orders/", {}, format="json")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Decimal(response.data["total_amount"]), Decimal("47.00"))
+        self.assertEqual(len(response.data["items"]), 2)
+        shirt.refresh_from_db()
+        socks.refresh_from_db()
+        self.assertEqual((shirt.stock, shirt.available), (3, True))
+        self.assertEqual((socks.stock, socks.available), (0, False))
+        self.assertFalse(CartItem.objects.exists())
+
+    def test_catalog_version_only_moves_on_sell_out(self):
+        shirt = make_product(self.category, stock=5)
+        version = catalog_cache.get_version()
+
+        fill_cart(self.user, [(shirt, 2)])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.post("/api/orders/", {}, format="json").status_code, 201)
+        self.assertEqual(catalog_cache.get_version(), version)
+
+        fill_cart(self.user, [(shirt, 3)])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.post("/api/orders/", {}, format="json").status_code, 201)
+        self.assertGreater(catalog_cache.get_version(), version)
+
+    def test_insufficient_stock_rolls_back_everything(self):
+        plenty = make_product(self.category, stock=10)
+        scarce = make_product(self.category, stock=1, name="Scarce")
+        fill_cart(self.user, [(plenty, 3), (scarce, 2)])
+
+        response = self.client.post("/api/orders/", {}, format="json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(int(response.data["details"][0]["product_id"]), scarce.id)
+        self.assertEqual(int(response.data["details"][0]["available"]), 1)
+        plenty.refresh_from_db()
+        self.assertEqual(plenty.stock, 10)
+        self.assertFalse(Order.objects.exists())
+        self.assertEqual(CartItem.objects.count(), 2)
+
+    def test_only_short_products_are_reported(self):
+        # 4 >= 3, but would look short if stock were read after its own decrement
+        enough = make_product(self.category, stock=4)
+        scarce = make_product(self.category, stock=1, name="Scarce")
+        fill_cart(self.user, [(enough, 3), (scarce, 2)])
+
+        response = self.client.post("/api/orders/", {}, format="json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([int(detail["product_id"]) for detail in response.data["details"]], [scarce.id])
+
+    def test_query_count_does_not_grow_with_cart_size(self):
+        def checkout_queries(line_count):
+            fill_cart(self.user, [
+                (make_product(self.category, stock=5), 1) for _ in range(line_count)
+            ])
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.post("/api/orders/", {}, format="json")
+            self.assertEqual(response.status_code, 201)
+            return len(ctx)
+
+        self.assertEqual(checkout_queries(1), checkout_queries(8))
+
+    def test_empty_cart_is_rejected(self):
+        response = self.client.post("/api/orders/", {}, format="json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Order.objects.exists())
+
+
+@override_settings(STOCK_RESERVATIONS=True, STOCK_RESERVATION_TTL=600)
+class ReservationTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name="Fashion", slug="fashion")
+        self.product = make_product(self.category, stock=5, price="20.00")
+        self.user = Auth.objects.create_user("holder@example.com", "pw")
+        self.client = self.client_for(self.user)
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def add(self, quantity, client=None):
+        return (client or self.client).post(
+            "/api/cart/add_item/", {"product_id": self.product.id, "quantity": quantity}, format="json",
+        )
+
+    def stock(self):
+        self.product.refresh_from_db()
+        return self.product.stock
+
+    def test_add_to_cart_holds_stock(self):
+        self.assertEqual(self.add(2).status_code, 200)
+        self.assertEqual(self.add(1).status_code, 200)
+        self.assertEqual(self.stock(), 2)
+        self.assertEqual(CartItem.objects.get().reserved, 3)
+
+    def test_add_beyond_stock_is_rejected_without_holding(self):
+        self.add(4)
+        other = self.client_for(Auth.objects.create_user("late@example.com", "pw"))
+
+        response = self.add(2, other)
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data["details"], [{"product_id": self.product.id, "available": 1}])
+        self.assertEqual(self.stock(), 1)
+        self.assertFalse(CartItem.objects.filter(cart__user__email="late@example.com").exists())
+
+    def test_changing_or_removing_a_line_returns_stock(self):
+        self.add(4)
+        self.client.post("/api/cart/update_item/", {"product_id": self.product.id, "quantity": 1}, format="json")
+        self.assertEqual(self.stock(), 4)
+        self.client.post("/api/cart/update_item/", {"product_id": self.product.id, "quantity": 0}, format="json")
+        self.assertEqual(self.stock(), 5)
+
+    def test_checkout_converts_reservations(self):
+        self.add(5)
+        self.assertEqual(self.stock(), 0)
+
+        response = self.client.post("/api/orders/", {}, format="json")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.stock(), 0)
+        self.assertFalse(self.product.available)
+
+    def test_sweeper_releases_only_lapsed_reservations(self):
+        self.add(2)
+        call_command("release_reservations", stdout=StringIO())
+        self.assertEqual(self.stock(), 3)
+
+        self.assertEqual(release_expired(now=timezone.now() + timedelta(hours=1)), 1)
+        self.assertEqual(self.stock(), 5)
+        self.assertEqual(CartItem.objects.get().reserved, 0)
+
+    def test_checkout_takes_what_a_swept_reservation_gave_back(self):
+        self.add(2)
+        release_expired(now=timezone.now() + timedelta(hours=1))
+
+        response = self.client.post("/api/orders/", {}, format="json")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.stock(), 3)
+
+    def test_checkout_leaves_units_held_elsewhere_on_sale(self):
+        other = self.client_for(Auth.objects.create_user("other@example.com", "pw"))
+        self.add(2, other)
+        self.add(3)
+        self.assertEqual(self.client.post("/api/orders/", {}, format="json").status_code, 201)
+        self.assertEqual(self.stock(), 0)
+        self.assertTrue(self.product.available)
+
+        release_expired(now=timezone.now() + timedelta(hours=1))
+        self.assertEqual(self.stock(), 2)
+        late = self.client_for(Auth.objects.create_user("late@example.com", "pw"))
+        self.assertEqual(self.add(2, late).status_code, 200)
+        self.assertEqual(self.stock(), 0)
+
+
+class ConcurrentCheckoutTests(TransactionTestCase):
+    STOCK = 5
+    BUYERS = 12
+
+    def test_concurrent_checkouts_never_oversell(self):
+        category = Category.objects.create(name="Gaming", slug="gaming")
+        product = make_product(category, stock=self.STOCK)
+        users = [Auth.objects.create_user(f"buyer{i}@example.com", "pw") for i in range(self.BUYERS)]
+        for user in users:
+            fill_cart(user, [(product, 1)])
+
+        statuses = []
+        barrier = threading.Barrier(self.BUYERS)
+
+        def buy(user):
+            client = APIClient()
+            client.force_authenticate(user)
+            barrier.wait()
+            try:
+                statuses.append(client.post("/api/orders/", {}, format="json").status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=buy, args=(user,)) for user in users]
+        logging.disable(logging.CRITICAL)
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            logging.disable(logging.NOTSET)
+
+        product.refresh_from_db()
+        self.assertEqual(sorted(statuses), [201] * self.STOCK + [400] * (self.BUYERS - self.STOCK))
+        self.assertEqual(product.stock, 0)
+        self.assertFalse(product.available)
+        self.assertEqual(Order.objects.count(), self.STOCK)
+        self.assertEqual(sum(OrderItem.objects.values_list("quantity", flat=True)), self.STOCK)
@@ -0,0 +1,120 @@
+from unittest import mock
+
+import jwt
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from app import authentication, db_router
+from app.models import Auth, Cart, Product
+
+
+@override_settings(DATABASE_REPLICAS=["replica_1"], REPLICA_PIN_SECONDS=10)
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        db_router._down_until.clear()
+        self.router = db_router.ReplicaRouter()
+        self.factory = RequestFactory()
+        self.available = mock.patch.object(db_router, "_available", return_value=True)
+        self.available.start()
+        self.addCleanup(self.available.stop)
+
+    def serve(self, request, write=False, model=Product, session=None, user_id=None):
+        """
+        Run ``request`` through the middleware; returns the alias its reads of
+        ``model`` used. ``session`` is a new session cookie for the response and
+        ``user_id`` a login recorded by the view.
+        """
+        used = {}
+
+        def view(request):
+            if write:
+                self.router.db_for_write(Cart)
+            if user_id is not None:
+                db_router.record_identity(user_id)
+            used["read"] = self.router.db_for_read(model)
+            response = HttpResponse()
+            if session:
+                response.set_cookie(settings.SESSION_COOKIE_NAME, session)
+            return response
+
+        db_router.ReplicaRoutingMiddleware(view)(request)
+        return used["read"]
+
+    def get(self, token="a"):
+        return self.serve(self.factory.get("/api/products/", HTTP_AUTHORIZATION=f"Bearer {token}"))
+
+    def test_safe_requests_read_from_a_replica(self):
+        self.assertEqual(self.get(), "replica_1")
+
+    def test_reads_outside_requests_use_the_primary(self):
+        self.assertEqual(self.router.db_for_read(Product), "default")
+
+    def test_writes_go_to_the_primary_and_pin_the_client(self):
+        post = self.factory.post("/api/cart/add_item/", HTTP_AUTHORIZATION="Bearer a")
+        self.assertEqual(self.serve(post, write=True), "default")
+        self.assertEqual(self.get("a"), "default")
+        self.assertEqual(self.get("b"), "replica_1")
+
+    def test_reads_after_a_write_in_a_safe_request_use_the_primary(self):
+        self.assertEqual(self.serve(self.factory.get("/api/cart/"), write=True), "default")
+
+    def test_unavailable_replica_falls_back_to_the_primary(self):
+        self.available.stop()
+        # replica_1 is not a configured connection here, so connecting fails
+        with self.assertLogs("app.db_router", "WARNING"):
+            self.assertEqual(self.get(), "default")
+        self.assertIn("replica_1", db_router._down_until)
+        self.assertEqual(self.get(), "default")
+
+    def get_with_session(self, session):
+        request = self.factory.get("/")
+        request.COOKIES[settings.SESSION_COOKIE_NAME] = session
+        return self.serve(request)
+
+    def test_session_login_pins_the_new_session(self):
+        login = self.factory.post("/login/")
+        login.COOKIES[settings.SESSION_COOKIE_NAME] = "anonymous-session"
+        self.serve(login, write=True, session="logged-in-session")
+
+        self.assertEqual(self.get_with_session("logged-in-session"), "default")
+        self.assertEqual(self.get_with_session("anonymous-session"), "default")
+        self.assertEqual(self.get_with_session("someone-else"), "replica_1")
+
+    def test_token_login_pins_the_user(self):
+        self.serve(self.factory.post("/api/auth/token/"), write=True, user_id=7)
+
+        self.assertEqual(self.get(jwt.encode({"user_id": 7}, "secret")), "default")
+        self.assertEqual(self.get(jwt.encode({"user_id": 8}, "secret")), "replica_1")
+
+    def test_sessions_and_users_are_read_from_the_primary(self):
+        self.assertEqual(self.serve(self.factory.get("/"), model=Session), "default")
+        self.assertEqual(self.serve(self.factory.get("/"), model=Auth), "default")
+
+
+@override_settings(DATABASE_REPLICAS=["replica_1"], REPLICA_PIN_SECONDS=10)
+class LoginPinningTests(TestCase):
+    """Real login, then a read with the new token: no replica may be picked."""
+
+    def setUp(self):
+        cache.clear()
+        Auth.objects.create_user("reader@example.com", "pw")
+        self.addCleanup(authentication.last_logins.flush)
+        # The test database has no replica; record the choice and read from the primary
+        self.picks = mock.patch.object(db_router, "_pick_replica", return_value="default")
+        self.pick = self.picks.start()
+        self.addCleanup(self.picks.stop)
+
+    def test_token_login_then_get_reads_the_primary(self):
+        response = self.client.post(
+            "/api/auth/token/", {"email": "reader@example.com", "password": "pw"}, content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.client.get("/api/cart/", HTTP_AUTHORIZATION=f"Bearer {response.json()['access']}")
+        self.pick.assert_not_called()
+
+        self.client.get("/api/products/")
+        self.pick.assert_called()
@@ -0,0 +1,97 @@
+import csv
+import io
+import json
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from app.models import Auth, Category, Order, OrderItem, Product
+
+
+def body(response):
+    return b"".join(response.streaming_content).decode()
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.fashion = Category.objects.create(name="Fashion", slug="fashion")
+        self.home = Category.objects.create(name="Home", slug="home")
+        self.shirt = Product.objects.create(
+            sku="SH-1", name="Shirt", description="Cotton, blue", price=Decimal("19.90"), stock=5,
+            category=self.fashion,
+        )
+        self.mug = Product.objects.create(name="Mug", description="", price=Decimal("7.50"), category=self.home)
+
+        self.buyer = Auth.objects.create_user("buyer@example.com", "pw")
+        self.paid = Order.objects.create(user=self.buyer, total_amount=Decimal("47.30"), status="paid")
+        OrderItem.objects.create(order=self.paid, product=self.shirt, quantity=2, price=Decimal("19.90"))
+        OrderItem.objects.create(order=self.paid, product=self.mug, quantity=1, price=Decimal("7.50"))
+        self.old = Order.objects.create(user=self.buyer, total_amount=Decimal("7.50"), status="pending")
+        Order.objects.filter(pk=self.old.pk).update(created_at=timezone.now() - timedelta(days=10))
+
+        self.staff = Auth.objects.create_user("staff@example.com", "pw", is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def test_products_csv(self):
+        response = self.client.get("/api/export/products/", {"output": "csv"})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertIn("attachment", response["Content-Disposition"])
+
+        rows = list(csv.DictReader(io.StringIO(body(response))))
+        self.assertEqual([row["sku"] for row in rows], ["SH-1", ""])
+        self.assertEqual(rows[0]["description"], "Cotton, blue")
+        self.assertEqual((rows[0]["price"], rows[0]["category"]), ("19.90", "fashion"))
+
+    def test_products_filtered_by_category(self):
+        response = self.client.get("/api/export/products/", {"category": "home,books"})
+        rows = [json.loads(line) for line in body(response).splitlines()]
+        self.assertEqual([row["name"] for row in rows], ["Mug"])
+
+    def test_orders_jsonl_with_filters(self):
+        response = self.client.get("/api/export/orders/")
+        rows = [json.loads(line) for line in body(response).splitlines()]
+        self.assertEqual([row["id"] for row in rows], [self.paid.pk, self.old.pk])
+        self.assertEqual(
+            (rows[0]["user"], rows[0]["total_amount"], rows[0]["items"], rows[0]["units"]),
+            ("buyer@example.com", "47.30", 2, 3),
+        )
+        self.assertIsNone(rows[1]["units"])
+
+        since = (timezone.localdate() - timedelta(days=1)).isoformat()
+        response = self.client.get("/api/export/orders/", {"date_from": since, "status": "paid,shipped"})
+        self.assertEqual([json.loads(line)["id"] for line in body(response).splitlines()], [self.paid.pk])
+        response = self.client.get("/api/export/orders/", {"date_to": since})
+        self.assertEqual([json.loads(line)["id"] for line in body(response).splitlines()], [self.old.pk])
+
+    def test_invalid_params(self):
+        self.assertEqual(self.client.get("/api/export/orders/", {"date_from": "yesterday"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/export/orders/", {"output": "xlsx"}).status_code, 400)
+        # Well formed but impossible: parse_date/parse_datetime raise instead of returning None
+        self.assertEqual(self.client.get("/api/export/orders/", {"date_from": "2024-02-30"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/export/orders/", {"date_to": "2024-13-01T00:00"}).status_code, 400)
+
+    def test_staff_only(self):
+        client = APIClient()
+        client.force_authenticate(self.buyer)
+        self.assertEqual(client.get("/api/export/orders/").status_code, 403)
+
+    async def test_asgi_streams_asynchronously(self):
+        token = AccessToken.for_user(self.staff)
+        response = await self.async_client.get("/api/export/products/", headers={"Authorization": f"Bearer {token}"})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        lines = [json.loads(part) async for chunk in response.streaming_content for part in chunk.splitlines()]
+        self.assertEqual([row["name"] for row in lines], ["Shirt", "Mug"])
+
+    def test_command(self):
+        out = io.StringIO()
+        call_command("export", "orders", "--format", "csv", "--status", "pending", stdout=out)
+        rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+        self.assertEqual([int(row["id"]) for row in rows], [self.old.pk])
@@ -0,0 +1,33 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from app.models import DailySales, Order, Product, ProductSales
+
+
+class GenerateCatalogTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def generate(self, seed=7):
+        call_command(
+            "generate_catalog", "--products", "20", "--images-per-product", "0", "--users", "5",
+            "--carts", "2", "--orders", "5", "--seed", str(seed), stdout=StringIO(),
+        )
+
+    def test_rollups_cover_generated_orders(self):
+        self.generate()
+        self.assertEqual(Product.objects.count(), 20)
+        self.assertEqual(sum(DailySales.objects.values_list("orders", flat=True)), Order.objects.count())
+        self.assertTrue(ProductSales.objects.exists())
+
+    def test_rerunning_a_seed_is_refused_before_writing(self):
+        self.generate()
+        with self.assertRaisesMessage(CommandError, "--seed 7 already exists"):
+            self.generate()
+        self.assertEqual(Product.objects.count(), 20)
+
+        self.generate(seed=8)
+        self.assertEqual(Product.objects.count(), 40)
@@ -0,0 +1,127 @@
+import io
+import shutil
+import tempfile
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from PIL import Image
+from rest_framework.test import APIClient
+
+from app import images
+from app.models import Auth, Category, Product, ProductImage
+
+
+def image_bytes(size=(800, 400), mode="RGB", format="PNG", **info):
+    buffer = io.BytesIO()
+    Image.new(mode, size).save(buffer, format, **info)
+    return buffer.getvalue()
+
+
+def sizes(variants):
+    result = {}
+    for width, content in variants:
+        with Image.open(io.BytesIO(content)) as image:
+            result[width] = (image.format, image.size, image.mode)
+    return result
+
+
+class EncodeVariantsTests(TestCase):
+    def test_widths_up_to_the_original(self):
+        self.assertEqual(sizes(images.encode_variants(image_bytes((800, 400)))), {
+            160: ("WEBP", (160, 80), "RGB"),
+            320: ("WEBP", (320, 160), "RGB"),
+            640: ("WEBP", (640, 320), "RGB"),
+        })
+
+    def test_small_original_still_gets_a_thumbnail(self):
+        self.assertEqual(list(sizes(images.encode_variants(image_bytes((100, 50)))).items()), [
+            (160, ("WEBP", (160, 80), "RGB")),
+        ])
+
+    def test_source_modes(self):
+        cases = [
+            ("RGBA", image_bytes((320, 320), "RGBA"), "RGBA"),
+            ("palette", image_bytes((320, 320), "P"), "RGB"),
+            ("palette with transparency", image_bytes((320, 320), "P", transparency=0), "RGBA"),
+            ("CMYK", image_bytes((320, 320), "CMYK", format="JPEG"), "RGB"),
+        ]
+        for label, data, mode in cases:
+            with self.subTest(label):
+                variants = sizes(images.encode_variants(data))
+                self.assertEqual(list(variants), [160, 320])
+                self.assertEqual({variant[2] for variant in variants.values()}, {mode})
+
+
+@override_settings(IMAGE_VARIANT_WORKERS=0, CATALOG_CACHE_TIMEOUT=0)
+class GenerateVariantsTests(TestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        settings_override = override_settings(MEDIA_ROOT=media)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        # Encode inline even if another test already started the process pool
+        executor = mock.patch.object(images, "_executor", None)
+        executor.start()
+        self.addCleanup(executor.stop)
+
+        category = Category.objects.create(name="Fashion", slug="fashion")
+        self.product = Product.objects.create(name="Shirt", description="", price=Decimal("10.00"), category=category)
+
+    def make_image(self, data=None):
+        image = ProductImage(product=self.product)
+        image.image.save("photo.png", ContentFile(data or image_bytes((400, 200))))
+        return image
+
+    def test_variants_are_saved_and_recorded(self):
+        image = self.make_image()
+        self.assertEqual(images.generate_variants([image]), 1)
+
+        image.refresh_from_db()
+        self.assertEqual(list(image.variants), ["160", "320"])
+        for name in image.variants.values():
+            self.assertTrue(image.image.storage.exists(name))
+            self.assertTrue(name.endswith(".webp"))
+
+    def test_undecodable_image_is_skipped(self):
+        image = self.make_image(b"not an image")
+        self.assertEqual(images.generate_variants([image]), 0)
+        image.refresh_from_db()
+        self.assertEqual(image.variants, {})
+
+    def test_upload_serializes_srcset(self):
+        client = APIClient()
+        client.force_authenticate(Auth.objects.create_user("staff@example.com", "pw", is_staff=True))
+        upload = SimpleUploadedFile("photo.png", image_bytes((700, 700)), content_type="image/png")
+
+        response = client.post("/api/products/", {
+            "name": "Jacket", "description": "Denim", "price": "30.00", "stock": "5", "available": "true",
+            "category_slug": "fashion", "images": [upload],
+        }, format="multipart")
+
+        self.assertEqual(response.status_code, 201, response.data)
+        response = client.get(f"/api/products/{response.data['id']}/")
+        entries = response.data["image_srcset"].split(", ")
+        self.assertEqual([entry.rsplit(" ", 1)[1] for entry in entries], ["160w", "320w", "640w"])
+        self.assertTrue(all(entry.startswith("http://testserver/media/") for entry in entries))
+        self.assertEqual(response.data["images"][0]["srcset"], response.data["image_srcset"])
+
+    def test_backfill_skips_images_that_are_done(self):
+        done = self.make_image()
+        done.variants = {"160": "already/there.webp"}
+        done.save()
+        pending = self.make_image(image_bytes((200, 100)))
+
+        out = StringIO()
+        call_command("generate_image_variants", stdout=out)
+
+        done.refresh_from_db()
+        pending.refresh_from_db()
+        self.assertEqual(done.variants, {"160": "already/there.webp"})
+        self.assertEqual(list(pending.variants), ["160"])
+        self.assertIn("ProductImage: generated variants for 1 of 1 images.", out.getvalue())
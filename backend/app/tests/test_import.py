@@ -0,0 +1,106 @@
+import io
+import json
+import shutil
+import tempfile
+from decimal import Decimal
+from pathlib import Path
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from PIL import Image
+from rest_framework.test import APIClient
+
+from app.importer import ProductImporter
+from app.models import Auth, Category, Product, ProductImage
+
+CSV = """sku,name,description,price,stock,available,category,images
+SH-1,Shirt,Cotton,19.90,5,true,fashion,
+MUG-1,Mug,,7.50,,false,Home,
+"""
+
+
+class ProductImportTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        settings_override = override_settings(MEDIA_ROOT=self.media)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.image_root = Path(self.media) / "imports"
+        self.image_root.mkdir()
+        Image.new("RGB", (4, 4), "red").save(self.image_root / "red.png")
+
+    def run_import(self, text, format="csv", **kwargs):
+        kwargs.setdefault("image_root", self.image_root)
+        kwargs.setdefault("variants", False)
+        with self.captureOnCommitCallbacks(execute=True):
+            return ProductImporter(**kwargs).run(io.StringIO(text), format)
+
+    def test_csv_creates_then_updates_by_sku(self):
+        report = self.run_import(CSV)
+        self.assertEqual((report.created, report.updated, report.rejected_count), (2, 0, 0))
+        mug = Product.objects.get(sku="MUG-1")
+        self.assertEqual((mug.price, mug.stock, mug.available), (Decimal("7.50"), 0, False))
+        self.assertEqual(mug.category.slug, "home")
+
+        report = self.run_import("sku,name,price,category\nSH-1,Shirt v2,21.00,fashion\n")
+        self.assertEqual((report.created, report.updated), (0, 1))
+        self.assertEqual(Product.objects.count(), 2)
+        self.assertEqual(Product.objects.get(sku="SH-1").name, "Shirt v2")
+
+    def test_jsonl_rows_are_chunked_and_bad_rows_reported(self):
+        lines = [json.dumps({"sku": f"P-{i}", "name": f"Product {i}", "price": "1.00", "category": "gaming"})
+                 for i in range(5)]
+        lines.insert(2, "{not json")
+        lines.append(json.dumps({"sku": "P-X", "name": "Bad", "price": "-1", "category": "toys"}))
+        report = self.run_import("\n".join(lines) + "\n", format="jsonl", chunk_size=3)
+
+        self.assertEqual(report.created, 5)
+        self.assertEqual([chunk.rows for chunk in report.chunks], [3, 3, 1])
+        self.assertEqual([rejection["line"] for rejection in report.rejected], [3, 7])
+        self.assertEqual(set(report.rejected[1]["errors"]), {"price", "category"})
+        self.assertFalse(Product.objects.filter(sku="P-X").exists())
+
+    def test_images_are_attached_once(self):
+        text = "sku,name,price,category,images\nSH-1,Shirt,19.90,fashion,red.png\n"
+        self.assertEqual(self.run_import(text).images, 1)
+        self.assertEqual(self.run_import(text).images, 0)
+        self.assertEqual(ProductImage.objects.filter(product__sku="SH-1").count(), 1)
+
+    def test_image_outside_root_is_rejected(self):
+        outside = Path(self.media) / "secret.png"
+        Image.new("RGB", (4, 4)).save(outside)
+        report = self.run_import("sku,name,price,category,images\nSH-1,Shirt,19.90,fashion,../secret.png\n")
+        self.assertEqual(report.rejected_count, 1)
+        self.assertIn("images", report.rejected[0]["errors"])
+        self.assertFalse(Product.objects.exists())
+
+    def test_management_command(self):
+        path = Path(self.media) / "products.csv"
+        path.write_text(CSV)
+        out = io.StringIO()
+        call_command("import_products", str(path), "--no-variants", stdout=out)
+        self.assertIn("2 created", out.getvalue())
+        self.assertEqual(Product.objects.filter(sku__isnull=False).count(), 2)
+
+    def test_api_is_staff_only(self):
+        client = APIClient()
+        client.force_authenticate(Auth.objects.create_user("buyer@example.com", "pw"))
+        upload = SimpleUploadedFile("products.csv", CSV.encode())
+        self.assertEqual(client.post("/api/products/import/", {"file": upload}).status_code, 403)
+
+        client.force_authenticate(Auth.objects.create_user("staff@example.com", "pw", is_staff=True))
+        upload = SimpleUploadedFile("products.csv", CSV.encode())
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post("/api/products/import/", {"file": upload})
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual((response.data["created"], len(response.data["chunks"])), (2, 1))
+        self.assertTrue(Category.objects.filter(slug="home").exists())
+
+    def test_api_rejects_unknown_format(self):
+        client = APIClient()
+        client.force_authenticate(Auth.objects.create_user("staff@example.com", "pw", is_staff=True))
+        upload = SimpleUploadedFile("products.xlsx", b"")
+        self.assertEqual(client.post("/api/products/import/", {"file": upload}).status_code, 400)
@@ -0,0 +1,78 @@
+import re
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from app import catalog_cache, metrics
+from app.models import Auth, Category, Product
+
+SERVER_TIMING = re.compile(
+    r'db;dur=\d+\.\d\d;desc="(\d+) queries", app;dur=\d+\.\d\d, render;dur=\d+\.\d\d, total;dur=\d+\.\d\d'
+)
+
+
+def samples(text, name):
+    """{labels: value} for every sample of the metric ``name``."""
+    return {
+        labels: float(value)
+        for labels, value in re.findall(rf"^{re.escape(name)}\{{(.*)\}} (\S+)$", text, re.MULTILINE)
+    }
+
+
+@override_settings(CATALOG_CACHE_TIMEOUT=300)
+class MetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        metrics.registry.reset()
+        catalog_cache.stats.clear()
+        category = Category.objects.create(name="Fashion", slug="fashion")
+        Product.objects.create(name="Shirt", description="", price=Decimal("10.00"), stock=5, category=category)
+
+        self.staff = APIClient()
+        self.staff.force_authenticate(Auth.objects.create_user("staff@example.com", "pw", is_staff=True))
+
+    def scrape(self):
+        response = self.staff.get("/api/metrics/")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        return response.content.decode()
+
+    def test_staff_only(self):
+        self.assertIn(self.client.get("/api/metrics/").status_code, (401, 403))
+        customer = APIClient()
+        customer.force_authenticate(Auth.objects.create_user("buyer@example.com", "pw"))
+        self.assertEqual(customer.get("/api/metrics/").status_code, 403)
+
+    def test_prometheus_text(self):
+        self.client.get("/api/products/")  # cache miss
+        self.client.get("/api/products/")  # cache hit
+        text = self.scrape()
+
+        self.assertIn("# TYPE app_request_duration_seconds histogram", text)
+        buckets = [
+            value for labels, value in samples(text, "app_request_duration_seconds_bucket").items()
+            if labels.startswith('view="product-list"')
+        ]
+        self.assertEqual(len(buckets), len(metrics.LATENCY_BUCKETS) + 1)
+        self.assertEqual(buckets, sorted(buckets))
+        self.assertEqual(buckets[-1], 2)
+        self.assertEqual(samples(text, "app_request_duration_seconds_count")['view="product-list"'], 2)
+        self.assertGreater(samples(text, "app_request_duration_seconds_sum")['view="product-list"'], 0)
+
+        self.assertIn("# TYPE app_db_queries_total counter", text)
+        self.assertGreater(samples(text, "app_db_queries_total")['view="product-list"'], 0)
+        self.assertEqual(samples(text, "app_request_errors_total")['view="product-list"'], 0)
+        self.assertEqual(samples(text, "app_catalog_cache_requests_total"), {'result="hits"': 1, 'result="misses"': 1})
+
+    @override_settings(CATALOG_CACHE_TIMEOUT=0)
+    def test_server_timing_header(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/products/")
+        self.assertEqual(response.status_code, 200)
+        match = SERVER_TIMING.fullmatch(response["Server-Timing"])
+        self.assertIsNotNone(match, response["Server-Timing"])
+        self.assertEqual(int(match.group(1)), len(queries))
@@ -0,0 +1,39 @@
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from app.models import Category, Product
+
+
+@override_settings(CATALOG_CACHE_TIMEOUT=0)
+class CursorPaginationTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name="Fashion", slug="fashion")
+        # More than one page (PAGE_SIZE = 12), all created in the same instant
+        self.ids = [
+            Product.objects.create(name=f"Shirt {index}", description="", price=Decimal("10.00"), category=category).pk
+            for index in range(30)
+        ]
+        Product.objects.update(created_at=timezone.now())
+
+    def walk(self, url, link):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(product["id"] for product in response.data["results"])
+            last, url = response, response.data[link]
+        return ids, last
+
+    def test_equal_timestamps_across_page_boundaries(self):
+        ids, last_page = self.walk("/api/products/?pagination=cursor", "next")
+        self.assertEqual(ids, sorted(self.ids, reverse=True))
+
+        # Walking back from the last page visits every earlier row once
+        earlier, _ = self.walk(last_page.data["previous"], "previous")
+        last_ids = [product["id"] for product in last_page.data["results"]]
+        self.assertEqual(sorted(earlier + last_ids), sorted(self.ids))
+
+    def test_malformed_cursor(self):
+        self.assertEqual(self.client.get("/api/products/?cursor=bogus").status_code, 404)
@@ -0,0 +1,205 @@
+import unittest
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from app import views
+from app.models import (
+    Auth, Cart, CartItem, Category, Item, ItemImage, Order, OrderItem, Product, ProductImage,
+)
+
+
+def count_queries(func):
+    with CaptureQueriesContext(connection) as ctx:
+        response = func()
+    return response, len(ctx)
+
+
+@override_settings(CATALOG_CACHE_TIMEOUT=0, SHOP_CACHE_TIMEOUT=0)
+class QueryBudgetTestCase(TestCase):
+    """Each endpoint must issue the same number of queries for small and large result sets."""
+
+    def setUp(self):
+        self.category = Category.objects.create(name="Fashion", slug="fashion")
+        self.user = Auth.objects.create_user("budget@example.com", "pw")
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+        self.created = 0
+
+    def make_products(self, count, images=2, **extra):
+        products = []
+        for _ in range(count):
+            self.created += 1
+            product = Product.objects.create(
+                name=f"Shirt {self.created}", description="cotton shirt", price=Decimal("9.99"),
+                stock=100, category=self.category, **extra,
+            )
+            for _ in range(images):
+                ProductImage.objects.create(product=product, image="blank_image.png")
+            products.append(product)
+        return products
+
+    def make_items(self, count, images=2):
+        for index in range(count):
+            item = Item.objects.create(
+                user=self.user, name=f"Item {self.created}-{index}", description="legacy item",
+                price=Decimal("5.99"), quantity=1, category="fashion",
+            )
+            for _ in range(images):
+                ItemImage.objects.create(item=item, image="blank_image.png")
+        self.created += 1
+
+    def assertConstantQueries(self, request, grow, small=1, large=40):
+        """Measure ``request`` after growing the data set to ``small`` and then ``large`` rows."""
+        grow(small)
+        response, small_count = count_queries(request)
+        self.assertEqual(response.status_code, 200)
+        grow(large - small)
+        response, large_count = count_queries(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            small_count, large_count,
+            f"query count grew from {small_count} to {large_count} with more rows (N+1?)",
+        )
+        return large_count
+
+
+class ApiQueryBudgetTests(QueryBudgetTestCase):
+    def test_product_list(self):
+        queries = self.assertConstantQueries(lambda: self.api.get("/api/products/"), self.make_products, 1, 100)
+        self.assertLessEqual(queries, 4)
+
+    def test_product_list_with_filters_and_search(self):
+        url = "/api/products/?category=fashion&search=shir&min_price=1&max_price=50"
+        self.assertConstantQueries(lambda: self.api.get(url), self.make_products, 1, 100)
+
+    def test_product_list_cursor_pagination(self):
+        self.assertConstantQueries(lambda: self.api.get("/api/products/?pagination=cursor"), self.make_products)
+
+    def test_product_detail(self):
+        product = self.make_products(1, images=1)[0]
+        grow = lambda n: [ProductImage.objects.create(product=product, image="blank_image.png") for _ in range(n)]
+        self.assertConstantQueries(lambda: self.api.get(f"/api/products/{product.id}/"), grow, 1, 20)
+
+    def test_category_list(self):
+        self.make_products(1)
+        response, queries = count_queries(lambda: self.api.get("/api/categories/"))
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(queries, 3)
+
+    def test_cart(self):
+        cart = Cart.objects.create(user=self.user)
+
+        def grow(count):
+            for product in self.make_products(count):
+                CartItem.objects.create(cart=cart, product=product, quantity=2)
+
+        self.assertConstantQueries(lambda: self.api.get("/api/cart/"), grow, 1, 50)
+
+    def test_cart_batch(self):
+        Cart.objects.create(user=self.user)
+        products = []
+
+        def batch():
+            items = [{"product_id": product.id, "quantity": 1} for product in products]
+            return self.api.post("/api/cart/batch/", {"items": items}, format="json")
+
+        queries = self.assertConstantQueries(batch, lambda n: products.extend(self.make_products(n, images=0)), 1, 50)
+        self.assertLessEqual(queries, 7)
+
+    def test_order_list_and_detail(self):
+        orders = []
+
+        def grow(count):
+            for _ in range(count):
+                order = Order.objects.create(user=self.user, total_amount=Decimal("30.00"))
+                for product in self.make_products(3):
+                    OrderItem.objects.create(order=order, product=product, quantity=1, price=product.price)
+                orders.append(order)
+
+        self.assertConstantQueries(lambda: self.api.get("/api/orders/"), grow, 1, 12)
+        response, queries = count_queries(lambda: self.api.get(f"/api/orders/{orders[0].id}/"))
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(queries, 5)
+
+
+class HtmlQueryBudgetTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def test_home(self):
+        self.assertConstantQueries(lambda: self.client.get("/"), self.make_items, 1, 30)
+
+    def test_shop(self):
+        self.assertConstantQueries(lambda: self.client.get("/Shop/"), self.make_items, 1, 30)
+
+    def test_shop_search(self):
+        self.assertConstantQueries(lambda: self.client.get("/Shop/?q=item"), self.make_items, 1, 30)
+
+    def test_category(self):
+        self.assertConstantQueries(lambda: self.client.get("/category/fashion/"), self.make_items, 1, 30)
+
+    def test_listing_pages_are_bounded(self):
+        self.make_items(30)
+        response = self.client.get("/Shop/?page=2")
+        self.assertEqual(len(response.context["items"]), 30 - views.ITEMS_PER_PAGE)
+        self.assertContains(response, "Page 2 of 2")
+        # Display-name links ("Fashion") match the lowercase stored category
+        self.assertEqual(len(self.client.get("/category/Fashion/").context["items"]), views.ITEMS_PER_PAGE)
+
+
+@unittest.skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN output is SQLite specific")
+class QueryPlanTests(TestCase):
+    """Catalog queries must be answered from an index, not a full table scan or a sort."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name="Fashion", slug="fashion")
+        cls.user = Auth.objects.create_user("plans@example.com", "pw")
+
+    def plan(self, queryset):
+        return queryset.explain()
+
+    def assertUsesIndex(self, queryset, table, allow_sort=False):
+        plan = self.plan(queryset)
+        for line in plan.splitlines():
+            detail = line.split(" ", 3)[-1] if line[:1].isdigit() else line.strip()
+            self.assertFalse(
+                detail.startswith(f"SCAN {table}") and "USING" not in detail,
+                f"full scan of {table}:\n{plan}",
+            )
+        if not allow_sort:
+            self.assertNotIn("USE TEMP B-TREE FOR ORDER BY", plan, f"sort without index:\n{plan}")
+
+    def test_product_listing(self):
+        self.assertUsesIndex(Product.objects.filter(available=True).order_by("-created_at", "-id"), "app_product")
+
+    def test_product_listing_by_category(self):
+        queryset = Product.objects.filter(available=True, category__slug="fashion").order_by("-created_at", "-id")
+        self.assertUsesIndex(queryset, "app_product")
+
+    def test_product_price_range(self):
+        queryset = Product.objects.filter(available=True, price__gte=10, price__lte=20)
+        self.assertUsesIndex(queryset, "app_product")
+
+    def test_order_history(self):
+        self.assertUsesIndex(Order.objects.filter(user=self.user).order_by("-created_at", "-id"), "app_order")
+
+    def test_cart_lines(self):
+        self.assertUsesIndex(CartItem.objects.filter(cart_id=1), "app_cartitem")
+
+    def test_cart_line_lookup(self):
+        self.assertUsesIndex(CartItem.objects.filter(cart_id=1, product_id=2), "app_cartitem")
+
+    def test_product_images(self):
+        self.assertUsesIndex(ProductImage.objects.filter(product_id__in=[1, 2, 3]), "app_productimage")
+
+    def test_item_category(self):
+        self.assertUsesIndex(Item.objects.filter(category="fashion").order_by("-id"), "app_item")
+
+    def test_item_by_name(self):
+        self.assertUsesIndex(Item.objects.filter(name="Lamp"), "app_item")
@@ -0,0 +1,57 @@
+import unittest
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from app import search
+from app.models import Category, Product
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="Fashion", slug="fashion")
+
+        def product(name, description=""):
+            return Product.objects.create(name=name, description=description, price=Decimal("10.00"), category=category)
+
+        cls.in_name = product("Blue Shirt", "Cotton")
+        cls.in_description = product("Jacket", "Goes with any shirt")
+        cls.other_order = product("Shirt Blue", "Linen")
+        cls.unrelated = product("Mug", "Ceramic")
+
+    def names(self, term):
+        return [p.name for p in search.search(Product.objects.all(), term).order_by("search_rank", "id")]
+
+    def test_name_matches_rank_first(self):
+        self.assertEqual(self.names("shirt"), ["Blue Shirt", "Shirt Blue", "Jacket"])
+
+    def test_words_are_prefix_matched_and_all_required(self):
+        self.assertEqual(self.names("shi"), ["Blue Shirt", "Shirt Blue", "Jacket"])
+        self.assertEqual(self.names("blu shi"), ["Blue Shirt", "Shirt Blue"])
+        self.assertEqual(self.names("shirt ceramic"), [])
+
+    def test_quoted_phrase(self):
+        self.assertEqual(self.names('"blue shirt"'), ["Blue Shirt"])
+        self.assertEqual(self.names('"blue shi"'), ["Blue Shirt"])
+
+    def test_query_syntax_is_matched_as_words(self):
+        for term in ['shirt"', 'shirt OR mug', "NEAR(shirt", "shirt*:^-", '"', "*"]:
+            with self.subTest(term=term):
+                # No OperationalError from FTS5 syntax; operators are plain words that must match
+                self.names(term)
+        self.assertEqual(self.names("shirt*:^-"), ["Blue Shirt", "Shirt Blue", "Jacket"])
+        self.assertEqual(self.names("shirt OR mug"), [])
+
+    @unittest.skipUnless(connection.vendor == "sqlite", "FTS5 MATCH is SQLite specific")
+    def test_ranked_page_runs_match_once(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/products/?search=shirt")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 3)
+        searches = [query["sql"] for query in queries if "MATCH" in query["sql"]]
+        self.assertTrue(searches)
+        for sql in searches:
+            self.assertEqual(sql.count("MATCH"), 1, sql)
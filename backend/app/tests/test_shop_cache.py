@@ -0,0 +1,64 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+
+from app.models import Auth, Item, ItemImage, Specification
+
+
+class ShopCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = Auth.objects.create_user("shop@example.com", "pw")
+        self.item = self.make_item("Linen shirt", "fashion")
+
+    def make_item(self, name, category):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Item.objects.create(
+                user=self.user, name=name, description="summer", price=Decimal("19.99"), quantity=3, category=category,
+            )
+
+    def get(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, len(ctx)
+
+    def test_cached_listing_runs_no_queries(self):
+        self.get("/Shop/")
+        response, queries = self.get("/Shop/")
+        self.assertContains(response, "Linen shirt")
+        self.assertEqual(queries, 0)
+
+    def test_item_write_invalidates_shop_and_both_category_pages(self):
+        self.get("/Shop/")
+        self.get("/category/Fashion/")
+        self.get("/category/Home/")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.item.name = "Linen cushion"
+            self.item.category = "home"
+            self.item.save()
+
+        self.assertContains(self.get("/Shop/")[0], "Linen cushion")
+        self.assertNotContains(self.get("/category/Fashion/")[0], "Linen")
+        self.assertContains(self.get("/category/Home/")[0], "Linen cushion")
+
+    def test_other_categories_stay_cached(self):
+        self.get("/category/Home/")
+        self.make_item("Desk lamp", "electronics")
+        self.assertEqual(self.get("/category/Home/")[1], 0)
+
+    def test_image_and_specification_writes_refresh_item_fragments(self):
+        url = f"/item/{self.item.pk}/"
+        self.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Specification.objects.create(item=self.item, key="Fabric", value="Linen")
+            ItemImage.objects.create(item=self.item, image="blank_image.png")
+
+        response, _ = self.get(url)
+        self.assertContains(response, "Fabric: Linen")
+        self.assertContains(response, "/media/blank_image.png")
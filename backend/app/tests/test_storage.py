@@ -0,0 +1,82 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from app import storage
+from app.models import MediaBlob
+
+
+class ContentAddressedStorageTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        settings_override = override_settings(MEDIA_ROOT=self.media)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def save(self, data, name="products/photo.png"):
+        return default_storage.save(name, ContentFile(data))
+
+    def refs(self, name):
+        return MediaBlob.objects.get(name=name).ref_count
+
+    def gc(self):
+        call_command("gc_media", stdout=StringIO())
+
+    def test_identical_content_is_stored_once(self):
+        first = self.save(b"same bytes")
+        second = self.save(b"same bytes", name="products/other.png")
+        self.assertEqual(first, second)
+        self.assertEqual(self.refs(first), 2)
+        self.assertEqual(len(os.listdir(os.path.dirname(default_storage.path(first)))), 1)
+        self.assertEqual(os.listdir(default_storage.path("tmp")), [])
+
+    def test_delete_releases_one_reference(self):
+        name = self.save(b"bytes")
+        self.save(b"bytes")
+        default_storage.delete(name)
+        self.assertEqual(self.refs(name), 1)
+        self.assertTrue(default_storage.exists(name))
+
+    def test_gc_only_removes_unreferenced_blobs(self):
+        kept = self.save(b"kept")
+        dropped = self.save(b"dropped")
+        default_storage.delete(dropped)
+
+        self.gc()
+        self.assertTrue(default_storage.exists(kept))
+        self.assertEqual(self.refs(kept), 1)
+        self.assertFalse(default_storage.exists(dropped))
+        self.assertFalse(MediaBlob.objects.filter(name=dropped).exists())
+
+    def test_reupload_after_gc_restores_the_file(self):
+        name = self.save(b"bytes")
+        default_storage.delete(name)
+        self.gc()
+
+        self.assertEqual(self.save(b"bytes"), name)
+        self.assertTrue(default_storage.exists(name))
+        self.assertEqual(self.refs(name), 1)
+
+    def test_gc_racing_a_reupload_does_not_lose_the_file(self):
+        name = self.save(b"bytes")
+        default_storage.delete(name)
+        add_reference = storage.add_reference
+
+        def collect_first(*args):
+            # gc_media collects the unreferenced blob just before the upload references it
+            self.gc()
+            add_reference(*args)
+
+        with mock.patch.object(storage, "add_reference", collect_first):
+            self.assertEqual(self.save(b"bytes"), name)
+        with default_storage.open(name) as fh:
+            self.assertEqual(fh.read(), b"bytes")
+        self.assertEqual(self.refs(name), 1)
@@ -9,14 +9,30 @@ from django.db.models import Q
 from django.contrib.auth.decorators import login_required
 from .data import popular_items, Cart_items
 from django.core.paginator import Paginator
+from django.utils.functional import SimpleLazyObject
+from django.views.decorators.cache import cache_page
+from django.conf import settings
 from .form import ItemForm
+from . import search, shop_cache
+from .images import generate_variants
 from decimal import Decimal, InvalidOperation
 
+ITEMS_PER_PAGE = 24
+
+def paginate_items(request, queryset):
+    """
+    One page of ``queryset`` with images prefetched: a count plus two queries.
+    The page is built lazily, so it costs nothing when the template serves the
+    listing from its fragment cache.
+    """
+    page = SimpleLazyObject(
+        lambda: Paginator(queryset.with_images(), ITEMS_PER_PAGE).get_page(request.GET.get('page'))
+    )
+    return {'items': page, 'page_obj': page}
+
 @login_required(login_url='login_page')
 def home(request):
-    context = {
-        'items': Item.objects.all()    
-    }
+    context = paginate_items(request, Item.objects.order_by('-id'))
     return render(request, 'home.html', context)
 
 def signup_page(request):
@@ -71,16 +87,20 @@ def Cart(request):
     return render(request, "cart.html", context)
 
 def Deals(request):
-    return render(request, "Deals.html")
+    return render(request, "Deals.html", {'fragment_timeout': shop_cache.timeout()})
 
 def item_view(request, pk):  # Fixed function name to match URL pattern
-    item = get_object_or_404(Item.objects.prefetch_related("images"), pk=pk)
+    item = get_object_or_404(Item, pk=pk)
     context = {
         'item': item,
-        'images': item.images.all(),
+        # Only loaded when the cached image fragment (keyed on updated_at) misses
+        'images': SimpleLazyObject(lambda: list(item.images.order_by('id'))),
+        'fragment_timeout': shop_cache.timeout(),
     }
     return render(request, "item.html", context)
 
+# Static pages without per-user content are cached whole
+@cache_page(getattr(settings, 'SHOP_CACHE_TIMEOUT', 3600))
 def Contact(request):
     return render(request, "Contacting.html")
 
@@ -89,14 +109,9 @@ def Shop(request):  # Fixed function name to match URL pattern
     qs = Item.objects.all().order_by('-id')
 
     if q:
-        qs = qs.filter(
-            Q(name__icontains=q) |
-            Q(description__icontains=q)
-        )
+        qs = search.search(qs, q).order_by('search_rank', '-id')
 
-    context = {
-        'items': qs,
-    }
+    context = {**paginate_items(request, qs), **shop_cache.listing_context('all')}
     return render(request, "products.html", context)
 
 @login_required
@@ -175,8 +190,10 @@ def add_item(request):
             )
 
             # Save multiple images
-            for img in request.FILES.getlist("images"):
+            generate_variants([
                 ItemImage.objects.create(item=new_item, image=img)
+                for img in request.FILES.getlist("images")
+            ])
                 
             for k, v in zip(keys, values):
                 if k.strip() and v.strip():
@@ -198,6 +215,7 @@ def Item_Auth(name):
     except ObjectDoesNotExist:
         return name  # Item doesn't exist
 
+@cache_page(getattr(settings, 'SHOP_CACHE_TIMEOUT', 3600))
 def PrivacyPolicy(request):
     return render(request, "policydownload.html")    
 
@@ -205,9 +223,11 @@ def ContactPage(request):
     return render(request, "ContactPage.html") 
 
 def category(request, category_name):
-    items = Item.objects.filter(category=category_name)
+    # Links use the display name ("Fashion"); rows store the lowercase key
+    items = Item.objects.filter(category=category_name.lower()).order_by('-id')
     context = {
-        "items": items,
+        **paginate_items(request, items),
+        **shop_cache.listing_context(f"category:{category_name.lower()}"),
         "category": category_name,
     }
     return render(request, "category.html", context)
@@ -253,8 +273,10 @@ def edit_item(request, pk):
             edited_item.save()
 
             # Handle new images
-            for img in request.FILES.getlist("images"):
+            generate_variants([
                 ItemImage.objects.create(item=edited_item, image=img)
+                for img in request.FILES.getlist("images")
+            ])
 
             # Update specifications
             Specification.objects.filter(item=edited_item).delete()
@@ -0,0 +1,8 @@
+import { apiClient } from './fetcher';
+
+// Staff-only sales rollups, computed on the server instead of from every order
+export const analyticsAPI = {
+  getSummary(days = 30, limit = 10) {
+    return apiClient.get(`/analytics/summary/?days=${days}&limit=${limit}`);
+  }
+};
@@ -6,11 +6,21 @@ export const cartAPI = {
     return apiClient.get('/cart/');
   },
 
+  // Get cached cart summary (line count, item count, total) for the header badge
+  getCartSummary() {
+    return apiClient.get('/cart/summary/');
+  },
+
   // Add item to cart
   addToCart(productId, quantity = 1) {
     return apiClient.post('/cart/add_item/', { product_id: productId, quantity });
   },
 
+  // Add or set many items in one request; lines is [{ product_id, quantity }], mode is 'add' or 'set'
+  batchUpdateCart(lines, mode = 'add') {
+    return apiClient.post('/cart/batch/', { mode, items: lines });
+  },
+
   // Update cart item quantity
   updateCartItem(productId, quantity) {
     return apiClient.post('/cart/update_item/', { product_id: productId, quantity });
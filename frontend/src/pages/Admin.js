@@ -3,6 +3,7 @@ import { useNavigate } from 'react-router-dom';
 import { useAuth } from '../context/AuthContext';
 import { productsAPI } from '../api/products';
 import { ordersAPI } from '../api/orders';
+import { analyticsAPI } from '../api/analytics';
 import './Admin.css';
 import DataInsights from './DataInsights';
 
@@ -15,6 +16,7 @@ const Admin = () => {
   const [products, setProducts] = useState([]);
   const [orders, setOrders] = useState([]);
   const [categories, setCategories] = useState([]);
+  const [analytics, setAnalytics] = useState(null);
   const [activeTab, setActiveTab] = useState('products');
   const [query, setQuery] = useState('');
   const [viewMode, setViewMode] = useState('tables'); // 'tables' or 'insights'
@@ -27,14 +29,17 @@ const Admin = () => {
     }
     const loadAll = async () => {
       try {
-        const [p, o, c] = await Promise.all([
+        const [p, o, c, a] = await Promise.all([
           productsAPI.getProducts().catch(() => []),
           ordersAPI.getOrders().catch(() => []),
           productsAPI.getCategories().catch(() => []),
+          // Non-staff users get 403 and fall back to the loaded orders
+          analyticsAPI.getSummary().catch(() => null),
         ]);
         setProducts(p.results || p);
         setOrders(o.results || o);
         setCategories(c.results || c);
+        setAnalytics(a);
       } catch (err) {
         setError('Failed to load admin data');
       } finally {
@@ -62,11 +67,15 @@ const Admin = () => {
   );
 
   // Calculate insights
-  const totalRevenue = orders.reduce((sum, o) => sum + (Number(o.total_amount) || 0), 0);
+  const statusRows = analytics ? analytics.by_status : [];
+  const ordersWithStatus = (status) => statusRows.find(row => row.status === status)?.orders || 0;
+  const totalRevenue = analytics
+    ? statusRows.reduce((sum, row) => sum + Number(row.revenue), 0)
+    : orders.reduce((sum, o) => sum + (Number(o.total_amount) || 0), 0);
   const totalProducts = products.length;
   const lowStockProducts = products.filter(p => p.stock < 10).length;
-  const pendingOrders = orders.filter(o => o.status === 'pending').length;
-  const completedOrders = orders.filter(o => o.status === 'completed').length;
+  const pendingOrders = analytics ? ordersWithStatus('pending') : orders.filter(o => o.status === 'pending').length;
+  const completedOrders = analytics ? ordersWithStatus('completed') : orders.filter(o => o.status === 'completed').length;
 
   if (loading) return <div className="admin-page"><div className="loading">Loading admin data...</div></div>;
   if (error) return <div className="admin-page"><div className="error">{error}</div></div>;
@@ -203,6 +212,7 @@ const Admin = () => {
             products={products}
             orders={orders}
             categories={categories}
+            analytics={analytics}
           />
         </>
       )}
@@ -16,7 +16,29 @@ import {
   PolarRadiusAxis // Add PolarRadiusAxis
 } from 'recharts';
 
-const DataInsights = ({ products = [], orders = [], categories = [] }) => {
+// Same buckets the client-side grouping below uses
+const statusBucket = (value) => {
+  const status = value ? value.toString().toLowerCase() : 'pending';
+  if (status.includes('complete') || status.includes('deliver')) return 'Completed';
+  if (status.includes('process') || status.includes('confirm')) return 'Processing';
+  if (status.includes('cancel') || status.includes('refund')) return 'Cancelled';
+  if (status.includes('ship')) return 'Shipped';
+  return 'Pending';
+};
+
+// Sum /api/analytics/ by_status rows into the chart buckets
+const bucketStatusRows = (rows, field) => {
+  const totals = {};
+  rows.forEach(row => {
+    const key = statusBucket(row.status);
+    totals[key] = (totals[key] || 0) + Number(row[field]);
+  });
+  return totals;
+};
+
+// `analytics` is the server-side summary from /api/analytics/summary/ (staff only);
+// when it is present the order charts use it instead of grouping `orders` here.
+const DataInsights = ({ products = [], orders = [], categories = [], analytics = null }) => {
 // Demo revenue data for line chart
 const demoRevenueData = [
   { date: 'Jan 1', revenue: 1200, avgOrderValue: 85, orders: 14 },
@@ -54,6 +76,14 @@ const spiderData = [
 
   // 1. Process Revenue Over Time Data with Average Order Value
   const revenueData = useMemo(() => {
+    if (analytics) {
+      return analytics.daily.map(day => ({
+        date: new Date(`${day.date}T00:00:00`).toLocaleDateString('en-US', { month: 'short', day: 'numeric' }),
+        revenue: Number(day.revenue),
+        avgOrderValue: Number(day.avg_order_value),
+        orders: day.orders
+      }));
+    }
     if (!orders || orders.length === 0) {
       console.log('No orders data for revenue chart');
       // Return sample data for demo
@@ -106,7 +136,7 @@ const spiderData = [
     return result.length > 0 ? result : [
       { date: 'Today', revenue: 0, avgOrderValue: 0, orders: 0 }
     ];
-  }, [orders]);
+  }, [orders, analytics]);
 
     // 2. Process Products by Category Data
     const categoryData = useMemo(() => {
@@ -172,6 +202,11 @@ const spiderData = [
     }, [products]);
   // 3. Process Order Status Distribution
   const orderStatusData = useMemo(() => {
+    if (analytics) {
+      const result = Object.entries(bucketStatusRows(analytics.by_status, 'orders'))
+        .map(([status, count]) => ({ status, count }));
+      return result.length > 0 ? result : [{ status: 'No Data', count: 1 }];
+    }
     if (!orders || orders.length === 0) {
       console.log('No orders data for status chart');
       // Return sample data for demo
@@ -212,7 +247,7 @@ const spiderData = [
     
     console.log('Processed Order Status Data:', result);
     return result.length > 0 ? result : [{ status: 'No Data', count: 1 }];
-  }, [orders]);
+  }, [orders, analytics]);
 
   // 4. Process Stock Levels Data
   const stockLevelsData = useMemo(() => {
@@ -278,6 +313,10 @@ const spiderData = [
 
   // 6. Process Revenue by Category
   const revenueByCategoryData = useMemo(() => {
+    if (analytics) {
+      const result = analytics.categories.map(row => ({ category: row.name, revenue: Number(row.revenue) }));
+      return result.length > 0 ? result : [{ category: 'No Revenue Data', revenue: 0 }];
+    }
     if (!orders || orders.length === 0 || !products || products.length === 0) {
       return [
         { category: 'No Data', revenue: 0 }
@@ -311,10 +350,15 @@ const spiderData = [
       .sort((a, b) => b.revenue - a.revenue);
 
     return result.length > 0 ? result : [{ category: 'No Revenue Data', revenue: 0 }];
-  }, [orders, products]);
+  }, [orders, products, analytics]);
 
   // 7. Process Revenue by Status
   const revenueByStatusData = useMemo(() => {
+    if (analytics) {
+      const result = Object.entries(bucketStatusRows(analytics.by_status, 'revenue'))
+        .map(([status, revenue]) => ({ status, revenue: Number(revenue.toFixed(2)) }));
+      return result.length > 0 ? result : [{ status: 'No Data', revenue: 0 }];
+    }
     if (!orders || orders.length === 0) {
       return [
         { status: 'No Data', revenue: 0 }
@@ -344,7 +388,7 @@ const spiderData = [
       }));
 
     return result.length > 0 ? result : [{ status: 'No Data', revenue: 0 }];
-  }, [orders]);
+  }, [orders, analytics]);
 
   // ============================================
   // CHART COLOR SCHEMES
@@ -365,11 +409,16 @@ const spiderData = [
   // ============================================
 
   const summaryStats = useMemo(() => {
-    const totalRevenue = orders.reduce((sum, order) => 
-      sum + Number(order.total_amount || order.total || order.amount || 0), 0);
+    // The status rollup covers every order, not just the loaded page
+    const totalRevenue = analytics
+      ? analytics.by_status.reduce((sum, row) => sum + Number(row.revenue), 0)
+      : orders.reduce((sum, order) =>
+        sum + Number(order.total_amount || order.total || order.amount || 0), 0);
     
     const totalProducts = products.length;
-    const totalOrders = orders.length;
+    const totalOrders = analytics
+      ? analytics.by_status.reduce((sum, row) => sum + row.orders, 0)
+      : orders.length;
     const avgOrderValue = totalOrders > 0 ? totalRevenue / totalOrders : 0;
 
     return {
@@ -378,7 +427,7 @@ const spiderData = [
       totalOrders, 
       avgOrderValue: Number(avgOrderValue.toFixed(2))
     };
-  }, [products, orders]);
+  }, [products, orders, analytics]);
 
   // ============================================
   // RENDER CHARTS